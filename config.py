@@ -2,11 +2,20 @@
 Micro QR Code 生成器配置文件
 
 支持自定义默认参数和应用程序设置。
+配置文件在首次读取配置项时才加载；文件不存在时使用默认配置，不会自动写入磁盘。
+配置项展平为 "a.b.c" -> 值 的字典，读取为一次字典查找（get 不访问文件系统）；
+由宿主的事件循环定时调用 reload_if_changed 按 mtime/大小检测文件变化并热加载，变化的键通过订阅回调
+在该线程中通知（GUI、HTTP 服务据此应用新的默认值而无需重启）。
+set() 设置的值单独保存为覆盖层，重新加载文件后仍然生效。
 """
 
+import copy
 import json
 import os
-from typing import Dict, Any
+import threading
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
+
+from micro_qr_profile import span
 
 
 class Config:
@@ -26,7 +35,14 @@ class Config:
             "format": "png",
             "scale": 1,
             "border": 1,
-            "error_correction": "L"
+            "error_correction": "L",
+            "png_compression": "default"
+        },
+        
+        # 渲染缓存（LRU）
+        "cache": {
+            "max_entries": 1024,
+            "max_bytes": 33554432
         },
         
         # 文件路径设置
@@ -35,6 +51,14 @@ class Config:
             "config_file": "micro_qr_config.json"
         },
         
+        # HTTP 服务 (micro_qr_generator.py serve) 的默认渲染参数
+        "server": {
+            "format": "png",
+            "scale": 8,
+            "border": 4,
+            "error_correction": "L"
+        },
+        
         # 界面设置
         "ui": {
             "language": "zh_CN",
@@ -52,7 +76,48 @@ class Config:
             config_file: 配置文件路径
         """
         self.config_file = config_file
-        self.config = self.load_config()
+        self._lock = threading.RLock()
+        self._config: Optional[Dict[str, Any]] = None
+        self._flat: Dict[str, Any] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+        # set() 设置的值（点号键 -> 值），按设置顺序覆盖文件内容
+        self._overrides: Dict[str, Any] = {}
+        self._subscribers: List[Callable[[Set[str]], None]] = []
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """配置字典（首次访问时加载）"""
+        return self._ensure_loaded()
+
+    def _ensure_loaded(self) -> Dict[str, Any]:
+        if self._config is None:
+            with self._lock:
+                if self._config is None:
+                    self._apply(self.load_config(), notify=False)
+        return self._config
+
+    @config.setter
+    def config(self, value: Dict[str, Any]) -> None:
+        self._apply(value)
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.config_file)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _read_file(self) -> Dict[str, Any]:
+        """读取配置文件并与默认配置合并（文件不存在时返回默认配置）"""
+        # 先记录文件状态再读取：读取期间的修改会在下次检查时被发现
+        self._stamp = self._file_stamp()
+        if self._stamp is None:
+            # 文件不存在时仅使用默认配置，需要落盘时显式调用 save_config
+            return copy.deepcopy(self.DEFAULT_CONFIG)
+        with span('config'), open(self.config_file, 'r', encoding='utf-8') as f:
+            loaded_config = json.load(f)
+        # 合并默认配置和加载的配置
+        return self._merge_configs(self.DEFAULT_CONFIG, loaded_config)
     
     def load_config(self) -> Dict[str, Any]:
         """
@@ -61,19 +126,78 @@ class Config:
         Returns:
             配置字典
         """
-        if os.path.exists(self.config_file):
+        try:
+            return self._read_file()
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"配置文件加载失败: {e}，使用默认配置")
+            return copy.deepcopy(self.DEFAULT_CONFIG)
+
+    def _apply(self, new_config: Dict[str, Any], notify: bool = True) -> Set[str]:
+        """替换配置（叠加 set() 的覆盖值）并重建展平索引，返回值发生变化的叶子键"""
+        with self._lock:
+            for key, value in self._overrides.items():
+                _set_path(new_config, key, value)
+            old = self._flat
+            self._config = new_config
+            self._flat = _flatten(new_config)
+            changed = {key for key in old.keys() | self._flat.keys()
+                       if not isinstance(self._flat.get(key), dict) and not isinstance(old.get(key), dict)
+                       and old.get(key, _MISSING) != self._flat.get(key, _MISSING)}
+        if notify and changed:
+            self._notify(changed)
+        return changed
+
+    def reload_if_changed(self) -> Set[str]:
+        """
+        检查配置文件的 mtime 与大小，发生变化时重新加载并通知订阅者
+
+        文件内容无效（如正在编辑、JSON 不完整）时保留当前配置。
+
+        Returns:
+            值发生变化的键（未变化时为空集合）
+        """
+        if self._config is None:
+            self._ensure_loaded()
+            return set()
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return set()
+        with self._lock:
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    loaded_config = json.load(f)
-                # 合并默认配置和加载的配置
-                return self._merge_configs(self.DEFAULT_CONFIG, loaded_config)
+                new_config = self._read_file()
             except (json.JSONDecodeError, IOError) as e:
-                print(f"配置文件加载失败: {e}，使用默认配置")
-                return self.DEFAULT_CONFIG.copy()
-        else:
-            # 创建默认配置文件
-            self.save_config(self.DEFAULT_CONFIG)
-            return self.DEFAULT_CONFIG.copy()
+                print(f"配置文件重新加载失败: {e}，保留当前配置")
+                return set()
+            return self._apply(new_config)
+
+    def subscribe(self, callback: Callable[[Set[str]], None]) -> Callable[[Set[str]], None]:
+        """
+        订阅配置变化
+
+        Args:
+            callback: 回调 callback(changed_keys)，在触发重新加载 / set 的线程中调用
+
+        Returns:
+            callback 本身（便于之后 unsubscribe）
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable[[Set[str]], None]) -> None:
+        """取消订阅"""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _notify(self, changed: Set[str]) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(changed)
+            except Exception as e:
+                print(f"配置变更回调出错: {type(e).__name__}: {e}")
     
     def save_config(self, config: Dict[str, Any] = None) -> None:
         """
@@ -102,7 +226,8 @@ class Config:
         Returns:
             合并后的配置
         """
-        result = default.copy()
+        # 深拷贝，避免合并时修改 DEFAULT_CONFIG 的嵌套字典
+        result = copy.deepcopy(default)
         
         def merge_dict(base: Dict[str, Any], update: Dict[str, Any]) -> None:
             for key, value in update.items():
@@ -125,35 +250,27 @@ class Config:
         Returns:
             配置值
         """
-        keys = key.split('.')
-        value = self.config
-        
-        try:
-            for k in keys:
-                value = value[k]
-            return value
-        except (KeyError, TypeError):
-            return default
+        if self._config is None:
+            self._ensure_loaded()
+        value = self._flat.get(key, _MISSING)
+        return default if value is _MISSING else value
     
     def set(self, key: str, value: Any) -> None:
         """
-        设置配置值
+        设置配置值（仅修改内存中的配置，重新加载文件后仍然生效；需要落盘时调用 save_config）
         
         Args:
             key: 配置键，支持点号分隔的嵌套键
             value: 配置值
         """
-        keys = key.split('.')
         config = self.config
-        
-        # 导航到父级
-        for k in keys[:-1]:
-            if k not in config:
-                config[k] = {}
-            config = config[k]
-        
-        # 设置值
-        config[keys[-1]] = value
+        with self._lock:
+            # 新值取代此前对该键及其子键的覆盖
+            prefix = key + '.'
+            for k in [k for k in self._overrides if k == key or k.startswith(prefix)]:
+                del self._overrides[k]
+            self._overrides[key] = value
+        self._apply(config)
     
     def update_gui_settings(self, **kwargs) -> None:
         """
@@ -202,5 +319,29 @@ class Config:
         return self.get(f"defaults.{key}", default)
 
 
-# 全局配置实例
+_MISSING = object()
+
+
+def _set_path(config: Dict[str, Any], key: str, value: Any) -> None:
+    """按点号分隔的键写入嵌套字典，缺少的中间层级自动创建"""
+    keys = key.split('.')
+    for k in keys[:-1]:
+        if not isinstance(config.get(k), dict):
+            config[k] = {}
+        config = config[k]
+    config[keys[-1]] = value
+
+
+def _flatten(config: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """展平嵌套字典: {"a": {"b": 1}} -> {"a": {...}, "a.b": 1}（中间层级同样可查）"""
+    flat: Dict[str, Any] = {}
+    for key, value in config.items():
+        path = f"{prefix}{key}"
+        flat[path] = value
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path + '.'))
+    return flat
+
+
+# 全局配置实例（构造时不访问文件系统）
 config = Config()
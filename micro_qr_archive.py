@@ -0,0 +1,227 @@
+"""
+Micro QR Code 归档输出
+
+将批量生成的符号边生成边写入单个 zip / tar 归档，避免在文件系统上产生海量小文件。
+归档末尾附带清单 (MANIFEST_NAME，JSONL)，每行记录成员名、数据在归档中的偏移与大小，
+可据此直接按偏移读取单个符号而无需解析整个归档。
+内容重复的成员可以写为引用 (add_reference)：清单记录指向已写入成员的偏移与 link 字段，
+tar 另写入硬链接成员，zip 不写入成员数据（仅能经清单读取）。
+
+支持的归档类型（按扩展名识别）:
+- .zip: level 为 0 时仅存储，1-9 为 deflate 压缩级别
+- .tar: 不压缩
+- .tar.gz / .tgz: gzip 压缩（level 0-9），偏移量相对于解压后的 tar 流
+"""
+
+import io
+import json
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from typing import Any, Dict, Optional
+
+from micro_qr_profile import span
+
+# 清单成员名（写在归档最后）
+MANIFEST_NAME = '_manifest.jsonl'
+
+ARCHIVE_KINDS = ('zip', 'tar', 'tar.gz')
+
+# zip 本地文件头的固定长度
+_ZIP_LOCAL_HEADER = 30
+
+
+def archive_kind(path: str) -> str:
+    """
+    由文件名推断归档类型
+
+    Raises:
+        ValueError: 不支持的扩展名
+    """
+    lower = path.lower()
+    if lower.endswith('.zip'):
+        return 'zip'
+    if lower.endswith(('.tar.gz', '.tgz')):
+        return 'tar.gz'
+    if lower.endswith('.tar'):
+        return 'tar'
+    raise ValueError(f'无法识别的归档类型: {path} (支持 .zip / .tar / .tar.gz / .tgz)')
+
+
+def member_name(name: str) -> str:
+    """规范化成员名：统一为正斜杠并去掉开头的 / 与 ./"""
+    name = name.replace('\\', '/')
+    while name.startswith(('/', './')):
+        name = name[1:] if name.startswith('/') else name[2:]
+    if not name or name == MANIFEST_NAME:
+        raise ValueError(f'无效的归档成员名: {name!r}')
+    return name
+
+
+class ArchiveWriter:
+    """流式写入 zip / tar 归档并记录清单"""
+
+    def __init__(self, path: str, kind: Optional[str] = None, level: int = 0):
+        """
+        打开归档
+
+        Args:
+            path: 归档文件路径
+            kind: 归档类型 ('zip', 'tar', 'tar.gz')，None 表示按扩展名识别
+            level: 压缩级别 0-9，0 表示仅存储（.tar 忽略该参数）
+        """
+        self.path = path
+        self.kind = kind or archive_kind(path)
+        if self.kind not in ARCHIVE_KINDS:
+            raise ValueError(f'不支持的归档类型: {self.kind}')
+        if not 0 <= level <= 9:
+            raise ValueError(f'压缩级别必须在 0-9 之间: {level}')
+        self.level = level
+        self.count = 0
+        self.references = 0
+        self.bytes_in = 0
+        # 清单先写入临时文件，条目数量再多内存占用也保持平稳
+        self._manifest = tempfile.TemporaryFile(mode='w+b')
+        self._mtime = time.time()
+        if self.kind == 'zip':
+            compression = zipfile.ZIP_DEFLATED if level else zipfile.ZIP_STORED
+            self._zip: Optional[zipfile.ZipFile] = zipfile.ZipFile(
+                path, 'w', compression=compression, compresslevel=level or None)
+            self._tar: Optional[tarfile.TarFile] = None
+        else:
+            self._zip = None
+            if self.kind == 'tar.gz':
+                self._tar = tarfile.open(path, 'w:gz', compresslevel=level)
+            else:
+                self._tar = tarfile.open(path, 'w')
+
+    def add(self, name: str, payload: bytes) -> Dict[str, Any]:
+        """
+        写入一个成员
+
+        Args:
+            name: 成员名
+            payload: 文件内容
+
+        Returns:
+            该成员的清单记录 {name, offset, size, length}
+        """
+        name = member_name(name)
+        with span('write'):
+            return self._add(name, payload)
+
+    def _add(self, name: str, payload: bytes) -> Dict[str, Any]:
+        if self._zip is not None:
+            info = zipfile.ZipInfo(name, time.localtime(self._mtime)[:6])
+            info.compress_type = self._zip.compression
+            info.external_attr = 0o644 << 16
+            self._zip.writestr(info, payload, compresslevel=self._zip.compresslevel)
+            offset = (info.header_offset + _ZIP_LOCAL_HEADER
+                      + len(info.filename.encode('utf-8' if info.flag_bits & 0x800 else 'ascii'))
+                      + len(info.extra))
+            entry = {'name': name, 'offset': offset, 'size': info.compress_size, 'length': len(payload)}
+        else:
+            offset = self._add_tar(name, payload)
+            entry = {'name': name, 'offset': offset, 'size': len(payload), 'length': len(payload)}
+        self._manifest.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.count += 1
+        self.bytes_in += len(payload)
+        return entry
+
+    def add_reference(self, name: str, target: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        写入一个与已有成员内容相同的成员，不重复存储数据
+
+        Args:
+            name: 成员名
+            target: 已写入成员的清单记录（add 的返回值）
+
+        Returns:
+            该成员的清单记录 {name, offset, size, length, link}
+        """
+        name = member_name(name)
+        with span('write'):
+            if self._tar is not None:
+                info = tarfile.TarInfo(name)
+                info.type = tarfile.LNKTYPE
+                info.linkname = target['name']
+                info.mtime = int(self._mtime)
+                info.mode = 0o644
+                self._tar.addfile(info)
+                self._tar.members.clear()
+            entry = {'name': name, 'offset': target['offset'], 'size': target['size'],
+                     'length': target['length'], 'link': target['name']}
+            self._manifest.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.count += 1
+            self.references += 1
+        return entry
+
+    def _add_tar(self, name: str, payload: bytes) -> int:
+        info = tarfile.TarInfo(name)
+        info.size = len(payload)
+        info.mtime = int(self._mtime)
+        info.mode = 0o644
+        self._tar.addfile(info, io.BytesIO(payload))
+        # 写入后 offset 前进了 头部 + 按 512 字节对齐的数据，由此反推数据起点
+        padded = -(-len(payload) // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+        # 写入模式下 TarFile 会保留所有成员信息，清空以保持内存平稳
+        self._tar.members.clear()
+        return self._tar.offset - padded
+
+    def close(self) -> None:
+        """写入清单并关闭归档"""
+        if self._zip is None and self._tar is None:
+            return
+        size = self._manifest.tell()
+        self._manifest.seek(0)
+        try:
+            if self._zip is not None:
+                info = zipfile.ZipInfo(MANIFEST_NAME, time.localtime(self._mtime)[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                with self._zip.open(info, 'w', force_zip64=True) as dest:
+                    shutil.copyfileobj(self._manifest, dest)
+                self._zip.close()
+            else:
+                info = tarfile.TarInfo(MANIFEST_NAME)
+                info.size = size
+                info.mtime = int(self._mtime)
+                info.mode = 0o644
+                self._tar.addfile(info, self._manifest)
+                self._tar.close()
+        finally:
+            self._zip = self._tar = None
+            self._manifest.close()
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_archive(path: str, level: int = 0) -> ArchiveWriter:
+    """按扩展名打开归档写入器，参数同 ArchiveWriter"""
+    return ArchiveWriter(path, None, level)
+
+
+def read_manifest(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    读取归档中的清单
+
+    Returns:
+        成员名 -> {offset, size, length[, link]}
+    """
+    if archive_kind(path) == 'zip':
+        with zipfile.ZipFile(path) as zf:
+            raw = zf.read(MANIFEST_NAME)
+    else:
+        with tarfile.open(path) as tf:
+            raw = tf.extractfile(MANIFEST_NAME).read()
+    manifest = {}
+    for line in raw.decode('utf-8').splitlines():
+        entry = json.loads(line)
+        manifest[entry.pop('name')] = entry
+    return manifest
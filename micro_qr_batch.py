@@ -0,0 +1,771 @@
+"""
+Micro QR Code 批量生成
+
+从 CSV / JSONL / 纯文本文件读取多行数据，使用进程池分块并行生成 Micro QR Code，
+单行出错不会中断整个批次，结束时汇总成功/失败数量与吞吐率。
+每个工作进程持有独立的渲染缓存，重复的数据只编码、渲染一次。
+启用去重 (dedup) 时，主进程按 (数据, 版本, 容错等级) 的摘要只把首次出现的行交给工作进程，
+重复行在原行写出后以硬链接（归档中为引用成员）落地，不再渲染与写入内容。
+
+输入格式（按扩展名识别）:
+- .csv: 列依次为 data, filename, version, error_correction；首行为表头时按列名读取
+- .jsonl / .ndjson: 每行一个 JSON 对象，键同上（error_correction 也可写作 error）
+- 其他: 每个非空行即一条数据
+"""
+
+import csv
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from config import config
+from micro_qr_archive import ArchiveWriter, member_name
+from micro_qr_cache import configure_render_cache, render_cache
+from micro_qr_decoder import sampled, verify as verify_matrix
+from micro_qr_generator import (generate_micro_qr_batch, get_output_path, plan_micro_qr, png_compression,
+                                render_bytes, write_bytes)
+from micro_qr_label import LabelStream
+from micro_qr_profile import profiler
+
+# 工作进程是否需要把分阶段计时随分块结果交回主进程
+_export_spans = False
+
+# 回读校验失败时错误信息的前缀
+VERIFY_FAILED = '回读校验失败'
+
+# 批量输出写入器：归档，或按输入顺序写出的标签流
+Output = Union[ArchiveWriter, LabelStream]
+
+# CSV 无表头时的列顺序
+CSV_COLUMNS = ('data', 'filename', 'version', 'error_correction')
+
+
+class BatchRow(NamedTuple):
+    """批量输入中的一行（字段保持原始字符串，校验推迟到生成阶段以便逐行报错）"""
+    line_no: int
+    data: str
+    filename: Optional[str] = None
+    version: Optional[str] = None
+    error_correction: Optional[str] = None
+    parse_error: Optional[str] = None
+
+
+class RowResult(NamedTuple):
+    """单行生成结果；error 为 None 表示成功。归档模式下 path 为成员名，payload 为待写入的内容"""
+    line_no: int
+    path: Optional[str]
+    error: Optional[str]
+    payload: Optional[bytes] = None
+
+
+class BatchSummary(NamedTuple):
+    """批量生成汇总"""
+    total: int
+    succeeded: int
+    failed: List[RowResult]
+    elapsed: float
+    cache_hits: int = 0
+    cache_misses: int = 0
+    duplicates: int = 0
+    verified: int = 0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def dedup_ratio(self) -> float:
+        """重复行占总行数的比例"""
+        return self.duplicates / self.total if self.total else 0.0
+
+
+def _row_from_mapping(line_no: int, item: Dict[str, object]) -> BatchRow:
+    """由列名映射构造 BatchRow，空字符串视为未提供"""
+    def field(*names: str) -> Optional[str]:
+        for name in names:
+            value = item.get(name)
+            if value is not None and str(value).strip() != '':
+                return str(value).strip()
+        return None
+
+    data = item.get('data')
+    return BatchRow(
+        line_no,
+        '' if data is None else str(data),
+        field('filename'),
+        field('version'),
+        field('error_correction', 'error'),
+    )
+
+
+def _read_csv(f) -> Iterator[BatchRow]:
+    reader = csv.reader(f)
+    header: Optional[List[str]] = None
+    for row in reader:
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        line_no = reader.line_num
+        if header is None and line_no == 1 and row[0].strip().lower() == 'data':
+            header = [cell.strip().lower() for cell in row]
+            continue
+        columns = header or CSV_COLUMNS
+        yield _row_from_mapping(line_no, dict(zip(columns, row)))
+
+
+def _read_jsonl(f) -> Iterator[BatchRow]:
+    for line_no, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            # 无法解析的行同样作为逐行错误上报
+            yield BatchRow(line_no, '', parse_error=f'JSON 解析失败: {e}')
+            continue
+        if not isinstance(item, dict):
+            item = {'data': item}
+        yield _row_from_mapping(line_no, item)
+
+
+def _read_lines(f) -> Iterator[BatchRow]:
+    for line_no, line in enumerate(f, start=1):
+        line = line.rstrip('\r\n')
+        if line.strip():
+            yield BatchRow(line_no, line)
+
+
+def read_batch_rows(path: str) -> Iterator[BatchRow]:
+    """
+    逐行读取批量输入文件
+
+    Args:
+        path: 输入文件路径，按扩展名识别 CSV / JSONL / 纯文本
+
+    Returns:
+        BatchRow 迭代器（惰性读取，适合超大文件）
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        reader = _read_csv
+    elif ext in ('.jsonl', '.ndjson'):
+        reader = _read_jsonl
+    else:
+        reader = _read_lines
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        yield from reader(f)
+
+
+def _parse_version(value: Optional[str]) -> Optional[int]:
+    """解析版本字段，支持 1-4 与 M1-M4"""
+    if value is None:
+        return None
+    text = value.strip().upper()
+    if text.startswith('M'):
+        text = text[1:]
+    if text not in ('1', '2', '3', '4'):
+        raise ValueError(f'无效的版本: {value}')
+    return int(text)
+
+
+def row_params(row: BatchRow, default_error: str) -> Tuple[Optional[int], str]:
+    """
+    解析并校验行内的版本与容错等级（批量生成、标签页与张量输出共用）
+
+    Returns:
+        (版本，None 表示自动选择, 容错等级)
+
+    Raises:
+        ValueError: 行解析失败、数据为空或参数无效
+    """
+    if row.parse_error:
+        raise ValueError(row.parse_error)
+    if not row.data:
+        raise ValueError('数据为空')
+    error = (row.error_correction or default_error).upper()
+    if error not in ('L', 'M', 'Q', 'H'):
+        raise ValueError(f'无效的容错等级: {row.error_correction}')
+    return _parse_version(row.version), error
+
+
+def _prime_symbols(rows: List[BatchRow], default_error: str, mask_engine: str) -> None:
+    """对分块中尚未缓存的数据按 (版本, 容错等级) 分组批量编码，并放入渲染缓存"""
+    groups: Dict[Tuple[Optional[int], str], List[str]] = {}
+    for row in rows:
+        try:
+            version, error = row_params(row, default_error)
+        except ValueError:
+            continue
+        if not render_cache.has_symbol(row.data, version, error):
+            datas = groups.setdefault((version, error), [])
+            if row.data not in datas:
+                datas.append(row.data)
+    for (version, error), datas in groups.items():
+        codes = generate_micro_qr_batch(datas, version, error, mask_engine, return_exceptions=True)
+        for data, qr in zip(datas, codes):
+            # 编码失败的行留给逐行处理时报告具体错误
+            if not isinstance(qr, ValueError):
+                render_cache.put_symbol(data, version, error, qr)
+
+
+def output_name(row: BatchRow, fmt: str) -> str:
+    """行对应的输出文件名（未指定时按行号命名，如 000012.png）"""
+    return row.filename or f'{row.line_no:06d}.{fmt}'
+
+
+def _process_row(row: BatchRow, fmt: str, scale: int, border: int, default_error: str,
+                 engine: str, archive: bool = False, verify: bool = False) -> RowResult:
+    try:
+        version, error = row_params(row, default_error)
+        if verify:
+            qr = render_cache.get_symbol(row.data, version, error, engine, _count=False)
+            try:
+                verify_matrix(qr.matrix, row.data)
+            except ValueError as e:
+                raise ValueError(f'{VERIFY_FAILED}: {e}') from e
+        payload = render_cache.render(row.data, version, error, scale, border, fmt, engine)
+        name = output_name(row, fmt)
+        if archive:
+            # 归档由主进程统一写入，工作进程只返回内容
+            return RowResult(row.line_no, name, None, payload)
+        out_path = get_output_path(name)
+        write_bytes(out_path, payload)
+        return RowResult(row.line_no, out_path, None)
+    except Exception as e:
+        return RowResult(row.line_no, None, f'{type(e).__name__}: {e}')
+
+
+def _init_worker(cache_entries: Optional[int], cache_bytes: Optional[int], profile: bool = False,
+                 png_level: Optional[str] = None) -> None:
+    """
+    工作进程初始化：按批量参数调整进程内缓存容量，profile 为 True 时启用分阶段计时，
+    png_level 为主进程的 PNG 压缩级别（spawn 启动的进程不继承内存中的配置）
+    """
+    global _export_spans
+    configure_render_cache(cache_entries, cache_bytes)
+    if png_level is not None:
+        config.set('defaults.png_compression', png_level)
+    if profile:
+        # fork 启动的进程会继承主进程已有的统计，清空以免合并时重复计数
+        profiler.reset()
+        profiler.enable()
+        _export_spans = True
+
+
+def process_chunk(rows: List[BatchRow], fmt: str, scale: int, border: int,
+                  default_error: str, engine: str = 'segno',
+                  mask_engine: str = 'python',
+                  archive: bool = False, verify: float = 0.0) -> Tuple[List[RowResult], Dict[str, Any]]:
+    """
+    在工作进程中处理一个分块
+
+    Args:
+        rows: 分块内的行
+        fmt: 输出格式 ('svg'、'png' 或标签格式 'pbm' / 'zpl' / 'epl')
+        scale: 缩放比例
+        border: 边框大小
+        default_error: 行内未指定时使用的容错等级
+        engine: 编码引擎 ('segno' 或 'builtin')
+        mask_engine: 内置引擎的掩码评估方式，'numpy' 时整个分块矢量化编码
+        archive: True 时不写文件，成功行的内容随结果返回
+        verify: 回读校验的抽样比例 (0-1)，0 表示不校验
+
+    Returns:
+        (每行的生成结果, 本分块的缓存命中/未命中增量与校验数；启用计时的工作进程另含 spans)
+    """
+    before = render_cache.stats()
+    if engine == 'builtin' and mask_engine == 'numpy':
+        _prime_symbols(rows, default_error, mask_engine)
+    results = []
+    verified = 0
+    for row in rows:
+        check = verify > 0 and sampled(row.line_no, verify)
+        result = _process_row(row, fmt, scale, border, default_error, engine, archive, check)
+        results.append(result)
+        # 编码前即失败的行不计入校验数
+        verified += check and (result.error is None or VERIFY_FAILED in result.error)
+    after = render_cache.stats()
+    stats: Dict[str, Any] = {k: after[k] - before[k] for k in ('hits', 'misses')}
+    stats['verified'] = verified
+    if _export_spans:
+        stats['spans'] = profiler.export()
+    return results, stats
+
+
+def _chunked(rows: Iterable[BatchRow], size: int) -> Iterator[List[BatchRow]]:
+    chunk: List[BatchRow] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _pool_results(pool: ProcessPoolExecutor, tasks: Iterable[Tuple[Callable[..., Any], tuple]],
+                  max_pending: int, ordered: bool = False) -> Iterator[Any]:
+    """
+    向进程池提交任务并产出结果，在途任务数不超过 max_pending（避免一次性读入整个输入）
+
+    Args:
+        ordered: True 时按提交顺序产出（标签流需保持输入顺序），否则按完成顺序
+    """
+    pending: Deque[Future] = deque()
+    for fn, args in tasks:
+        pending.append(pool.submit(fn, *args))
+        if len(pending) < max_pending:
+            continue
+        if ordered:
+            yield pending.popleft().result()
+            continue
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        pending = deque(future for future in pending if future not in done)
+        for future in done:
+            yield future.result()
+    for future in pending:
+        yield future.result()
+
+
+class _Deduplicator:
+    """
+    主进程中的去重阶段
+
+    filter 只放行每个摘要首次出现的行；重复行挂在原行名下，原行结果返回后由 resolve
+    一并落地（原行已完成时在 drain 中落地）。原行失败时重复行报告相同的错误。
+    """
+
+    def __init__(self, fmt: str, default_error: str, archive: Optional[ArchiveWriter]):
+        self.fmt = fmt
+        self.default_error = default_error
+        self.archive = archive
+        # 摘要 -> 原行的结果: None 表示仍在处理，否则为 (路径 / 归档清单记录, 错误信息)
+        self.outcomes: Dict[bytes, Optional[Tuple[Any, Optional[str]]]] = {}
+        self.waiting: Dict[bytes, List[BatchRow]] = {}
+        # 在途原行: 行号 -> 摘要
+        self.originals: Dict[int, bytes] = {}
+        self.ready: List[RowResult] = []
+        self.duplicates = 0
+
+    def _digest(self, row: BatchRow) -> Optional[bytes]:
+        try:
+            version, error = row_params(row, self.default_error)
+        except ValueError:
+            return None
+        key = f'{version}|{error}|'.encode('ascii') + row.data.encode('utf-8', 'surrogatepass')
+        return hashlib.blake2b(key, digest_size=16).digest()
+
+    def filter(self, rows: Iterable[BatchRow]) -> Iterator[BatchRow]:
+        for row in rows:
+            digest = self._digest(row)
+            if digest is None:
+                # 参数无效的行照常交给工作进程报错
+                yield row
+                continue
+            if digest not in self.outcomes:
+                self.outcomes[digest] = None
+                self.originals[row.line_no] = digest
+                yield row
+                continue
+            self.duplicates += 1
+            outcome = self.outcomes[digest]
+            if outcome is None:
+                self.waiting.setdefault(digest, []).append(row)
+            else:
+                self.ready.append(self._materialize(row, *outcome))
+
+    def resolve(self, result: RowResult, entry: Optional[Dict[str, Any]] = None) -> List[RowResult]:
+        """记录原行结果（归档模式下 entry 为其清单记录），返回等待它的重复行的结果"""
+        digest = self.originals.pop(result.line_no, None)
+        if digest is None:
+            return []
+        outcome = (entry if self.archive is not None else result.path, result.error)
+        self.outcomes[digest] = outcome
+        return [self._materialize(row, *outcome) for row in self.waiting.pop(digest, ())]
+
+    def drain(self) -> List[RowResult]:
+        ready, self.ready = self.ready, []
+        return ready
+
+    def _materialize(self, row: BatchRow, original: Any, error: Optional[str]) -> RowResult:
+        if error is not None:
+            return RowResult(row.line_no, None, error)
+        name = output_name(row, self.fmt)
+        try:
+            if self.archive is not None:
+                if member_name(name) == original['name']:
+                    return RowResult(row.line_no, name, None)
+                self.archive.add_reference(name, original)
+                return RowResult(row.line_no, name, None)
+            out_path = get_output_path(name)
+            if os.path.abspath(out_path) != os.path.abspath(original):
+                _link(original, out_path)
+            return RowResult(row.line_no, out_path, None)
+        except (OSError, ValueError) as e:
+            return RowResult(row.line_no, None, f'{type(e).__name__}: {e}')
+
+
+def _link(source: str, target: str) -> None:
+    """以硬链接落地重复文件；文件系统不支持硬链接时退回复制"""
+    directory = os.path.dirname(target)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if os.path.lexists(target):
+        os.unlink(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def run_batch(rows: Iterable[BatchRow], fmt: str = 'svg', scale: int = 8, border: int = 4,
+              default_error: str = 'L', engine: str = 'segno', mask_engine: str = 'python',
+              workers: Optional[int] = None,
+              chunk_size: int = 256, cache_entries: Optional[int] = None,
+              cache_bytes: Optional[int] = None,
+              archive: Optional[Output] = None, dedup: bool = False,
+              verify: float = 0.0) -> BatchSummary:
+    """
+    批量生成 Micro QR Code
+
+    Args:
+        rows: 输入行（可为惰性迭代器）
+        fmt: 输出格式 ('svg'、'png' 或标签格式 'pbm' / 'zpl' / 'epl')
+        scale: 缩放比例
+        border: 边框大小
+        default_error: 行内未指定时使用的容错等级
+        engine: 编码引擎 ('segno' 或 'builtin')
+        mask_engine: 内置引擎的掩码评估方式 ('python' 或 'numpy')
+        workers: 工作进程数，None 表示 CPU 核数，1 表示在当前进程内执行
+        chunk_size: 每个任务包含的行数
+        cache_entries: 每个工作进程的渲染缓存条目上限，None 表示取配置 cache.max_entries，0 表示禁用
+        cache_bytes: 每个工作进程的渲染缓存字节上限，None 表示取配置 cache.max_bytes
+        archive: 归档写入器；指定时所有符号按完成顺序写入该归档而不是逐个文件。也可为
+            micro_qr_label.LabelStream，此时按输入顺序写出（不能与 dedup 同时使用）
+        dedup: 是否去重；数据与参数相同的行只渲染一次，其余以硬链接（归档中为引用成员）落地
+        verify: 回读校验的抽样比例 (0-1)，0 表示不校验；抽中的行在工作进程中解码模块矩阵并与数据比较，
+            不一致时该行记为失败
+
+    Returns:
+        BatchSummary 汇总结果
+    """
+    if not 0 <= verify <= 1:
+        raise ValueError(f'校验抽样比例必须在 0-1 之间: {verify}')
+    ordered = getattr(archive, 'ordered', False)
+    if dedup and ordered:
+        raise ValueError('标签流按输入顺序输出，不能与去重同时使用')
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, chunk_size)
+    total = 0
+    succeeded = 0
+    failed: List[RowResult] = []
+    cache_stats = {'hits': 0, 'misses': 0, 'verified': 0}
+    deduplicator = _Deduplicator(fmt, default_error, archive) if dedup else None
+
+    def record(result: RowResult) -> None:
+        nonlocal total, succeeded
+        total += 1
+        if result.error is None:
+            succeeded += 1
+        else:
+            failed.append(result)
+
+    def collect(chunk_result: Tuple[List[RowResult], Dict[str, Any]]) -> None:
+        results, chunk_stats = chunk_result
+        for key in cache_stats:
+            cache_stats[key] += chunk_stats[key]
+        if 'spans' in chunk_stats:
+            profiler.merge(chunk_stats['spans'])
+        for result in results:
+            entry = None
+            if result.error is None and archive is not None:
+                try:
+                    entry = archive.add(result.path, result.payload)
+                except ValueError as e:
+                    result = RowResult(result.line_no, None, f'{type(e).__name__}: {e}')
+            record(result)
+            if deduplicator is not None:
+                for duplicate in deduplicator.resolve(result, entry):
+                    record(duplicate)
+        if deduplicator is not None:
+            for duplicate in deduplicator.drain():
+                record(duplicate)
+
+    start = time.perf_counter()
+    chunks = _chunked(deduplicator.filter(rows) if deduplicator is not None else rows, chunk_size)
+    if workers == 1:
+        _init_worker(cache_entries, cache_bytes)
+        for chunk in chunks:
+            collect(process_chunk(chunk, fmt, scale, border, default_error, engine, mask_engine,
+                                  archive is not None, verify))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(cache_entries, cache_bytes, profiler.enabled,
+                                           png_compression())) as pool:
+            tasks = ((process_chunk, (chunk, fmt, scale, border, default_error, engine, mask_engine,
+                                      archive is not None, verify)) for chunk in chunks)
+            for chunk_result in _pool_results(pool, tasks, workers * 2, ordered):
+                collect(chunk_result)
+    if deduplicator is not None:
+        # 最后一个分块之后读到的重复行
+        for duplicate in deduplicator.drain():
+            record(duplicate)
+    elapsed = time.perf_counter() - start
+    failed.sort(key=lambda r: r.line_no)
+    return BatchSummary(total, succeeded, failed, elapsed, cache_stats['hits'], cache_stats['misses'],
+                        deduplicator.duplicates if deduplicator is not None else 0, cache_stats['verified'])
+
+
+def _sequence_chunk(prefix: str, width: int, first: int, count: int, offset: int, fmt: str, scale: int,
+                    border: int, version: Optional[int], error: Optional[str],
+                    archive: bool = False, verify: float = 0.0) -> Tuple[List[RowResult], Dict[str, Any]]:
+    """
+    在工作进程中生成序列的一段（first 起共 count 个序号，offset 为首个序号在序列中的位置）
+
+    Returns:
+        与 process_chunk 相同的 (每条结果, 统计) 结构
+    """
+    from micro_qr_sequence import SequenceEncoder
+
+    encoder = SequenceEncoder(prefix, width, version, error)
+    results = []
+    verified = 0
+    for i in range(count):
+        line_no = offset + i + 1
+        try:
+            data = encoder.data(first + i)
+            code = encoder.encode(first + i)
+            if verify > 0 and sampled(line_no, verify):
+                verified += 1
+                try:
+                    verify_matrix(code.matrix, data)
+                except ValueError as e:
+                    raise ValueError(f'{VERIFY_FAILED}: {e}') from e
+            payload = render_bytes(code, fmt, scale, border)
+            name = f"{data.replace('/', '_').replace(os.sep, '_')}.{fmt}"
+            if archive:
+                results.append(RowResult(line_no, name, None, payload))
+                continue
+            out_path = get_output_path(name)
+            write_bytes(out_path, payload)
+            results.append(RowResult(line_no, out_path, None))
+        except Exception as e:
+            results.append(RowResult(line_no, None, f'{type(e).__name__}: {e}'))
+    stats: Dict[str, Any] = {'hits': 0, 'misses': 0, 'verified': verified}
+    if _export_spans:
+        stats['spans'] = profiler.export()
+    return results, stats
+
+
+def run_sequence(prefix: str, start: int, count: int, width: int = 0, fmt: str = 'svg', scale: int = 8,
+                 border: int = 4, version: Optional[int] = None, error: Optional[str] = 'L',
+                 workers: Optional[int] = None, chunk_size: int = 256,
+                 archive: Optional[Output] = None, verify: float = 0.0) -> BatchSummary:
+    """
+    生成前缀 + 递增序号的一批符号（使用 micro_qr_sequence 的增量编码器），文件按数据命名
+
+    Args:
+        prefix: 固定前缀
+        start: 起始序号
+        count: 数量
+        width: 序号的最小位数（左侧补 0）
+        fmt, scale, border, workers, chunk_size, archive, verify: 同 run_batch
+        version: 指定版本，None 表示自动选择
+        error: 容错等级
+
+    Returns:
+        BatchSummary 汇总结果（行号为序号在序列中的位置，从 1 开始）
+    """
+    if start < 0 or count < 0:
+        raise ValueError('起始序号与数量不能为负数')
+    if not 0 <= verify <= 1:
+        raise ValueError(f'校验抽样比例必须在 0-1 之间: {verify}')
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, chunk_size)
+    total = 0
+    succeeded = 0
+    verified = 0
+    failed: List[RowResult] = []
+
+    def collect(chunk_result: Tuple[List[RowResult], Dict[str, Any]]) -> None:
+        nonlocal total, succeeded, verified
+        results, chunk_stats = chunk_result
+        verified += chunk_stats['verified']
+        if 'spans' in chunk_stats:
+            profiler.merge(chunk_stats['spans'])
+        for result in results:
+            total += 1
+            if result.error is None and archive is not None:
+                try:
+                    archive.add(result.path, result.payload)
+                except ValueError as e:
+                    result = RowResult(result.line_no, None, f'{type(e).__name__}: {e}')
+            if result.error is None:
+                succeeded += 1
+            else:
+                failed.append(result)
+
+    begin = time.perf_counter()
+    chunks = [(start + offset, min(chunk_size, count - offset), offset) for offset in range(0, count, chunk_size)]
+    if workers == 1 or len(chunks) <= 1:
+        _init_worker(None, None)
+        for first, n, offset in chunks:
+            collect(_sequence_chunk(prefix, width, first, n, offset, fmt, scale, border, version, error,
+                                    archive is not None, verify))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(None, None, profiler.enabled, png_compression())) as pool:
+            tasks = ((_sequence_chunk, (prefix, width, first, n, offset, fmt, scale, border, version, error,
+                                        archive is not None, verify)) for first, n, offset in chunks)
+            for chunk_result in _pool_results(pool, tasks, workers * 2, getattr(archive, 'ordered', False)):
+                collect(chunk_result)
+    failed.sort(key=lambda r: r.line_no)
+    return BatchSummary(total, succeeded, failed, time.perf_counter() - begin, verified=verified)
+
+
+def plan_rows(rows: Iterable[BatchRow], default_error: str = 'L') -> BatchSummary:
+    """
+    仅校验每行能否编码（查容量表，不生成符号）
+
+    Args:
+        rows: 输入行
+        default_error: 行内未指定时使用的容错等级
+
+    Returns:
+        BatchSummary 汇总结果
+    """
+    total = 0
+    succeeded = 0
+    failed: List[RowResult] = []
+    start = time.perf_counter()
+    for row in rows:
+        total += 1
+        try:
+            version, error = row_params(row, default_error)
+            plan_micro_qr(row.data, version, error)
+            succeeded += 1
+        except ValueError as e:
+            failed.append(RowResult(row.line_no, None, f'{type(e).__name__}: {e}'))
+    return BatchSummary(total, succeeded, failed, time.perf_counter() - start)
+
+
+def encode_symbols(rows: List[BatchRow], default_error: str = 'L') -> List[Tuple[Optional[bytes], Optional[str]]]:
+    """
+    使用内置编码器将一组行编码为紧凑符号记录（可在工作进程中执行，结果每条不超过 38 字节，便于跨进程传递）
+
+    Args:
+        rows: 输入行
+        default_error: 行内未指定时使用的容错等级
+
+    Returns:
+        与 rows 一一对应的 (MicroSymbol 记录, 错误信息) 列表，成功时错误信息为 None
+    """
+    import micro_qr_encoder
+    from micro_qr_symbol import MicroSymbol
+
+    results: List[Tuple[Optional[bytes], Optional[str]]] = []
+    for row in rows:
+        try:
+            version, error = row_params(row, default_error)
+            code = micro_qr_encoder.encode(row.data, version, error)
+            results.append((MicroSymbol.from_code(code).to_bytes(), None))
+        except Exception as e:
+            results.append((None, f'{type(e).__name__}: {e}'))
+    return results
+
+
+def export_symbols(rows: Sequence[BatchRow], symbols: Sequence[Optional[bytes]], target: str,
+                   fmt: str = 'png', scale: int = 8, border: int = 4, archive: bool = False,
+                   level: int = 0, cancel: Optional[threading.Event] = None,
+                   progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    将 encode_symbols 的结果渲染并写出到目录或归档（跳过编码失败的行）
+
+    Args:
+        rows: 输入行
+        symbols: 与 rows 对应的符号记录，None 表示该行失败
+        target: 输出目录，或 archive 为 True 时的归档路径
+        fmt: 输出格式 ('svg'、'png' 或标签格式 'pbm' / 'zpl' / 'epl')
+        scale: 缩放比例
+        border: 边框大小
+        archive: 是否写入单个归档（格式按扩展名识别）
+        level: 归档压缩级别
+        cancel: 置位后提前结束
+        progress: 每写出一批后以累计写出数调用
+
+    Returns:
+        写出的文件数
+
+    Raises:
+        OSError, ValueError: 无法创建目录 / 归档或写入失败
+    """
+    from micro_qr_archive import open_archive
+    from micro_qr_generator import render_bytes
+    from micro_qr_symbol import MicroSymbol
+
+    writer = open_archive(target, level) if archive else None
+    if writer is None:
+        os.makedirs(target, exist_ok=True)
+    written = 0
+    try:
+        for row, record in zip(rows, symbols):
+            if cancel is not None and cancel.is_set():
+                break
+            if record is None:
+                continue
+            payload = render_bytes(MicroSymbol(record), fmt, scale, border)
+            name = output_name(row, fmt)
+            if writer is not None:
+                writer.add(name, payload)
+            else:
+                write_bytes(os.path.join(target, name), payload)
+            written += 1
+            if progress is not None and written % 256 == 0:
+                progress(written)
+    finally:
+        if writer is not None:
+            writer.close()
+    if progress is not None:
+        progress(written)
+    return written
+
+
+def write_error_log(path: str, failed: List[RowResult]) -> None:
+    """以 JSONL 格式写出失败行（line, error）"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for result in failed:
+            f.write(json.dumps({'line': result.line_no, 'error': result.error}, ensure_ascii=False))
+            f.write('\n')
+
+
+def format_summary(summary: BatchSummary, action: str = '生成') -> Tuple[str, List[str]]:
+    """
+    生成汇总文本
+
+    Args:
+        summary: 汇总结果
+        action: 汇总行中的动作名称（如 '生成'、'校验'）
+
+    Returns:
+        (汇总行, 失败行明细列表)
+    """
+    line = (f"批量{action}完成: 共 {summary.total} 行，成功 {summary.succeeded}，"
+            f"失败 {len(summary.failed)}，用时 {summary.elapsed:.2f}s，"
+            f"{summary.rows_per_sec:.1f} 行/秒")
+    if summary.cache_hits:
+        line += f"，缓存命中 {summary.cache_hits}"
+    if summary.duplicates:
+        line += f"，去重 {summary.duplicates} 行 ({summary.dedup_ratio:.1%})"
+    if summary.verified:
+        line += f"，回读校验 {summary.verified} 行"
+        mismatched = sum(1 for r in summary.failed if r.error and VERIFY_FAILED in r.error)
+        if mismatched:
+            line += f"（其中 {mismatched} 行内容不一致，原因见失败明细）"
+    details = [f"  第 {r.line_no} 行: {r.error}" for r in summary.failed]
+    return line, details
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Micro QR Code 性能基准
+
+无界面运行，覆盖以下路径:
+- encode:  generate_micro_qr，遍历 M1-M4 × 容错等级 × 数字/字母数字/字节/汉字负载，两种编码引擎
+- save:    save_png / save_svg，多种 scale 与 border；PNG 各压缩级别
+- svg:     各版本 segno 通用 SVG 与精简 SVG (micro_qr_svg) 的吞吐与每个符号的字节数
+- sequence: 前缀 + 递增序号的逐条独立编码与增量编码 (micro_qr_sequence)
+- verify:  各版本模块矩阵的回读解码校验 (micro_qr_decoder)
+- label:   标签打印机光栅 PBM / ZPL / EPL (micro_qr_label)，及先写 PNG 再经 Pillow 转为 ZPL 的对照
+- preview: GUI 预览路径 _render_preview（编码与 1 位 PNG）及主线程的 PhotoImage 创建（无显示环境时为 preview-nophoto）
+- startup: 子进程中 `-X importtime` 测得的 micro_qr_generator 导入耗时与 `--help` 总耗时
+
+每项报告 ops/sec、单次耗时分位数 (p50/p90/p99) 与 tracemalloc 峰值内存（返回内容的项另报告字节数），结果写入 JSON；
+指定 --baseline 时与保存的基线比较，吞吐下降超过阈值即以退出码 1 结束，便于夜间任务发现性能回退。
+
+示例:
+  python micro_qr_bench.py -o bench.json
+  python micro_qr_bench.py --baseline bench.json --threshold 0.15
+  python micro_qr_bench.py --filter encode/builtin --min-time 0.5
+  python micro_qr_bench.py --filter startup
+  python micro_qr_bench.py --filter startup --import-budget 30
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import segno
+
+import micro_qr_encoder
+from micro_qr_generator import ENGINES, generate_micro_qr, render_bytes, save_png, save_svg
+
+# 各模式用于构造负载的字符（汉字为 Shift JIS 可编码的字符）
+PAYLOAD_CHARS = {
+    'numeric': '0123456789',
+    'alphanumeric': 'ABC123 $%*+-./:',
+    'byte': 'abcdefxyz!',
+    'kanji': '点茗漢字',
+}
+
+SAVE_SCALES = (1, 4, 8, 16)
+SAVE_BORDERS = (0, 4)
+PNG_LEVELS = ('fast', 'default', 'small')
+PREVIEW_SIZES = (120, 240, 320)
+PREVIEW_BORDERS = (0, 2)
+# 与配置 gui.max_preview_size 的默认值一致
+PREVIEW_MAX_SIZE = 320
+
+# 启动耗时的重复测量次数（取最小值以排除调度抖动）
+STARTUP_RUNS = 5
+
+# 导入 CLI 模块时不应加载的重量级模块
+LAZY_MODULES = ('segno', 'PIL', 'numpy', 'micro_qr_encoder', 'concurrent.futures.process', 'cProfile')
+
+# micro_qr_generator 导入耗时的默认预算（毫秒）；实测约 20-25ms，留出约一倍余量
+IMPORT_BUDGET_MS = 50.0
+
+# 测量峰值内存时的调用次数（tracemalloc 会显著拖慢执行，因此与计时分开进行）
+MEMORY_CALLS = 20
+
+
+class BenchCase(NamedTuple):
+    """一个基准项"""
+    name: str
+    func: Callable[[], Any]
+
+
+def _payload(version: int, error: Optional[str], mode: str) -> Optional[str]:
+    """构造恰好填满该版本/容错等级容量的负载，模式不被支持时返回 None"""
+    limit = micro_qr_encoder.MAX_CHARS.get((version, error, mode), 0)
+    if not limit:
+        return None
+    chars = PAYLOAD_CHARS[mode]
+    data = (chars * (limit // len(chars) + 1))[:limit]
+    plan = micro_qr_encoder.plan(data, version, error, boost=False)
+    return data if plan.mode == mode else None
+
+
+def encode_cases() -> List[BenchCase]:
+    cases = []
+    for engine in ENGINES:
+        for version, errors in micro_qr_encoder.ERROR_LEVELS.items():
+            for error in errors:
+                for mode in micro_qr_encoder.MODES:
+                    data = _payload(version, error, mode)
+                    if data is None:
+                        continue
+                    designator = f'M{version}' + (f'-{error}' if error else '')
+                    cases.append(BenchCase(
+                        f'encode/{engine}/{designator}/{mode}',
+                        lambda d=data, v=version, e=error, g=engine: generate_micro_qr(d, v, e, g),
+                    ))
+    return cases
+
+
+def save_cases(workdir: str) -> List[BenchCase]:
+    qr = generate_micro_qr('BENCH-0123456789', 4, 'L')
+    cases = []
+    for kind, save in (('png', save_png), ('svg', save_svg)):
+        path = os.path.join(workdir, f'bench.{kind}')
+        for scale in SAVE_SCALES:
+            for border in SAVE_BORDERS:
+                cases.append(BenchCase(
+                    f'save/{kind}/scale{scale}/border{border}',
+                    lambda f=save, p=path, s=scale, b=border: f(qr, p, s, b, verbose=False),
+                ))
+    # 各 PNG 压缩级别（仅渲染，不写文件），含大 scale 以覆盖片段复用路径
+    for level in PNG_LEVELS:
+        for scale in SAVE_SCALES + (64,):
+            cases.append(BenchCase(
+                f'save/png-{level}/scale{scale}',
+                lambda lv=level, s=scale: render_bytes(qr, 'png', s, 4, lv),
+            ))
+    return cases
+
+
+def svg_cases() -> List[BenchCase]:
+    from micro_qr_svg import svg_bytes
+
+    cases = []
+    for version in (1, 2, 3, 4):
+        data = _payload(version, 'L' if version > 1 else None, 'numeric')
+        qr = generate_micro_qr(data, version, 'L' if version > 1 else None)
+
+        def generic(q=qr):
+            buf = io.BytesIO()
+            q.save(buf, kind='svg', scale=8, border=4)
+            return buf.getvalue()
+
+        cases.append(BenchCase(f'svg/segno/M{version}', generic))
+        cases.append(BenchCase(f'svg/compact/M{version}', lambda q=qr: svg_bytes(q.matrix, 8, 4)))
+    return cases
+
+
+def sequence_cases() -> List[BenchCase]:
+    from micro_qr_sequence import SequenceEncoder
+
+    encoder = SequenceEncoder('A', 7)
+    counter = iter(range(10 ** 7))
+    cases = [
+        BenchCase('sequence/independent', lambda: micro_qr_encoder.encode(f'A{next(counter):07d}', None, 'L')),
+        BenchCase('sequence/incremental', lambda: encoder.encode(next(counter))),
+        BenchCase('sequence/incremental-symbol', lambda: encoder.symbol(next(counter))),
+    ]
+    return cases
+
+
+def verify_cases() -> List[BenchCase]:
+    from micro_qr_decoder import verify
+
+    cases = []
+    for version in (1, 2, 3, 4):
+        data = _payload(version, 'L' if version > 1 else None, 'numeric')
+        matrix = generate_micro_qr(data, version, 'L' if version > 1 else None).matrix
+        cases.append(BenchCase(f'verify/M{version}', lambda m=matrix, d=data: verify(m, d)))
+    return cases
+
+
+def label_cases() -> List[BenchCase]:
+    from micro_qr_label import zpl_bytes
+
+    qr = generate_micro_qr('BENCH-0123456789', 4, 'L')
+    cases = []
+    for kind in ('pbm', 'zpl', 'epl'):
+        for scale in SAVE_SCALES:
+            cases.append(BenchCase(f'label/{kind}/scale{scale}',
+                                   lambda k=kind, s=scale: render_bytes(qr, k, s, 4)))
+    try:
+        from PIL import Image
+    except ImportError:
+        return cases
+
+    def via_png(s: int) -> bytes:
+        # 原流程：PNG 编码后解码为位图，再写出未压缩的 ^GFA
+        image = Image.open(io.BytesIO(render_bytes(qr, 'png', s, 4))).convert('1')
+        data = bytes(b ^ 0xff for b in image.tobytes()).hex().upper()
+        total = len(data) // 2
+        return f'^XA^FO0,0^GFA,{total},{total},{(image.width + 7) // 8},{data}^FS^XZ\n'.encode('ascii')
+
+    for scale in SAVE_SCALES:
+        cases.append(BenchCase(f'label/png-pillow-zpl/scale{scale}', lambda s=scale: via_png(s)))
+    return cases
+
+
+def _stub_tkinter() -> None:
+    """环境缺少 tkinter 时放入桩模块，使 micro_qr_gui 可被导入"""
+    try:
+        import tkinter  # noqa: F401
+        return
+    except ImportError:
+        pass
+
+    def module(name: str) -> types.ModuleType:
+        stub = types.ModuleType(name)
+        stub.__getattr__ = lambda attr: type(attr, (), {})
+        sys.modules[name] = stub
+        return stub
+
+    root = module('tkinter')
+    for sub in ('ttk', 'filedialog', 'messagebox', 'font'):
+        setattr(root, sub, module(f'tkinter.{sub}'))
+
+
+def _photo_image() -> Optional[Callable[[bytes], Any]]:
+    """返回在隐藏的 Tk 根窗口上创建 PhotoImage 的函数；没有 tkinter 或显示环境时返回 None"""
+    try:
+        import tkinter
+    except ImportError:
+        return None
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        return None
+    root.withdraw()
+    return lambda data: tkinter.PhotoImage(master=root, data=data)
+
+
+def preview_cases() -> List[BenchCase]:
+    """
+    GUI 的实际预览路径：PreviewJob -> _render_preview（编码 / 1 位 PNG）-> 主线程 PhotoImage 解码
+
+    没有显示环境时无法创建 PhotoImage，只计时到 base64 编码为止，项目名改为 preview-nophoto/...，
+    以免与含 PhotoImage 的基线比较。
+    """
+    # 须在放入 tkinter 桩模块之前探测真实的 Tk
+    photo = _photo_image()
+    _stub_tkinter()
+    import micro_qr_gui
+
+    prefix = 'preview' if photo is not None else 'preview-nophoto'
+    qr = generate_micro_qr('BENCH-0123456789', 4, 'L')
+    cases = []
+    for size in PREVIEW_SIZES:
+        for border in PREVIEW_BORDERS:
+            job = micro_qr_gui.PreviewJob(0, 'BENCH-0123456789', 'png', size, border, PREVIEW_MAX_SIZE, qr)
+
+            def preview(j=job):
+                result = micro_qr_gui._render_preview(j)
+                if result.error is not None:
+                    raise result.error
+                data = base64.b64encode(result.png)
+                return photo(data) if photo is not None else data
+            cases.append(BenchCase(f'{prefix}/{size}px/border{border}', preview))
+    return cases
+
+
+def _import_times(module: str) -> Dict[str, float]:
+    """在子进程中以 -X importtime 导入模块，返回 {模块名: 累计耗时 (ms)}"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=os.path.dirname(os.path.abspath(__file__)),
+                          capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+
+def measure_startup(runs: int = STARTUP_RUNS) -> Dict[str, Dict[str, Any]]:
+    """
+    测量命令行启动开销
+
+    Returns:
+        {'startup/import': {import_ms, lazy_violations}, 'startup/help': {wall_ms}}
+    """
+    import_ms = []
+    loaded = set()
+    for _ in range(runs):
+        times = _import_times('micro_qr_generator')
+        import_ms.append(times['micro_qr_generator'])
+        loaded.update(times)
+    help_ms = []
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'micro_qr_generator.py')
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, '--help'], capture_output=True, check=True)
+        help_ms.append((time.perf_counter() - start) * 1000)
+    return {
+        'startup/import': {'import_ms': min(import_ms),
+                           'lazy_violations': sorted(m for m in LAZY_MODULES if m in loaded)},
+        'startup/help': {'wall_ms': min(help_ms)},
+    }
+
+
+def check_startup(results: Dict[str, Dict[str, Any]], budget_ms: float) -> List[str]:
+    """检查导入耗时预算与延迟导入约束，返回违规描述列表"""
+    problems = []
+    startup = results.get('startup/import')
+    if not startup:
+        return problems
+    if startup['import_ms'] > budget_ms:
+        problems.append(f"startup/import: 导入耗时 {startup['import_ms']:.1f}ms，超出预算 {budget_ms:.1f}ms")
+    if startup['lazy_violations']:
+        problems.append(f"startup/import: 导入时加载了应延迟导入的模块 {', '.join(startup['lazy_violations'])}")
+    return problems
+
+
+def _percentile(sorted_samples: List[float], q: float) -> float:
+    index = min(len(sorted_samples) - 1, max(0, round(q * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def measure(func: Callable[[], Any], min_time: float = 0.2, min_iterations: int = 20) -> Dict[str, float]:
+    """
+    计时并测量峰值内存
+
+    Args:
+        func: 被测函数
+        min_time: 最短计时时长（秒）
+        min_iterations: 最少调用次数
+
+    Returns:
+        包含 iterations, ops_per_sec, mean_us, min_us, p50_us, p90_us, p99_us, peak_kib 的字典，
+        func 返回 bytes / str 时另含其长度 bytes
+    """
+    output = func()  # 预热（填充各类模板与表缓存）
+    samples = []
+    clock = time.perf_counter
+    deadline = clock() + min_time
+    while len(samples) < min_iterations or clock() < deadline:
+        start = clock()
+        func()
+        samples.append(clock() - start)
+    total = sum(samples)
+    samples.sort()
+
+    tracemalloc.start()
+    try:
+        for _ in range(MEMORY_CALLS):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        'iterations': len(samples),
+        'ops_per_sec': len(samples) / total if total > 0 else 0.0,
+        'mean_us': total / len(samples) * 1e6,
+        'min_us': samples[0] * 1e6,
+        'p50_us': _percentile(samples, 0.50) * 1e6,
+        'p90_us': _percentile(samples, 0.90) * 1e6,
+        'p99_us': _percentile(samples, 0.99) * 1e6,
+        'peak_kib': peak / 1024,
+    }
+    if isinstance(output, (bytes, str)):
+        result['bytes'] = len(output)
+    return result
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any],
+            threshold: float) -> List[str]:
+    """
+    与基线比较吞吐
+
+    Returns:
+        回退项的描述列表（ops/sec 低于基线 × (1 - threshold)）
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base or not base.get('ops_per_sec'):
+            continue
+        ratio = result['ops_per_sec'] / base['ops_per_sec']
+        result['baseline_ratio'] = ratio
+        if ratio < 1 - threshold:
+            regressions.append(f"{name}: {result['ops_per_sec']:.0f} ops/s，"
+                               f"基线 {base['ops_per_sec']:.0f} ops/s ({ratio:.0%})")
+    return regressions
+
+
+def run(filters: Optional[List[str]] = None, min_time: float = 0.2,
+        verbose: bool = True) -> Dict[str, Any]:
+    """
+    运行基准
+
+    Args:
+        filters: 仅运行名称包含其中任一子串的项，None 表示全部
+        min_time: 每项最短计时时长（秒）
+        verbose: 是否逐项打印结果
+
+    Returns:
+        {"meta": {...}, "results": {名称: 指标}}
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        cases = (encode_cases() + save_cases(workdir) + svg_cases() + sequence_cases() + verify_cases()
+                 + label_cases() + preview_cases())
+        if filters:
+            cases = [case for case in cases if any(f in case.name for f in filters)]
+        results: Dict[str, Dict[str, Any]] = {}
+        if not filters or any(f in 'startup/import startup/help' for f in filters):
+            results.update(measure_startup())
+            if verbose:
+                print(f"{'startup/import':<40} {results['startup/import']['import_ms']:>10.1f} ms")
+                print(f"{'startup/help':<40} {results['startup/help']['wall_ms']:>10.1f} ms")
+        for case in cases:
+            results[case.name] = result = measure(case.func, min_time)
+            if verbose:
+                print(f"{case.name:<40} {result['ops_per_sec']:>10.0f} ops/s  "
+                      f"p50 {result['p50_us']:>9.1f}us  p99 {result['p99_us']:>9.1f}us  "
+                      f"peak {result['peak_kib']:>8.1f} KiB"
+                      + (f"  {result['bytes']:>6} B" if 'bytes' in result else ''))
+    meta = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'segno': segno.__version__,
+        'min_time': min_time,
+    }
+    return {'meta': meta, 'results': results}
+
+
+def main() -> None:
+    """主函数"""
+    parser = argparse.ArgumentParser(description='Micro QR Code 性能基准')
+    parser.add_argument('-o', '--output', help='将结果写入该 JSON 文件')
+    parser.add_argument('--baseline', help='与该 JSON 基线比较吞吐')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='允许的吞吐下降比例，超出视为回退 (默认: 0.2)')
+    parser.add_argument('--filter', action='append', metavar='SUBSTR',
+                        help='仅运行名称包含该子串的项，可多次指定 (如 encode/builtin、save/png、svg、preview)')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='每项最短计时时长，秒 (默认: 0.2)')
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET_MS, metavar='MS',
+                        help='micro_qr_generator 导入耗时预算 (毫秒)，超出或提前加载重量级模块时视为回退 '
+                             f'(默认: {IMPORT_BUDGET_MS:g})')
+    args = parser.parse_args()
+
+    report = run(args.filter, args.min_time)
+    regressions = []
+    if 'startup/import' in report['results']:
+        regressions += check_startup(report['results'], args.import_budget)
+        report['meta']['import_budget_ms'] = args.import_budget
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions += compare(report['results'], json.load(f), args.threshold)
+        report['meta']['baseline'] = args.baseline
+        report['meta']['threshold'] = args.threshold
+        report['regressions'] = regressions
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+    if regressions:
+        print(f"发现 {len(regressions)} 项性能回退:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Micro QR Code 渲染缓存
+
+进程内 LRU 缓存，分别缓存编码结果 (data, version, error_correction) 与渲染结果
+(data, version, error_correction, scale, border, format, PNG 压缩级别)。按条目数与字节数双重限制淘汰，
+并提供命中/未命中统计。线程安全，可同时供 GUI 与批量生成使用。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import segno
+
+from config import config
+from micro_qr_generator import generate_micro_qr, png_compression, render_bytes
+
+# 编码结果（QRCode 对象）的估算开销：矩阵字节数之外的对象头部分
+_SYMBOL_OVERHEAD = 256
+
+
+def _symbol_cost(qr: segno.QRCode) -> int:
+    return _SYMBOL_OVERHEAD + sum(len(row) for row in qr.matrix)
+
+
+class RenderCache:
+    """编码/渲染结果的 LRU 缓存"""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最大条目数，0 表示禁用缓存
+            max_bytes: 缓存内容的最大总字节数
+        """
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        """
+        调整缓存容量，超出新容量的条目立即淘汰
+
+        Args:
+            max_entries: 最大条目数，None 表示不变
+            max_bytes: 最大总字节数，None 表示不变
+        """
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max(0, int(max_entries))
+            if max_bytes is not None:
+                self.max_bytes = max(0, int(max_bytes))
+            self._evict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def _lookup(self, key: Hashable, count: bool = True) -> Tuple[bool, Any]:
+        # count=False 用于 render 内部对编码结果的二次查找，避免一次请求被重复计数
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return True, entry[0]
+
+    def _store(self, key: Hashable, value: Any, cost: int) -> None:
+        if not self.enabled or cost > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, cost)
+            self._bytes += cost
+            self._evict()
+
+    def _evict(self) -> None:
+        # 调用方需持有锁
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, cost) = self._entries.popitem(last=False)
+            self._bytes -= cost
+            self.evictions += 1
+
+    def get_symbol(self, data: str, version: Optional[int] = None,
+                   error_correction: Optional[str] = 'L', engine: str = 'segno',
+                   _count: bool = True) -> segno.QRCode:
+        """
+        获取（必要时生成）Micro QR Code 对象，参数同 generate_micro_qr
+
+        两种编码引擎的输出逐位一致，因此 engine 不参与缓存键。
+
+        Raises:
+            ValueError: 当数据无法编码时（失败结果不会被缓存）
+        """
+        key = ('symbol', data, version, error_correction)
+        found, qr = self._lookup(key, _count)
+        if not found:
+            qr = generate_micro_qr(data, version, error_correction, engine)
+            self._store(key, qr, _symbol_cost(qr))
+        return qr
+
+    def has_symbol(self, data: str, version: Optional[int] = None,
+                   error_correction: Optional[str] = 'L') -> bool:
+        """返回编码结果是否已在缓存中（不影响统计与 LRU 顺序）"""
+        with self._lock:
+            return ('symbol', data, version, error_correction) in self._entries
+
+    def put_symbol(self, data: str, version: Optional[int], error_correction: Optional[str],
+                   qr: segno.QRCode) -> None:
+        """放入外部（如批量矢量化编码）生成的编码结果"""
+        self._store(('symbol', data, version, error_correction), qr, _symbol_cost(qr))
+
+    def render(self, data: str, version: Optional[int] = None, error_correction: Optional[str] = 'L',
+               scale: int = 8, border: int = 4, fmt: str = 'svg', engine: str = 'segno') -> bytes:
+        """
+        获取（必要时生成并渲染）指定参数的 PNG / SVG 内容
+
+        Args:
+            data: 要编码的文本数据
+            version: Micro QR Code 版本 (1-4)，None 表示自动选择
+            error_correction: 容错等级
+            scale: 缩放比例
+            border: 边框大小
+            fmt: 输出格式 ('svg' 或 'png')
+            engine: 编码引擎 ('segno' 或 'builtin')
+
+        Returns:
+            渲染后的文件内容
+        """
+        # PNG 的内容取决于压缩级别，级别变化（如配置热加载）后不复用旧结果
+        level = png_compression() if fmt == 'png' else None
+        key = ('render', data, version, error_correction, scale, border, fmt, level)
+        found, payload = self._lookup(key)
+        if not found:
+            qr = self.get_symbol(data, version, error_correction, engine, _count=False)
+            payload = render_bytes(qr, fmt, scale, border, level)
+            self._store(key, payload, len(payload))
+        return payload
+
+    def stats(self) -> Dict[str, int]:
+        """
+        返回缓存统计
+
+        Returns:
+            包含 hits, misses, evictions, entries, bytes 的字典
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+    def clear(self) -> None:
+        """清空缓存并重置统计"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+
+def hit_rate(stats: Dict[str, int]) -> float:
+    """由统计字典计算命中率 (0.0-1.0)"""
+    lookups = stats.get('hits', 0) + stats.get('misses', 0)
+    return stats.get('hits', 0) / lookups if lookups else 0.0
+
+
+# 全局缓存实例
+render_cache = RenderCache()
+
+
+def configure_render_cache(max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+    """
+    调整全局缓存容量（也可作为进程池的 initializer）
+
+    Args:
+        max_entries: 最大条目数，None 表示取配置 cache.max_entries
+        max_bytes: 最大总字节数，None 表示取配置 cache.max_bytes
+    """
+    render_cache.configure(config.get('cache.max_entries') if max_entries is None else max_entries,
+                           config.get('cache.max_bytes') if max_bytes is None else max_bytes)
@@ -0,0 +1,242 @@
+"""
+Micro QR Code 模块矩阵解码器 (M1-M4)
+
+用于回读校验生成结果：直接处理模块矩阵（segno 的 qr.matrix、MicroCode.matrix 或
+MicroSymbol.matrix，不含静区），不涉及图像处理:
+- 读取 15 位格式信息，确定版本、容错等级与掩码（允许至多 3 位错误）
+- 按放置顺序一次取出全部数据模块并去除掩码
+- 以 Reed-Solomon 校验数据码字（只检测错误，不纠错：生成结果不应有任何错误）
+- 逐段解析数字 / 字母数字 / 字节 / 汉字段
+
+放置顺序、掩码图形与纠错码查找表均复用内置编码器的预计算结果，每个符号只需少量整数运算。
+"""
+
+from operator import itemgetter
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from micro_qr_encoder import (
+    ALPHANUMERIC_CHARS, CHAR_COUNT_BITS, FORMAT_INFO, MODE_INDICATOR, SYMBOL_INFO, SYMBOL_NUMBER,
+    find_mode, rs_tables, to_bytes, version_tables,
+)
+
+_SYMBOLS = {number: key for key, number in SYMBOL_NUMBER.items()}
+_FORMAT_VALUES = {info: index for index, info in enumerate(FORMAT_INFO)}
+_INDICATOR_MODES = {value: mode for mode, value in MODE_INDICATOR.items()}
+_TO_ASCII = bytes.maketrans(b'\x00\x01', b'01')
+_ALPHANUMERIC = ALPHANUMERIC_CHARS.encode('ascii')
+
+# 格式信息最多可纠正的错误位数（BCH(15,5) 最小距离为 7）
+FORMAT_MAX_ERRORS = 3
+
+
+class DecodedSymbol(NamedTuple):
+    """解码结果"""
+    data: bytes
+    version: int
+    error: Optional[str]
+    mask: int
+    modes: Tuple[str, ...]
+
+    @property
+    def designator(self) -> str:
+        return f'M{self.version}' + (f'-{self.error}' if self.error else '')
+
+    @property
+    def text(self) -> str:
+        """
+        推断原文本，仅供显示（校验请比较 data 字节）
+
+        取按编码器的规则 (micro_qr_encoder.to_bytes) 能还原为同一字节的解释；字节段既可能是
+        ISO-8859-1 也可能是 Shift_JIS 文本，含汉字段时优先按 Shift_JIS 解释。
+        """
+        encodings = ('shift_jis', 'utf-8', 'iso-8859-1') if 'kanji' in self.modes else ('utf-8', 'iso-8859-1')
+        for encoding in encodings:
+            try:
+                text = self.data.decode(encoding)
+            except UnicodeError:
+                continue
+            if to_bytes(text) == self.data:
+                return text
+        return self.data.decode('utf-8', 'replace')
+
+
+_getters: Dict[int, Callable[[bytes], Tuple[int, ...]]] = {}
+
+
+def _stream_getter(version: int) -> Callable[[bytes], Tuple[int, ...]]:
+    """按放置顺序从展平的矩阵中取出数据模块"""
+    getter = _getters.get(version)
+    if getter is None:
+        tables = version_tables(version)
+        getter = _getters[version] = itemgetter(*(i * tables.size + j for i, j in tables.positions))
+    return getter
+
+
+def read_format(matrix: Sequence[Sequence[int]]) -> Tuple[int, Optional[str], int]:
+    """
+    读取格式信息
+
+    Returns:
+        (版本, 容错等级, 掩码)
+
+    Raises:
+        ValueError: 格式信息无法识别
+    """
+    info = 0
+    row_eight = matrix[8]
+    for i in range(8):
+        info |= (matrix[i + 1][8] & 1) << i
+        info |= (row_eight[i + 1] & 1) << (14 - i)
+    index = _FORMAT_VALUES.get(info)
+    if index is None:
+        distance, index = min((bin(info ^ value).count('1'), i) for i, value in enumerate(FORMAT_INFO))
+        if distance > FORMAT_MAX_ERRORS:
+            raise ValueError('无法识别格式信息')
+    version, error = _SYMBOLS[index >> 2]
+    return version, error, index & 0x03
+
+
+class _BitReader:
+    __slots__ = ('value', 'remaining')
+
+    def __init__(self, value: int, nbits: int):
+        self.value = value
+        self.remaining = nbits
+
+    def read(self, n: int) -> int:
+        if n > self.remaining:
+            raise ValueError('数据段超出容量')
+        self.remaining -= n
+        return (self.value >> self.remaining) & ((1 << n) - 1)
+
+    def peek_zero(self, n: int) -> bool:
+        """剩余比特中接下来的 n 位（不足时为全部剩余位）是否全为 0"""
+        n = min(n, self.remaining)
+        return (self.value >> (self.remaining - n)) & ((1 << n) - 1) == 0
+
+
+def _parse_segments(reader: _BitReader, version: int) -> Tuple[bytes, Tuple[str, ...]]:
+    out = bytearray()
+    modes: List[str] = []
+    mode_bits = version - 1
+    terminator = version * 2 + 1
+    while reader.remaining and not reader.peek_zero(terminator):
+        mode = _INDICATOR_MODES.get(reader.read(mode_bits)) if mode_bits else 'numeric'
+        cci = CHAR_COUNT_BITS[mode][version] if mode else None
+        if cci is None:
+            raise ValueError(f'M{version} 不支持该模式指示符')
+        count = reader.read(cci)
+        if mode == 'numeric':
+            for _ in range(count // 3):
+                value = reader.read(10)
+                if value > 999:
+                    raise ValueError('无效的数字段')
+                out += b'%03d' % value
+            rest = count % 3
+            if rest:
+                value = reader.read((4, 7)[rest - 1])
+                if value >= 10 ** rest:
+                    raise ValueError('无效的数字段')
+                out += b'%0*d' % (rest, value)
+        elif mode == 'alphanumeric':
+            for _ in range(count // 2):
+                value = reader.read(11)
+                if value >= 45 * 45:
+                    raise ValueError('无效的字母数字段')
+                out.append(_ALPHANUMERIC[value // 45])
+                out.append(_ALPHANUMERIC[value % 45])
+            if count % 2:
+                value = reader.read(6)
+                if value >= 45:
+                    raise ValueError('无效的字母数字段')
+                out.append(_ALPHANUMERIC[value])
+        elif mode == 'byte':
+            for _ in range(count):
+                out.append(reader.read(8))
+        else:
+            for _ in range(count):
+                value = reader.read(13)
+                code = (value // 0xc0) << 8 | (value % 0xc0)
+                code += 0x8140 if code < 0x1f00 else 0xc140
+                out += code.to_bytes(2, 'big')
+        modes.append(mode)
+    return bytes(out), tuple(modes)
+
+
+def decode(matrix: Sequence[Sequence[int]]) -> DecodedSymbol:
+    """
+    解码模块矩阵
+
+    Args:
+        matrix: 0/1 模块矩阵（不含静区），行可为 bytes / bytearray / 整数序列
+
+    Returns:
+        DecodedSymbol 解码结果
+
+    Raises:
+        ValueError: 尺寸、格式信息、纠错校验或数据段无效
+    """
+    size = len(matrix)
+    if size not in (11, 13, 15, 17) or any(len(row) != size for row in matrix):
+        raise ValueError(f'不是 Micro QR Code 的模块矩阵 ({size}×{len(matrix[0]) if size else 0})')
+    version, error, mask = read_format(matrix)
+    if (size - 9) // 2 != version:
+        raise ValueError(f'格式信息中的版本 M{version} 与矩阵尺寸 {size}×{size} 不符')
+
+    tables = version_tables(version)
+    flat = b''.join(row if isinstance(row, (bytes, bytearray)) else bytes(row) for row in matrix)
+    count = len(tables.positions)
+    stream = int(bytes(_stream_getter(version)(flat)).translate(_TO_ASCII), 2) ^ tables.mask_bits[mask]
+
+    capacity, num_data, num_ec = SYMBOL_INFO[(version, error)]
+    ec_bits = num_ec * 8
+    ec = stream & ((1 << ec_bits) - 1)
+    data = stream >> ec_bits
+    data_bits = count - ec_bits
+    # M1 / M3 的最后一个数据码字只有 4 位，校验时低 4 位补 0
+    codewords = (data << (num_data * 8 - data_bits)).to_bytes(num_data, 'big')
+    check = 0
+    ec_tables = rs_tables(num_data, num_ec)
+    for k, byte in enumerate(codewords):
+        if byte:
+            check ^= ec_tables[k][byte]
+    if check != ec:
+        raise ValueError('Reed-Solomon 校验失败')
+
+    payload, modes = _parse_segments(_BitReader(data >> (data_bits - capacity), capacity), version)
+    return DecodedSymbol(payload, version, error, mask, modes)
+
+
+def verify(matrix: Sequence[Sequence[int]], data: str) -> DecodedSymbol:
+    """
+    解码并确认内容与数据一致（按编码器的文本编码规则比较字节）
+
+    Returns:
+        DecodedSymbol 解码结果
+
+    Raises:
+        ValueError: 无法解码或内容不一致
+    """
+    decoded = decode(matrix)
+    expected = to_bytes(data)
+    if decoded.data != expected:
+        message = f'内容不一致: 期望 {data!r}，解码得到 {decoded.text!r}'
+        if 'kanji' in decoded.modes and find_mode(expected) != 'kanji':
+            # segno 不检查 Shift_JIS 尾字节，会把此类数据按汉字模式编码（见 micro_qr_encoder）
+            message += '（数据含尾字节不合法的 Shift_JIS 双字节，被按汉字模式编码而无法还原，可改用 --engine builtin）'
+        raise ValueError(message)
+    return decoded
+
+
+def sampled(index: int, rate: float) -> bool:
+    """
+    按比例抽样（由序号确定，重复运行时选中的条目相同）
+
+    Args:
+        index: 条目序号（如行号）
+        rate: 抽样比例 0-1，>= 1 表示全部
+    """
+    if rate >= 1:
+        return True
+    return ((index * 0x9E3779B1) & 0xffffffff) < rate * 0x100000000
+
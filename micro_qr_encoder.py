@@ -0,0 +1,620 @@
+"""
+Micro QR Code 专用编码器 (M1-M4)
+
+只处理 Micro QR Code 的精简编码引擎，绕过 segno 面向全部 QR 版本的通用流程:
+功能图形模板、数据模块放置顺序、格式信息字与各版本/容错等级/模式的字符容量均预先计算，
+版本选择只需查表，编码时只需生成数据比特、计算 Reed-Solomon 纠错码并选择掩码。
+
+输出的模块矩阵与 segno.make(..., micro=True) 逐位一致（包括模式判定、版本选择、
+容错等级自动提升以及 segno 的填充方式）。唯一的例外：segno 只检查双字节的范围，
+会把尾字节不合法的数据（如 'é-' 的 ISO-8859-1 编码 E9 2D）按汉字模式编码，
+解码时无法还原；这里同时校验尾字节，此类数据改用字节模式。
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from micro_qr_profile import span
+
+ALPHANUMERIC_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+_ALPHANUMERIC_PATTERN = re.compile(br'^[' + re.escape(ALPHANUMERIC_CHARS.encode('ascii')) + br']+\Z')
+_ALPHANUMERIC_VALUES = {ord(c): i for i, c in enumerate(ALPHANUMERIC_CHARS)}
+
+MODES = ('numeric', 'alphanumeric', 'byte', 'kanji')
+
+# 模式指示符取值（位宽为 version - 1，M1 无模式指示符）
+MODE_INDICATOR = {'numeric': 0, 'alphanumeric': 1, 'byte': 2, 'kanji': 3}
+
+# 字符计数指示符位宽，索引为版本 1-4（M1-M4），None 表示该版本不支持此模式
+CHAR_COUNT_BITS = {
+    'numeric': (None, 3, 4, 5, 6),
+    'alphanumeric': (None, None, 3, 4, 5),
+    'byte': (None, None, None, 4, 5),
+    'kanji': (None, None, None, 3, 4),
+}
+
+# (版本, 容错等级) -> (数据比特容量, 数据码字数, 纠错码字数)
+# M1 与 M3 的最后一个数据码字只有 4 位
+SYMBOL_INFO = {
+    (1, None): (20, 3, 2),
+    (2, 'L'): (40, 5, 5),
+    (2, 'M'): (32, 4, 6),
+    (3, 'L'): (84, 11, 6),
+    (3, 'M'): (68, 9, 8),
+    (4, 'L'): (128, 16, 8),
+    (4, 'M'): (112, 14, 10),
+    (4, 'Q'): (80, 10, 14),
+}
+
+# 各版本可用的容错等级（按纠错能力递增）
+ERROR_LEVELS = {1: (None,), 2: ('L', 'M'), 3: ('L', 'M'), 4: ('L', 'M', 'Q')}
+
+# 格式信息中的符号编号
+SYMBOL_NUMBER = {key: i for i, key in enumerate(SYMBOL_INFO)}
+
+
+class MicroCode(NamedTuple):
+    """编码结果：模块矩阵（0/1 的 bytearray 元组，不含静区）及编码参数"""
+    matrix: Tuple[bytearray, ...]
+    version: int
+    error: Optional[str]
+    mask: int
+    mode: str
+
+    @property
+    def designator(self) -> str:
+        return f'M{self.version}' + (f'-{self.error}' if self.error else '')
+
+
+def symbol_size(version: int) -> int:
+    """返回版本对应的符号边长（模块数，不含静区）"""
+    return version * 2 + 9
+
+
+# ---------------------------------------------------------------------------
+# GF(256) 与 Reed-Solomon
+# ---------------------------------------------------------------------------
+
+def _make_galois_tables() -> Tuple[List[int], List[int]]:
+    exp = [0] * 512
+    log = [0] * 256
+    x = 1
+    for i in range(255):
+        exp[i] = x
+        log[x] = i
+        x <<= 1
+        if x & 0x100:
+            x ^= 0x11d
+    for i in range(255, 512):
+        exp[i] = exp[i - 255]
+    return exp, log
+
+
+_GF_EXP, _GF_LOG = _make_galois_tables()
+
+
+def _generator_poly(degree: int) -> List[int]:
+    """返回生成多项式（去掉首项 1）各系数的对数"""
+    poly = [1]
+    for i in range(degree):
+        nxt = [0] * (len(poly) + 1)
+        for k, coef in enumerate(poly):
+            nxt[k] ^= coef
+            if coef:
+                nxt[k + 1] ^= _GF_EXP[_GF_LOG[coef] + i]
+        poly = nxt
+    return [_GF_LOG[c] for c in poly[1:]]
+
+
+_GENERATORS: Dict[int, List[int]] = {}
+
+
+def rs_remainder(data: bytes, num_ec: int) -> bytearray:
+    """计算 Reed-Solomon 纠错码字"""
+    gen = _GENERATORS.get(num_ec)
+    if gen is None:
+        gen = _GENERATORS[num_ec] = _generator_poly(num_ec)
+    exp = _GF_EXP
+    log = _GF_LOG
+    rem = bytearray(num_ec)
+    for byte in data:
+        coef = byte ^ rem[0]
+        del rem[0]
+        rem.append(0)
+        if coef:
+            lcoef = log[coef]
+            for n, g in enumerate(gen):
+                rem[n] ^= exp[lcoef + g]
+    return rem
+
+
+_RS_TABLES: Dict[Tuple[int, int], Tuple[Tuple[int, ...], ...]] = {}
+
+
+def rs_tables(num_data: int, num_ec: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    返回（并缓存）按码字位置的纠错码查找表
+
+    tables[k][b] 为第 k 个数据码字取 b、其余为 0 时的纠错码字（大端整数）。Reed-Solomon 编码是
+    GF(256) 上的线性运算，任意数据的纠错码字即各位置查表结果的异或。
+    """
+    tables = _RS_TABLES.get((num_data, num_ec))
+    if tables is not None:
+        return tables
+    result = []
+    for k in range(num_data):
+        basis = []
+        for j in range(8):
+            unit = bytearray(num_data)
+            unit[k] = 1 << j
+            basis.append(int.from_bytes(rs_remainder(bytes(unit), num_ec), 'big'))
+        table = [0] * 256
+        for value in range(1, 256):
+            low = value & -value
+            table[value] = table[value ^ low] ^ basis[low.bit_length() - 1]
+        result.append(tuple(table))
+    tables = _RS_TABLES[(num_data, num_ec)] = tuple(result)
+    return tables
+
+
+# ---------------------------------------------------------------------------
+# 格式信息
+# ---------------------------------------------------------------------------
+
+def _bch_format(value: int) -> int:
+    """BCH(15,5) 编码格式信息，并与 Micro QR 掩码 0x4445 异或"""
+    rem = value << 10
+    for shift in range(4, -1, -1):
+        if rem & (1 << (shift + 10)):
+            rem ^= 0x537 << shift
+    return ((value << 10) | rem) ^ 0x4445
+
+
+# (符号编号 << 2 | 掩码) -> 15 位格式信息
+FORMAT_INFO = tuple(_bch_format(i) for i in range(32))
+
+
+# ---------------------------------------------------------------------------
+# 模板与放置顺序
+# ---------------------------------------------------------------------------
+
+_FINDER = (
+    (1, 1, 1, 1, 1, 1, 1, 0),
+    (1, 0, 0, 0, 0, 0, 1, 0),
+    (1, 0, 1, 1, 1, 0, 1, 0),
+    (1, 0, 1, 1, 1, 0, 1, 0),
+    (1, 0, 1, 1, 1, 0, 1, 0),
+    (1, 0, 0, 0, 0, 0, 1, 0),
+    (1, 1, 1, 1, 1, 1, 1, 0),
+    (0, 0, 0, 0, 0, 0, 0, 0),
+)
+
+# Micro QR 的四种数据掩码（i 为行，j 为列）
+MASK_FUNCTIONS = (
+    lambda i, j: i % 2 == 0,
+    lambda i, j: (i // 2 + j // 3) % 2 == 0,
+    lambda i, j: ((i * j) % 2 + (i * j) % 3) % 2 == 0,
+    lambda i, j: ((i + j) % 2 + (i * j) % 3) % 2 == 0,
+)
+
+
+class _VersionTables(NamedTuple):
+    size: int
+    template: Tuple[bytearray, ...]
+    positions: Tuple[Tuple[int, int], ...]
+    mask_bits: Tuple[int, ...]
+    right_edge: int
+    bottom_edge: int
+
+
+def _function_template(size: int) -> Tuple[bytearray, ...]:
+    """构建含定位图形、分隔符与定时图形的模板；格式信息区域置 0"""
+    matrix = tuple(bytearray(size) for _ in range(size))
+    for i in range(8):
+        matrix[i][:8] = bytes(_FINDER[i])
+    for k in range(8, size):
+        bit = 1 if k % 2 == 0 else 0
+        matrix[0][k] = bit
+        matrix[k][0] = bit
+    return matrix
+
+
+def _placement_order(version: int, size: int) -> List[Tuple[int, int]]:
+    """按两列一组、上下蛇形的顺序列出所有数据模块位置"""
+    def is_function(i: int, j: int) -> bool:
+        return i == 0 or j == 0 or (i <= 8 and j <= 8)
+
+    # M1 与 M3 的放置起点方向与其他版本相反（与 segno 一致）
+    inc = 2 if version in (1, 3) else 0
+    order = []
+    for right in range(size - 1, 0, -2):
+        upwards = ((right + inc) & 2) == 0
+        for vertical in range(size):
+            i = size - 1 - vertical if upwards else vertical
+            for j in (right, right - 1):
+                if not is_function(i, j):
+                    order.append((i, j))
+    return order
+
+
+def _bits_to_int(bits: List[int]) -> int:
+    value = 0
+    for bit in bits:
+        value = (value << 1) | bit
+    return value
+
+
+_TABLES: Dict[int, _VersionTables] = {}
+
+
+def version_tables(version: int) -> _VersionTables:
+    """返回（并缓存）版本的模板、放置顺序、掩码比特与边缘比特掩码"""
+    tables = _TABLES.get(version)
+    if tables is not None:
+        return tables
+    size = symbol_size(version)
+    positions = _placement_order(version, size)
+    mask_bits = tuple(_bits_to_int([1 if fn(i, j) else 0 for i, j in positions]) for fn in MASK_FUNCTIONS)
+    right_edge = _bits_to_int([1 if j == size - 1 and i > 0 else 0 for i, j in positions])
+    bottom_edge = _bits_to_int([1 if i == size - 1 and j > 0 else 0 for i, j in positions])
+    tables = _VersionTables(size, _function_template(size), tuple(positions),
+                            mask_bits, right_edge, bottom_edge)
+    _TABLES[version] = tables
+    return tables
+
+
+def add_format_info(matrix: Tuple[bytearray, ...], version: int, error: Optional[str], mask: int) -> None:
+    """写入 15 位格式信息（第 8 列第 1-8 行与第 8 行第 1-8 列）"""
+    info = FORMAT_INFO[(SYMBOL_NUMBER[(version, error)] << 2) | mask]
+    row_eight = matrix[8]
+    for i in range(8):
+        matrix[i + 1][8] = (info >> i) & 1
+        row_eight[i + 1] = (info >> (14 - i)) & 1
+
+
+# ---------------------------------------------------------------------------
+# 数据分析与比特流
+# ---------------------------------------------------------------------------
+
+def _is_kanji(data: bytes) -> bool:
+    """
+    数据是否全部为可用汉字模式编码的 Shift_JIS 双字节字符
+
+    双字节须在 0x8140-0x9FFC 或 0xE040-0xEBBF 内，且尾字节须为合法的
+    Shift_JIS 尾字节 (0x40-0xFC，不含 0x7F)；segno 不检查尾字节，见模块说明。
+    """
+    if not data or len(data) % 2:
+        return False
+    for i in range(0, len(data), 2):
+        code = (data[i] << 8) | data[i + 1]
+        if not (0x8140 <= code <= 0x9ffc or 0xe040 <= code <= 0xebbf):
+            return False
+        if not 0x40 <= data[i + 1] <= 0xfc or data[i + 1] == 0x7f:
+            return False
+    return True
+
+
+def to_bytes(data: str) -> bytes:
+    """按 ISO-8859-1 → Shift_JIS → UTF-8 的顺序编码文本（与 segno 一致）"""
+    for encoding in ('iso-8859-1', 'shift_jis'):
+        try:
+            return data.encode(encoding)
+        except UnicodeError:
+            pass
+    return data.encode('utf-8')
+
+
+def find_mode(data: bytes) -> str:
+    """返回能编码该数据的最紧凑模式"""
+    if data.isdigit():
+        return 'numeric'
+    if _ALPHANUMERIC_PATTERN.match(data):
+        return 'alphanumeric'
+    if _is_kanji(data):
+        return 'kanji'
+    return 'byte'
+
+
+def char_count(data: bytes, mode: str) -> int:
+    return len(data) // 2 if mode == 'kanji' else len(data)
+
+
+def data_bit_length(length: int, mode: str) -> int:
+    """返回 length 个字符在给定模式下的数据比特数（不含模式与计数指示符）"""
+    if mode == 'numeric':
+        groups, rest = divmod(length, 3)
+        return groups * 10 + (0, 4, 7)[rest]
+    if mode == 'alphanumeric':
+        return (length // 2) * 11 + (length % 2) * 6
+    if mode == 'byte':
+        return length * 8
+    return length * 13
+
+
+def segment_bits(data: bytes, mode: str) -> Tuple[int, int]:
+    """将数据编码为 (比特值, 比特数)"""
+    value = 0
+    nbits = 0
+    if mode == 'numeric':
+        for i in range(0, len(data), 3):
+            chunk = data[i:i + 3]
+            width = len(chunk) * 3 + 1
+            value = (value << width) | int(chunk)
+            nbits += width
+    elif mode == 'alphanumeric':
+        table = _ALPHANUMERIC_VALUES
+        for i in range(0, len(data) - 1, 2):
+            value = (value << 11) | (table[data[i]] * 45 + table[data[i + 1]])
+        nbits = (len(data) // 2) * 11
+        if len(data) % 2:
+            value = (value << 6) | table[data[-1]]
+            nbits += 6
+    elif mode == 'byte':
+        nbits = len(data) * 8
+        value = int.from_bytes(data, 'big') if data else 0
+    else:
+        for i in range(0, len(data), 2):
+            code = (data[i] << 8) | data[i + 1]
+            diff = code - (0x8140 if code <= 0x9ffc else 0xc140)
+            value = (value << 13) | ((diff >> 8) * 0xc0 + (diff & 0xff))
+            nbits += 13
+    return value, nbits
+
+
+def segment_length(count: int, mode: str, version: int) -> Optional[int]:
+    """返回 count 个字符在给定版本中含模式指示符与计数指示符的总比特数；版本不支持该模式时返回 None"""
+    cci = CHAR_COUNT_BITS[mode][version]
+    if cci is None:
+        return None
+    return (version - 1) + cci + data_bit_length(count, mode)
+
+
+def _max_chars(version: int, error: Optional[str], mode: str) -> Optional[int]:
+    capacity = SYMBOL_INFO[(version, error)][0]
+    if segment_length(0, mode, version) is None:
+        return None
+    count = 0
+    while segment_length(count + 1, mode, version) <= capacity:
+        count += 1
+    return count
+
+
+# (版本, 容错等级, 模式) -> 最大字符数；版本不支持的模式不在表中
+MAX_CHARS: Dict[Tuple[int, Optional[str], str], int] = {
+    (version, error, mode): limit
+    for (version, error) in SYMBOL_INFO
+    for mode in MODES
+    for limit in (_max_chars(version, error, mode),)
+    if limit is not None
+}
+
+
+class SymbolPlan(NamedTuple):
+    """编码规划结果：选定的版本、容错等级与模式，以及该规格的字符容量"""
+    version: int
+    error: Optional[str]
+    mode: str
+    char_count: int
+    capacity: int
+
+    @property
+    def designator(self) -> str:
+        return f'M{self.version}' + (f'-{self.error}' if self.error else '')
+
+
+def find_version(count: int, mode: str, error: Optional[str]) -> Tuple[int, Optional[str]]:
+    """
+    查表选择能容纳数据的最小版本
+
+    Args:
+        count: 字符数
+        mode: 编码模式
+        error: 容错等级，None 表示允许 M1（M2 及以上按 L 计）
+
+    Returns:
+        (版本, 容错等级)
+
+    Raises:
+        ValueError: 数据无法放入任何 Micro QR Code
+    """
+    for version in range(1, 5):
+        if version == 1:
+            if error is not None:
+                continue
+            level = None
+        else:
+            level = error or 'L'
+        limit = MAX_CHARS.get((version, level, mode))
+        if limit is not None and count <= limit:
+            return version, level
+    raise ValueError('数据过长，无法生成 Micro QR Code')
+
+
+def boost_error(version: int, error: Optional[str], count: int, mode: str) -> Optional[str]:
+    """在不改变版本的前提下提升容错等级"""
+    if error is None:
+        return error
+    levels = ERROR_LEVELS[version]
+    for level in levels[levels.index(error) + 1:]:
+        if count <= MAX_CHARS[(version, level, mode)]:
+            error = level
+        else:
+            break
+    return error
+
+
+def plan_symbol(data: bytes, version: Optional[int] = None, error: Optional[str] = None,
+                boost: bool = True) -> Tuple[int, Optional[str], str]:
+    """
+    确定编码参数（不构建符号）
+
+    Args:
+        data: 已编码为字节的数据
+        version: 指定版本 (1-4)，None 表示自动选择
+        error: 容错等级 ('L', 'M', 'Q')，None 表示允许 M1
+        boost: 是否在同一版本内自动提升容错等级
+
+    Returns:
+        (版本, 容错等级, 模式)
+
+    Raises:
+        ValueError: 参数无效或数据无法放入指定/任意版本
+    """
+    result = plan(data, version, error, boost)
+    return result.version, result.error, result.mode
+
+
+def plan(data: Union[str, bytes], version: Optional[int] = None, error: Optional[str] = None,
+         boost: bool = True) -> SymbolPlan:
+    """
+    仅凭容量表确定版本、容错等级与模式，耗时与数据长度成线性关系
+
+    Args:
+        data: 文本或已编码的字节
+        version: 指定版本 (1-4)，None 表示自动选择
+        error: 容错等级 ('L', 'M', 'Q')，None 表示允许 M1
+        boost: 是否在同一版本内自动提升容错等级
+
+    Returns:
+        SymbolPlan 规划结果
+
+    Raises:
+        ValueError: 参数无效或数据无法放入指定/任意版本
+    """
+    if error is not None:
+        error = error.upper()
+        if error == 'H':
+            raise ValueError('Micro QR Code 不支持容错等级 H')
+        if error not in ('L', 'M', 'Q'):
+            raise ValueError(f'无效的容错等级: {error}')
+    if version is not None and version not in (1, 2, 3, 4):
+        raise ValueError(f'无效的 Micro QR Code 版本: {version}')
+    raw = to_bytes(data) if isinstance(data, str) else data
+    mode = find_mode(raw)
+    count = char_count(raw, mode)
+    guessed, level = find_version(count, mode, error)
+    if version is None:
+        version = guessed
+    elif guessed > version:
+        raise ValueError(f'数据无法放入 M{version}，建议版本: M{guessed}')
+    elif error is None and version != 1:
+        level = 'L'
+    if boost:
+        level = boost_error(version, level, count, mode)
+    return SymbolPlan(version, level, mode, count, MAX_CHARS[(version, level, mode)])
+
+
+def pad_codewords(value: int, nbits: int, version: int, error: Optional[str]) -> bytes:
+    """
+    补齐终止符、填充位与填充码字，返回数据码字
+
+    Args:
+        value: 头部与数据段比特（整数，高位在前）
+        nbits: value 的比特数
+        version: 版本 (1-4)
+        error: 容错等级
+
+    Returns:
+        数据码字（M1 / M3 的最后一个码字只有高 4 位有效，低 4 位为 0）
+    """
+    capacity, num_data, _ = SYMBOL_INFO[(version, error)]
+    term = min(capacity - nbits, version * 2 + 1)
+    value <<= term
+    nbits += term
+    if version in (1, 3):
+        # 与 segno 一致：M1/M3 剩余空间全部以 0 填充
+        value <<= capacity - nbits
+        nbits = capacity
+    else:
+        pad = 8 - nbits % 8
+        value <<= pad
+        nbits += pad
+        for i in range(capacity // 8 - nbits // 8):
+            value = (value << 8) | (0xec if i % 2 == 0 else 0x11)
+            nbits += 8
+    total_bytes = (nbits + 7) // 8
+    value <<= total_bytes * 8 - nbits
+    return value.to_bytes(total_bytes, 'big')[:num_data]
+
+
+def final_bits(data_codewords: bytes, version: int, error: Optional[str]) -> Tuple[int, int]:
+    """
+    生成最终比特流（数据码字 + 纠错码字）
+
+    Returns:
+        (比特值, 比特数)
+    """
+    num_ec = SYMBOL_INFO[(version, error)][2]
+    ec = rs_remainder(data_codewords, num_ec)
+    value = int.from_bytes(data_codewords, 'big')
+    nbits = len(data_codewords) * 8
+    if version in (1, 3):
+        # 最后一个数据码字只取高 4 位
+        value >>= 4
+        nbits -= 4
+    value = (value << (num_ec * 8)) | int.from_bytes(ec, 'big')
+    return value, nbits + num_ec * 8
+
+
+def evaluate_masks(bits: int, version: int) -> List[int]:
+    """按边缘深色模块规则为四种掩码打分（分数越高越好）"""
+    tables = version_tables(version)
+    scores = []
+    for mask_bits in tables.mask_bits:
+        masked = bits ^ mask_bits
+        sum1 = bin(masked & tables.right_edge).count('1')
+        sum2 = bin(masked & tables.bottom_edge).count('1')
+        scores.append(sum1 * 16 + sum2 if sum1 <= sum2 else sum2 * 16 + sum1)
+    return scores
+
+
+def best_mask(scores: List[int]) -> int:
+    """返回最高分的掩码编号（同分时取编号最小者）"""
+    return max(range(len(scores)), key=lambda k: (scores[k], -k))
+
+
+def build_matrix(bits: int, version: int, error: Optional[str], mask: int) -> Tuple[bytearray, ...]:
+    """将掩码后的比特流放入模板并写入格式信息"""
+    tables = version_tables(version)
+    matrix = tuple(bytearray(row) for row in tables.template)
+    positions = tables.positions
+    masked = bits ^ tables.mask_bits[mask]
+    stream = format(masked, f'0{len(positions)}b').encode('ascii')
+    for (i, j), bit in zip(positions, stream):
+        if bit == 0x31:
+            matrix[i][j] = 1
+    add_format_info(matrix, version, error, mask)
+    return matrix
+
+
+def encode(data: str, version: Optional[int] = None, error: Optional[str] = None,
+           mask: Optional[int] = None, boost: bool = True) -> MicroCode:
+    """
+    编码 Micro QR Code
+
+    Args:
+        data: 要编码的文本数据
+        version: Micro QR Code 版本 (1-4)，None 表示自动选择最小版本
+        error: 容错等级 ('L', 'M', 'Q')，None 表示允许生成无纠错的 M1
+        mask: 指定掩码 (0-3)，None 表示自动选择
+        boost: 是否在同一版本内自动提升容错等级
+
+    Returns:
+        MicroCode 编码结果
+
+    Raises:
+        ValueError: 参数无效或数据过长
+    """
+    raw = to_bytes(data)
+    version, error, mode = plan_symbol(raw, version, error, boost)
+    value, nbits = segment_bits(raw, mode)
+    header_bits = version - 1 + CHAR_COUNT_BITS[mode][version]
+    header = (MODE_INDICATOR[mode] << CHAR_COUNT_BITS[mode][version]) | char_count(raw, mode)
+    value |= header << nbits
+    bits, _ = final_bits(pad_codewords(value, nbits + header_bits, version, error), version, error)
+    if mask is None:
+        with span('mask'):
+            mask = best_mask(evaluate_masks(bits, version))
+    elif mask not in (0, 1, 2, 3):
+        raise ValueError(f'无效的掩码: {mask}，Micro QR Code 掩码范围为 0-3')
+    return MicroCode(build_matrix(bits, version, error, mask), version, error, mask, mode)
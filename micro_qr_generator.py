@@ -8,25 +8,94 @@ Micro QR Code 是 QR Code 的小型变体，专为最小数据存储而设计。
 特性:
 - 支持所有 4 个 Micro QR Code 版本 (M1-M4)
 - 自动版本识别，无需手动选择
-- 支持 SVG、PNG 输出格式
+- 支持 SVG、PNG 输出格式，以及供标签打印机使用的 PBM / ZPL / EPL 光栅
 - 命令行界面
+- 批量模式 (--batch)，多进程并行生成
+- 可选内置 Micro QR 专用编码引擎 (--engine builtin)，输出与 segno 逐位一致
+- 流式生成 API (iter_micro_qr)，内存占用有界，可多进程并行
 """
 
+import io
 import sys
 import os
 import argparse
-from typing import Optional
-import segno
+import json
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 
+from micro_qr_profile import profiler, span
 
-def generate_micro_qr(data: str, version: Optional[int] = None, error_correction: str = 'L') -> segno.QRCode:
+# segno、内置编码器与进程池均在首次使用时导入，--help 与参数错误等路径无需加载
+if TYPE_CHECKING:
+    import cProfile
+
+    import segno
+
+    import micro_qr_encoder
+
+# 可用的编码引擎
+ENGINES = ('segno', 'builtin')
+
+# 内置引擎的掩码评估方式：逐符号 (python) 或按批矢量化 (numpy，需要安装 numpy)
+MASK_ENGINES = ('python', 'numpy')
+
+# segno 常量映射，首次调用 to_segno 时填充
+_SEGNO_TABLES: Dict[str, Dict[Any, Any]] = {}
+
+
+def _segno_tables() -> Dict[str, Dict[Any, Any]]:
+    if not _SEGNO_TABLES:
+        from segno import consts
+
+        _SEGNO_TABLES['error'] = {None: None, 'L': consts.ERROR_LEVEL_L, 'M': consts.ERROR_LEVEL_M,
+                                  'Q': consts.ERROR_LEVEL_Q}
+        _SEGNO_TABLES['mode'] = {
+            'numeric': consts.MODE_NUMERIC,
+            'alphanumeric': consts.MODE_ALPHANUMERIC,
+            'byte': consts.MODE_BYTE,
+            'kanji': consts.MODE_KANJI,
+        }
+        _SEGNO_TABLES['version'] = consts.MICRO_VERSION_MAPPING
+    return _SEGNO_TABLES
+
+
+class _Segment(NamedTuple):
+    mode: int
+
+
+class _Code(NamedTuple):
+    """segno.QRCode 构造所需的编码结果结构"""
+    matrix: Tuple[bytearray, ...]
+    version: int
+    error: Optional[int]
+    mask: int
+    segments: Tuple[_Segment, ...]
+
+
+def to_segno(code: 'micro_qr_encoder.MicroCode') -> 'segno.QRCode':
+    """将内置编码器的结果包装为 segno.QRCode，以复用 segno 的各种输出方式"""
+    import segno
+
+    tables = _segno_tables()
+    return segno.QRCode(_Code(
+        code.matrix,
+        tables['version'][f'M{code.version}'],
+        tables['error'][code.error],
+        code.mask,
+        (_Segment(tables['mode'][code.mode]),),
+    ))
+
+
+def generate_micro_qr(data: str, version: Optional[int] = None,
+                      error_correction: Optional[str] = 'L', engine: str = 'segno') -> 'segno.QRCode':
     """
     生成 Micro QR Code
     
     Args:
         data: 要编码的文本数据
         version: Micro QR Code 版本 (1-4)，None 表示自动选择
-        error_correction: 容错等级 ('L', 'M', 'Q', 'H')
+        error_correction: 容错等级 ('L', 'M', 'Q', 'H')，None 表示允许生成无纠错的 M1
+        engine: 编码引擎，'segno' 或 'builtin'（内置 Micro QR 专用编码器，结果逐位一致）
     
     Returns:
         segno.QRCode: 生成的 Micro QR Code 对象
@@ -34,28 +103,275 @@ def generate_micro_qr(data: str, version: Optional[int] = None, error_correction
     Raises:
         ValueError: 当数据过长或无法生成指定版本时
     """
-    if version is None:
-        qr = segno.make(data, micro=True, error=error_correction)
-        if not qr.is_micro:
-            raise ValueError('数据过长，无法生成 Micro QR Code')
-        return qr
-    else:
+    with span('encode'):
+        if engine == 'builtin':
+            import micro_qr_encoder
+
+            try:
+                return to_segno(micro_qr_encoder.encode(data, version, error_correction))
+            except ValueError as e:
+                if version is None:
+                    raise
+                raise ValueError(f'无法生成指定版本的 Micro QR Code: {e}') from e
+        if engine != 'segno':
+            raise ValueError(f'未知的编码引擎: {engine}')
+        import segno
+
+        if version is None:
+            qr = segno.make(data, micro=True, error=error_correction)
+            if not qr.is_micro:
+                raise ValueError('数据过长，无法生成 Micro QR Code')
+            return qr
+        else:
+            try:
+                # segno 中整数版本号表示普通 QR Code，Micro 版本需使用 "M1"-"M4"
+                return segno.make_micro(data, version=f'M{version}', error=error_correction)
+            except Exception as e:
+                raise ValueError(f'无法生成指定版本的 Micro QR Code: {e}') from e
+
+
+def plan_micro_qr(data: str, version: Optional[int] = None,
+                  error_correction: Optional[str] = 'L') -> 'micro_qr_encoder.SymbolPlan':
+    """
+    预先确定 Micro QR Code 的版本与容错等级，不执行编码
+
+    仅做模式判定与容量表查找，耗时与数据长度成线性关系，适合大批量数据的预校验。
+    结果与 generate_micro_qr 使用相同参数时实际生成的符号一致。
+
+    Args:
+        data: 要编码的文本数据
+        version: Micro QR Code 版本 (1-4)，None 表示自动选择
+        error_correction: 容错等级 ('L', 'M', 'Q')，None 表示允许生成无纠错的 M1
+
+    Returns:
+        SymbolPlan: 包含 version, error, mode, char_count, capacity
+
+    Raises:
+        ValueError: 当数据过长或无法放入指定版本时
+    """
+    import micro_qr_encoder
+
+    return micro_qr_encoder.plan(data, version, error_correction)
+
+
+def generate_micro_qr_batch(datas: Sequence[str], version: Optional[int] = None,
+                            error_correction: Optional[str] = 'L', mask_engine: str = 'numpy',
+                            return_exceptions: bool = False) -> List[Union['segno.QRCode', ValueError]]:
+    """
+    使用内置编码器批量生成 Micro QR Code
+
+    Args:
+        datas: 要编码的文本数据序列
+        version: Micro QR Code 版本 (1-4)，None 表示自动选择
+        error_correction: 容错等级 ('L', 'M', 'Q')，None 表示允许生成无纠错的 M1
+        mask_engine: 'numpy' 以 N×4 数组一次评估整批掩码，'python' 逐个评估
+        return_exceptions: True 时无法编码的条目以 ValueError 实例返回，否则直接抛出
+
+    Returns:
+        与输入顺序一致的 segno.QRCode 列表
+
+    Raises:
+        ValueError: 数据无法编码（return_exceptions 为 False 时），或掩码引擎无效/numpy 不可用
+    """
+    with span('encode'):
+        if mask_engine == 'numpy':
+            try:
+                import micro_qr_numpy
+            except ImportError as e:
+                raise ValueError(f'掩码引擎 numpy 需要安装 numpy: {e}') from e
+            codes = micro_qr_numpy.encode_batch(datas, version, error_correction,
+                                                return_exceptions=return_exceptions)
+        elif mask_engine == 'python':
+            import micro_qr_encoder
+
+            codes = []
+            for data in datas:
+                try:
+                    codes.append(micro_qr_encoder.encode(data, version, error_correction))
+                except ValueError as e:
+                    if not return_exceptions:
+                        raise
+                    codes.append(e)
+        else:
+            raise ValueError(f'未知的掩码引擎: {mask_engine}')
+        return [code if isinstance(code, ValueError) else to_segno(code) for code in codes]
+
+
+def png_compression() -> str:
+    """当前的 PNG 压缩级别（配置项 defaults.png_compression）"""
+    from config import config
+
+    return config.get_default('png_compression', 'default')
+
+
+def render_bytes(qr: 'segno.QRCode', kind: str = 'svg', scale: int = 8, border: int = 4,
+                 png_level: Optional[str] = None) -> bytes:
+    """
+    在内存中渲染 QR Code
+
+    Args:
+        qr: QR Code 对象（svg / png / pbm / zpl / epl 只用到 matrix，也可传入 micro_qr_symbol.MicroSymbol）
+        kind: 输出格式 ('svg'、'png' 或标签格式 'pbm' / 'zpl' / 'epl')
+        scale: 缩放比例
+        border: 边框大小
+        png_level: PNG 压缩级别 ('fast' / 'default' / 'small')，None 表示使用配置
+
+    Returns:
+        渲染后的文件内容
+    """
+    with span('rasterize'):
+        if kind == 'png':
+            # 专用 1 位 PNG 写出，比 segno 的通用实现快一个数量级
+            from micro_qr_png import png_bytes
+
+            return png_bytes(qr.matrix, scale, border, png_level or png_compression())
+        if kind == 'svg':
+            # 行程合并的精简 SVG，体积约为 segno 通用输出的 70%-85%
+            from micro_qr_svg import svg_bytes
+
+            return svg_bytes(qr.matrix, scale, border)
+        if kind in ('pbm', 'zpl', 'epl'):
+            # 标签打印机光栅，直接由模块矩阵生成，无需再由 PNG 转换
+            from micro_qr_label import label_bytes
+
+            return label_bytes(qr.matrix, kind, scale, border)
+        buf = io.BytesIO()
+        qr.save(buf, kind=kind, scale=scale, border=border)
+        return buf.getvalue()
+
+
+# 流式生成的单条记录: (key, data, version, error_correction)
+_Record = Tuple[Any, str, Optional[int], Optional[str]]
+
+
+def _normalize_record(record: Any, error_correction: Optional[str]) -> _Record:
+    """
+    统一记录格式
+
+    支持: 字符串（key 即数据本身）、(key, data[, version[, error_correction]]) 元组、
+    含 data 及可选 key / version / error_correction 键的字典。
+    """
+    if isinstance(record, str):
+        return record, record, None, error_correction
+    if isinstance(record, dict):
+        data = record['data']
+        return (record.get('key', data), data, record.get('version'),
+                record.get('error_correction', error_correction))
+    key, data, *rest = record
+    version = rest[0] if len(rest) > 0 else None
+    error = rest[1] if len(rest) > 1 else error_correction
+    return key, data, version, error
+
+
+def _render_records(records: List[_Record], fmt: str, scale: int, border: int,
+                    engine: str) -> List[Tuple[Any, Union[bytes, ValueError]]]:
+    """渲染一组记录；失败的记录以 ValueError 实例返回（可在工作进程中执行）"""
+    from micro_qr_cache import render_cache
+
+    results: List[Tuple[Any, Union[bytes, ValueError]]] = []
+    for key, data, version, error in records:
         try:
-            qr = segno.make_micro(data, version=version, error=error_correction)
-        except Exception as e:
-            raise ValueError(f'无法生成指定版本的 Micro QR Code: {e}') from e
+            results.append((key, render_cache.render(data, version, error, scale, border, fmt, engine)))
+        except ValueError as e:
+            results.append((key, e))
+    return results
 
 
-def save_svg(qr: segno.QRCode, filename: str, scale: int = 8, border: int = 4) -> None:
+def iter_micro_qr(records: Iterable[Any], fmt: str = 'png', scale: int = 8, border: int = 4,
+                  error_correction: Optional[str] = 'L', engine: str = 'segno', workers: int = 1,
+                  ordered: bool = True, chunk_size: int = 64, max_pending: Optional[int] = None,
+                  return_exceptions: bool = False) -> Iterator[Tuple[Any, Union[bytes, ValueError]]]:
+    """
+    惰性地逐条生成 Micro QR Code 并产出 (key, 文件内容)
+
+    输入按需读取，同时在途的记录数不超过 max_pending × chunk_size，
+    适合将结果直接写入消息队列、数据库等，而无需整批保存在内存中。
+
+    Args:
+        records: 记录迭代器，元素为字符串、(key, data[, version[, error_correction]]) 元组
+                 或含 data 键的字典
+        fmt: 输出格式 ('png' 或 'svg')
+        scale: 缩放比例
+        border: 边框大小
+        error_correction: 记录未指定时使用的容错等级
+        engine: 编码引擎 ('segno' 或 'builtin')
+        workers: 工作进程数，1 表示在当前进程内执行
+        ordered: 是否按输入顺序产出（False 时按完成顺序产出，吞吐更高）
+        chunk_size: 每个任务包含的记录数（仅 workers > 1 时有效）
+        max_pending: 最多在途的任务数，None 表示 workers * 2
+        return_exceptions: True 时无法编码的记录产出 (key, ValueError)，否则抛出异常
+
+    Returns:
+        (key, bytes) 迭代器
+
+    Raises:
+        ValueError: 记录无法编码且 return_exceptions 为 False 时
+    """
+    normalized = (_normalize_record(record, error_correction) for record in records)
+
+    def emit(results: List[Tuple[Any, Union[bytes, ValueError]]]) -> Iterator[Tuple[Any, Union[bytes, ValueError]]]:
+        for key, value in results:
+            if isinstance(value, ValueError) and not return_exceptions:
+                raise value
+            yield key, value
+
+    if workers <= 1:
+        for record in normalized:
+            yield from emit(_render_records([record], fmt, scale, border, engine))
+        return
+
+    from collections import deque
+    from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+    max_pending = max_pending or workers * 2
+    chunk_size = max(1, chunk_size)
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pending: "deque[Future]" = deque()
+    try:
+        exhausted = False
+        while not exhausted or pending:
+            while not exhausted and len(pending) < max_pending:
+                chunk = [record for _, record in zip(range(chunk_size), normalized)]
+                if not chunk:
+                    exhausted = True
+                    break
+                pending.append(pool.submit(_render_records, chunk, fmt, scale, border, engine))
+            if not pending:
+                break
+            if ordered:
+                future = pending.popleft()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = done.pop()
+                pending.remove(future)
+            yield from emit(future.result())
+    finally:
+        # 消费方提前结束时取消尚未开始的任务
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+
+def write_bytes(filename: str, payload: bytes) -> None:
+    """将已渲染的内容写入文件"""
+    with span('write'), open(filename, 'wb') as f:
+        f.write(payload)
+
+
+def save_svg(qr: 'segno.QRCode', filename: str, scale: int = 8, border: int = 4,
+             verbose: bool = True) -> None:
     """保存 SVG 格式的 QR Code"""
-    qr.save(filename, kind='svg', scale=scale, border=border)
-    print(f"SVG 已保存到 {filename}")
+    write_bytes(filename, render_bytes(qr, 'svg', scale, border))
+    if verbose:
+        print(f"SVG 已保存到 {filename}")
 
 
-def save_png(qr: segno.QRCode, filename: str, scale: int = 8, border: int = 4) -> None:
+def save_png(qr: 'segno.QRCode', filename: str, scale: int = 8, border: int = 4,
+             verbose: bool = True) -> None:
     """保存 PNG 格式的 QR Code"""
-    qr.save(filename, kind='png', scale=scale, border=border)
-    print(f"PNG 已保存到 {filename}")
+    write_bytes(filename, render_bytes(qr, 'png', scale, border))
+    if verbose:
+        print(f"PNG 已保存到 {filename}")
 
 
 def get_output_path(filename: Optional[str]) -> Optional[str]:
@@ -77,8 +393,164 @@ def get_output_path(filename: Optional[str]) -> Optional[str]:
     return filename
 
 
+def open_output(args: argparse.Namespace) -> Any:
+    """按 --archive / --stream 打开批量输出的写入器，均未指定时返回 None（逐个写文件）"""
+    if args.archive:
+        from micro_qr_archive import open_archive
+
+        return open_archive(args.archive, args.archive_level)
+    if args.stream:
+        from micro_qr_label import open_stream
+
+        return open_stream(args.stream)
+    return None
+
+
+def output_message(args: argparse.Namespace, output: Any) -> str:
+    """批量输出完成后的提示"""
+    if args.stream:
+        return f"已发送到标签流: {args.stream} ({output.count} 个标签，{output.bytes_out} 字节)"
+    references = f"，其中 {output.references} 个为重复引用" if output.references else ""
+    return f"已写入归档: {args.archive} ({output.count} 个文件{references})"
+
+
+def run_batch_cli(args: argparse.Namespace) -> None:
+    """执行 --batch 模式并输出汇总"""
+    from micro_qr_batch import format_summary, plan_rows, read_batch_rows, run_batch, run_sequence, write_error_log
+
+    archive = None
+    try:
+        # 归档 / 标签流只在此处关闭一次；关闭时写出清单或刷新缓冲区的错误同样按失败处理
+        try:
+            if args.sequence:
+                prefix, start, count = args.sequence
+                if not start.isdigit() or not count.isdigit():
+                    raise ValueError('--sequence 的 START 与 COUNT 必须是非负整数')
+                archive = open_output(args)
+                # START 的位数即序号宽度，如 0000001 表示补足 7 位
+                summary = run_sequence(prefix, int(start), int(count), len(start), args.format, args.scale,
+                                       args.border, args.version, args.error_correction, args.workers,
+                                       args.chunk_size, archive, args.verify)
+            elif args.plan:
+                summary = plan_rows(read_batch_rows(args.batch), args.error_correction)
+            else:
+                archive = open_output(args)
+                summary = run_batch(
+                    read_batch_rows(args.batch),
+                    fmt=args.format,
+                    scale=args.scale,
+                    border=args.border,
+                    default_error=args.error_correction,
+                    engine=args.engine,
+                    mask_engine=args.mask_engine,
+                    workers=args.workers,
+                    chunk_size=args.chunk_size,
+                    cache_entries=args.cache_entries,
+                    cache_bytes=args.cache_bytes,
+                    archive=archive,
+                    dedup=args.dedup,
+                    verify=args.verify,
+                )
+        finally:
+            if archive is not None:
+                archive.close()
+    except (OSError, ValueError) as e:
+        print(f"批量生成失败: {e}")
+        sys.exit(1)
+
+    if archive is not None:
+        print(output_message(args, archive))
+    line, details = format_summary(summary, '校验' if args.plan else '生成')
+    for detail in details[:20]:
+        print(detail, file=sys.stderr)
+    if len(details) > 20:
+        print(f"  ... 另有 {len(details) - 20} 行失败", file=sys.stderr)
+    if args.error_log and summary.failed:
+        write_error_log(args.error_log, summary.failed)
+    print(line)
+    if summary.failed:
+        sys.exit(1)
+
+
+def run_sheet_cli(args: argparse.Namespace) -> None:
+    """执行 --sheet 模式：将 --batch 的所有数据排布为标签页"""
+    try:
+        from micro_qr_sheet import SheetLayout, labels_from_rows, page_pixels, render_sheets, save_sheets
+    except ImportError as e:
+        print(f"标签页输出需要安装 numpy: {e}")
+        sys.exit(1)
+    from micro_qr_batch import read_batch_rows
+
+    try:
+        layout = SheetLayout(
+            scale=args.scale,
+            border=args.border,
+            spacing=args.spacing,
+            margin=args.margin,
+            columns=args.columns,
+            rows=args.rows,
+            page_size=page_pixels(args.page, args.dpi) if args.page else None,
+            caption=args.caption,
+        )
+        rows = list(read_batch_rows(args.batch))
+        labels, errors = labels_from_rows(rows, args.error_correction)
+        failed: Dict[int, str] = {}
+        pages = render_sheets(labels, layout, failed)
+        paths = save_sheets(pages, get_output_path(args.sheet), args.dpi)
+    except (OSError, ValueError) as e:
+        print(f"生成标签页失败: {e}")
+        sys.exit(1)
+    # 无法编码的行留空单元格，其余照常排布
+    for index, message in failed.items():
+        errors.setdefault(index, f'第 {rows[index].line_no} 行: {message}')
+    for index in sorted(errors)[:20]:
+        print(f"  {errors[index]}", file=sys.stderr)
+    if len(errors) > 20:
+        print(f"  ... 另有 {len(errors) - 20} 行失败", file=sys.stderr)
+    for path in paths:
+        print(f"标签页已保存到: {path}")
+    if errors:
+        print(f"{len(errors)} 行无法编码，对应单元格留空")
+        sys.exit(1)
+
+
+def run_tensor_cli(args: argparse.Namespace) -> None:
+    """执行 --tensor 模式：将 --batch 的所有符号光栅化为 .npy 张量"""
+    try:
+        from micro_qr_tensor import items_from_rows, rasterize
+    except ImportError as e:
+        print(f"张量输出需要安装 numpy: {e}")
+        sys.exit(1)
+    from micro_qr_batch import read_batch_rows
+
+    path = get_output_path(args.tensor)
+    try:
+        rows = list(read_batch_rows(args.batch))
+        items, errors = items_from_rows(rows, args.error_correction)
+        result = rasterize(items, scale=args.scale, border=args.border, packed=args.packed,
+                           path=path, workers=args.workers)
+    except (OSError, ValueError) as e:
+        print(f"生成张量失败: {e}")
+        sys.exit(1)
+    for index, message in result.errors.items():
+        errors.setdefault(index, f'第 {rows[index].line_no} 行: {message}')
+    for index in sorted(errors)[:20]:
+        print(f"  {errors[index]}", file=sys.stderr)
+    if len(errors) > 20:
+        print(f"  ... 另有 {len(errors) - 20} 行失败", file=sys.stderr)
+    shape = '×'.join(str(n) for n in result.array.shape)
+    print(f"张量已保存到: {path} ({shape} uint8{'，按位打包' if args.packed else ''}，{len(errors)} 行失败)")
+    if errors:
+        sys.exit(1)
+
+
 def main() -> None:
     """主函数"""
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        from micro_qr_server import main as serve_main
+        serve_main(sys.argv[2:])
+        return
+    parse_start = time.perf_counter()
     parser = argparse.ArgumentParser(
         description="使用 segno 生成 Micro QR Code (M1-M4)",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -87,9 +559,16 @@ def main() -> None:
   %(prog)s "Hello, world!"           # 自动选择最合适的 Micro QR
   %(prog)s "Tiny" -v 2               # 强制生成 M2
   %(prog)s "Hello" --format png -o qr.png
+  %(prog)s --batch codes.csv --format png -j 8   # 批量生成到 qrcodes/ 目录
+  %(prog)s --batch codes.csv --sheet labels.pdf --page A4 --caption   # 排布为标签页
+  %(prog)s --batch codes.csv --tensor codes.npy --scale 2 --border 1  # 光栅化为 NumPy 张量
+  %(prog)s --sequence A 0000001 100000 --format png -j 8   # 序列号 A0000001…A0100000
+  %(prog)s --batch codes.csv --format zpl --scale 6 --border 2 --stream tcp://printer:9100   # 发送到标签打印机
+  %(prog)s --batch codes.csv --profile profile.json  # 输出各阶段耗时
+  %(prog)s serve --port 8080         # 启动 HTTP 渲染服务 (编码文本 "serve" 请写作 -- serve)
         """
     )
-    parser.add_argument('data', help='要编码的文本数据')
+    parser.add_argument('data', nargs='?', help='要编码的文本数据 (使用 --batch 时省略)')
     parser.add_argument('-v', '--version', type=int, default=None, choices=[1, 2, 3, 4],
                         help='Micro QR Code 版本 (M1-M4)，默认: 自动选择')
     parser.add_argument('-e', '--error-correction', default='L',
@@ -97,29 +576,180 @@ def main() -> None:
                         help='容错等级: L=7%%, M=15%%, Q=25%%, H=30%% (默认: L)')
     parser.add_argument('-o', '--output',
                         help='输出文件名 (默认: 保存到 qrcodes/ 目录，SVG 未指定文件名时输出 data URI 到标准输出)')
-    parser.add_argument('--format', choices=['svg', 'png'], default='svg',
-                        help='输出格式 (默认: svg)')
+    parser.add_argument('--format', choices=['svg', 'png', 'pbm', 'zpl', 'epl'], default='svg',
+                        help='输出格式: svg、png，或标签打印机光栅 pbm (P4 位图) / zpl (^GFA 压缩图形) / '
+                             'epl (GW 图形)，scale 即每个模块的打印点数 (默认: svg)')
     parser.add_argument('--scale', type=int, default=8,
                         help='缩放比例 (默认: 8)')
     parser.add_argument('--border', type=int, default=4,
                         help='边框大小，以模块为单位 (默认: 4)')
+    parser.add_argument('--engine', choices=ENGINES, default='segno',
+                        help='编码引擎: segno 或 builtin (内置 Micro QR 专用编码器，速度更快) (默认: segno)')
+    parser.add_argument('--mask-engine', choices=MASK_ENGINES, default='python',
+                        help='内置引擎的掩码评估方式: python 或 numpy (按分块矢量化，需要 numpy) (默认: python)')
+    parser.add_argument('--png-compression', choices=['fast', 'default', 'small'], default=None,
+                        help='PNG 压缩级别: fast 吞吐优先, small 体积优先 (默认: 配置 defaults.png_compression)')
+    parser.add_argument('--plan', action='store_true',
+                        help='仅校验数据能否编码并输出选定的版本/容错等级，不生成文件')
+    parser.add_argument('--profile', nargs='?', const='-', metavar='FILE',
+                        help='统计各阶段 (parse/config/encode/mask/rasterize/write) 耗时: '
+                             '省略 FILE 时以 JSON 输出到标准错误，.json 写入文件，.prof/.pstats 写入 cProfile 数据')
+    batch_group = parser.add_argument_group('批量模式')
+    batch_group.add_argument('--batch', metavar='FILE',
+                             help='从 CSV / JSONL / 纯文本文件批量生成 (列: data, filename, version, error_correction)')
+    batch_group.add_argument('--sequence', nargs=3, metavar=('PREFIX', 'START', 'COUNT'),
+                             help='生成前缀 + 递增序号的 COUNT 个符号 (如 A 0000001 1000)，START 的位数即补零宽度；'
+                                  '使用增量编码，文件按数据命名')
+    batch_group.add_argument('-j', '--workers', type=int, default=None,
+                             help='工作进程数 (默认: CPU 核数，1 表示不使用进程池)')
+    batch_group.add_argument('--chunk-size', type=int, default=256,
+                             help='每个任务分块的行数 (默认: 256)')
+    batch_group.add_argument('--error-log', metavar='FILE',
+                             help='将失败行以 JSONL 格式写入该文件')
+    batch_group.add_argument('--cache-entries', type=int, default=None,
+                             help='每个工作进程的渲染缓存条目上限，0 表示禁用 (默认: 配置 cache.max_entries)')
+    batch_group.add_argument('--cache-bytes', type=int, default=None,
+                             help='每个工作进程的渲染缓存字节上限 (默认: 配置 cache.max_bytes)')
+    batch_group.add_argument('--archive', metavar='FILE',
+                             help='将所有符号写入单个 .zip / .tar / .tar.gz 归档 (附带偏移清单)，而不是逐个文件')
+    batch_group.add_argument('--archive-level', type=int, default=0, choices=range(10), metavar='0-9',
+                             help='归档压缩级别，0 表示仅存储 (默认: 0)')
+    batch_group.add_argument('--stream', metavar='TARGET',
+                             help='将 --batch / --sequence 的全部标签按输入顺序连续写入一个文件或 TCP 套接字 '
+                                  '(tcp://主机[:端口]，默认端口 9100)；需要 --format pbm / zpl / epl')
+    batch_group.add_argument('--verify', nargs='?', type=float, const=1.0, default=0.0, metavar='RATE',
+                             help='生成后在工作进程中解码模块矩阵并与数据比较；可给出抽样比例 0-1 (默认全部校验)')
+    batch_group.add_argument('--dedup', action='store_true',
+                             help='数据与参数相同的行只渲染一次，重复行写为硬链接 (归档中为引用成员)，并报告去重比例')
+    sheet_group = parser.add_argument_group('标签页 (需要 numpy)')
+    sheet_group.add_argument('--sheet', metavar='FILE',
+                             help='将 --batch 的所有符号排布到一张 PNG 或多页 PDF (.pdf)')
+    sheet_group.add_argument('--columns', type=int, default=None, help='每页列数 (默认: 自动)')
+    sheet_group.add_argument('--rows', type=int, default=None, help='每页行数 (默认: 自动)')
+    sheet_group.add_argument('--spacing', type=int, default=8, help='符号间距，像素 (默认: 8)')
+    sheet_group.add_argument('--margin', type=int, default=16, help='页边距，像素 (默认: 16)')
+    sheet_group.add_argument('--page', default=None,
+                             help='页面尺寸: A4, A5, A6, Letter (可加 -landscape) 或 宽x高 像素 (默认: 单张拼图)')
+    sheet_group.add_argument('--dpi', type=int, default=300, help='纸张尺寸换算与输出分辨率 (默认: 300)')
+    sheet_group.add_argument('--caption', action='store_true', help='在每个符号下方印出数据文字')
+    tensor_group = parser.add_argument_group('张量 (需要 numpy)')
+    tensor_group.add_argument('--tensor', metavar='FILE',
+                              help='将 --batch 的所有符号光栅化为 N×H×W uint8 张量，以内存映射方式写入 .npy 文件')
+    tensor_group.add_argument('--packed', action='store_true',
+                              help='张量沿宽度按位打包为 N×H×ceil(W/8)（1 为深色）')
     args = parser.parse_args()
 
+    if not args.profile:
+        run_cli(parser, args)
+        return
+    profiler.enable()
+    profiler.record('parse', time.perf_counter() - parse_start)
+    cprofile = None
+    if args.profile.endswith(('.prof', '.pstats')):
+        import cProfile
+
+        cprofile = cProfile.Profile()
+    if cprofile is not None:
+        cprofile.enable()
+    try:
+        run_cli(parser, args)
+    finally:
+        if cprofile is not None:
+            cprofile.disable()
+        write_profile(args.profile, cprofile)
+
+
+def write_profile(target: str, cprofile: Optional['cProfile.Profile'] = None) -> None:
+    """
+    输出分阶段计时结果
+
+    Args:
+        target: '-' 表示以 JSON 输出到标准错误；否则为文件路径
+        cprofile: 不为 None 时将 cProfile 数据写入 target，分阶段汇总仍输出到标准错误
+    """
+    report = json.dumps({'stages': profiler.summary()}, ensure_ascii=False, indent=2)
+    if cprofile is not None:
+        cprofile.dump_stats(target)
+        print(f"cProfile 数据已保存到 {target}", file=sys.stderr)
+        print(report, file=sys.stderr)
+    elif target == '-':
+        print(report, file=sys.stderr)
+    else:
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(report)
+        print(f"分阶段计时已保存到 {target}", file=sys.stderr)
+
+
+def run_cli(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """按解析后的参数执行单条 / 批量 / 标签页模式"""
+    if args.png_compression:
+        from config import config
+
+        # 仅修改内存中的配置，不写回配置文件
+        config.set('defaults.png_compression', args.png_compression)
+    if args.stream:
+        if args.format not in ('pbm', 'zpl', 'epl'):
+            parser.error('--stream 需要 --format pbm / zpl / epl')
+        if args.archive or args.dedup:
+            parser.error('--stream 不能与 --archive / --dedup 同时使用')
+        if not (args.batch or args.sequence) or args.plan or args.sheet or args.tensor:
+            parser.error('--stream 需要与 --batch 或 --sequence 一起使用')
+    if args.sequence:
+        if args.data or args.batch or args.plan or args.sheet or args.tensor:
+            parser.error('--sequence 不能与 data / --batch / --plan / --sheet / --tensor 同时使用')
+        run_batch_cli(args)
+        return
+    if args.batch:
+        if args.data:
+            parser.error('--batch 模式下不能同时指定 data')
+        if args.sheet:
+            run_sheet_cli(args)
+        elif args.tensor:
+            run_tensor_cli(args)
+        else:
+            run_batch_cli(args)
+        return
+    if args.sheet or args.tensor:
+        parser.error('--sheet / --tensor 需要与 --batch 一起使用')
+    if args.data is None:
+        parser.error('缺少要编码的数据 (或使用 --batch FILE)')
+
+    if args.plan:
+        try:
+            plan = plan_micro_qr(args.data, args.version, args.error_correction)
+        except ValueError as e:
+            print(f"无法生成 Micro QR Code: {e}")
+            sys.exit(1)
+        print(f"{plan.designator} {plan.mode} {plan.char_count}/{plan.capacity}")
+        return
+
     try:
-        qr = generate_micro_qr(args.data, args.version, args.error_correction)
+        qr = generate_micro_qr(args.data, args.version, args.error_correction, args.engine)
         
         if args.format == 'svg':
             out_path = get_output_path(args.output)
             if out_path:
                 save_svg(qr, out_path, args.scale, args.border)
             else:
-                print(qr.svg_data_uri(scale=args.scale, border=args.border))
+                from micro_qr_svg import svg_data_uri
+
+                print(svg_data_uri(qr.matrix, args.scale, args.border))
         elif args.format == 'png':
             out_path = get_output_path(args.output)
             if not out_path:
                 print("错误: PNG 格式需要指定输出文件名 (-o)")
                 sys.exit(1)
             save_png(qr, out_path, args.scale, args.border)
+        else:
+            # 标签格式：未指定文件名时写到标准输出，便于直接转发给打印机
+            payload = render_bytes(qr, args.format, args.scale, args.border)
+            out_path = get_output_path(args.output)
+            if out_path:
+                write_bytes(out_path, payload)
+                print(f"{args.format.upper()} 已保存到 {out_path}")
+            else:
+                sys.stdout.buffer.write(payload)
+                sys.stdout.buffer.flush()
     except Exception as e:
         print(f"生成 Micro QR Code 时出错: {e}")
         sys.exit(1)
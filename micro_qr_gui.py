@@ -2,20 +2,111 @@
 Micro QR Code 生成器 - 图形界面
 
 基于 tkinter 的现代化 Micro QR Code 生成工具，提供直观的图形界面。
+预览的编码与渲染在后台线程中执行，结果经 after 轮询交回 Tk 主线程。
 """
 
+import base64
+import multiprocessing
 import os
-import tempfile
+import queue
+import threading
+import time
 import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from tkinter import ttk, filedialog, messagebox
-from typing import Optional, Tuple
+from typing import Any, List, NamedTuple, Optional, Set, Tuple
 import segno
-from PIL import Image, ImageTk
 from config import config
+from micro_qr_batch import BatchRow, encode_symbols, export_symbols, read_batch_rows
+from micro_qr_cache import configure_render_cache, render_cache
+from micro_qr_generator import render_bytes, write_bytes
+from micro_qr_png import png_bytes
+from micro_qr_symbol import MicroSymbol
 import tkinter.font as tkfont
 import platform
 import ctypes
 
+# 配置文件变化的检查间隔（毫秒）
+CONFIG_POLL_MS = 1000
+
+# 后台渲染进行中时，主线程取回结果的轮询间隔（毫秒）
+RESULT_POLL_MS = 15
+
+# 批量面板：结果列表行高与缩略图边长（像素）、每个任务的行数、进度轮询间隔（毫秒）
+BATCH_ROW_HEIGHT = 52
+BATCH_THUMB_PX = 44
+BATCH_CHUNK_SIZE = 256
+BATCH_POLL_MS = 50
+
+
+class PreviewJob(NamedTuple):
+    """一次预览渲染任务（参数在主线程中取出，工作线程不访问 tkinter 变量）"""
+    generation: int
+    data: str
+    fmt: str
+    target_px: int
+    border: int
+    max_preview_size: int
+    qr: Optional[segno.QRCode] = None  # 已编码的符号，给出时跳过编码
+
+
+class PreviewResult(NamedTuple):
+    """预览渲染结果：成功时 error 为 None，PNG 格式时 png 为预览图像内容"""
+    generation: int
+    data: str
+    qr: Optional[segno.QRCode]
+    png: Optional[bytes]
+    error: Optional[Exception]
+
+
+def _preview_png(qr: segno.QRCode, target_px: int, border: int, max_preview_size: int) -> bytes:
+    """按目标像素（不超过 max_preview_size）取最大整数 scale，生成预览 PNG"""
+    target_px = min(max(1, target_px), max_preview_size)
+    # 以 scale=1 的像素宽度为基准，取不超过 target_px 的最大整数 scale
+    base_w, _ = qr.symbol_size(scale=1, border=border)
+    best_scale = max(1, min(100, target_px // max(1, base_w)))
+    return png_bytes(qr.matrix, best_scale, border, "fast")
+
+
+def _render_preview(job: PreviewJob) -> PreviewResult:
+    """编码并渲染预览（在工作线程中执行）"""
+    try:
+        qr = job.qr if job.qr is not None else render_cache.get_symbol(job.data, None, None)
+        png = _preview_png(qr, job.target_px, job.border, job.max_preview_size) if job.fmt == "png" else None
+        return PreviewResult(job.generation, job.data, qr, png, None)
+    except Exception as e:
+        return PreviewResult(job.generation, job.data, None, None, e)
+
+
+class PreviewWorker:
+    """
+    后台预览渲染线程
+
+    只保留最新提交的任务：尚未开始的旧任务直接被替换，正在执行的旧任务的结果由主线程按代号丢弃。
+    结果放入线程安全队列，由主线程通过 after 轮询取回后再创建 PhotoImage。
+    """
+
+    def __init__(self):
+        self.results: "queue.Queue[PreviewResult]" = queue.Queue()
+        self._cond = threading.Condition()
+        self._job: Optional[PreviewJob] = None
+        self._thread = threading.Thread(target=self._run, name="preview-render", daemon=True)
+        self._thread.start()
+
+    def submit(self, job: PreviewJob) -> None:
+        with self._cond:
+            self._job = job
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._job is None:
+                    self._cond.wait()
+                job, self._job = self._job, None
+            self.results.put(_render_preview(job))
+
 
 class MicroQRGeneratorGUI:
     """Micro QR Code 生成器图形界面类"""
@@ -51,6 +142,9 @@ class MicroQRGeneratorGUI:
         self.size_px_var = tk.IntVar(value=int(default_size_px))
         self.border_var = tk.IntVar(value=config.get_default("border", 1))
 
+        # 渲染缓存容量
+        configure_render_cache()
+
         # 字体设置（优先使用配置；否则按平台选择最佳可用字体）
         self.ui_font_size: int = config.get("ui.font_size", 12)
         # 文本预览字号相对主字号略小，避免拥挤
@@ -61,9 +155,22 @@ class MicroQRGeneratorGUI:
         # 预览刷新防抖任务句柄
         self._preview_update_job: Optional[str] = None
 
+        # 后台渲染：每次请求递增代号，只应用最新代号的结果；_submitted 为最后提交给工作线程的代号
+        self._worker = PreviewWorker()
+        self._generation = 0
+        self._submitted = 0
+        self._result_poll_job: Optional[str] = None
+
+        # 当前文本的编码结果：仅数据变化时重新编码，尺寸/边框/格式变化只重新栅格化
+        self._symbol_data: Optional[str] = None
+        self._symbol: Optional[segno.QRCode] = None
+
+        # 批量生成面板（按需创建）
+        self._batch_window: Optional[BatchWindow] = None
+
         # 图片引用（防止被垃圾回收）
-        self.qr_img: Optional[ImageTk.PhotoImage] = None
-        self.tk_img: Optional[ImageTk.PhotoImage] = None
+        self.qr_img: Optional[tk.PhotoImage] = None
+        self.tk_img: Optional[tk.PhotoImage] = None
 
         # 参数变更自动刷新预览
         self.size_px_var.trace_add('write', self._on_param_change)
@@ -71,6 +178,10 @@ class MicroQRGeneratorGUI:
         self.format_var.trace_add('write', self._on_param_change)
 
         self.build_ui()
+
+        # 配置文件热加载：定时检查，变化的默认值直接应用到界面
+        config.subscribe(self._on_config_change)
+        self._poll_config()
     
     def _resolve_ui_font_family(self) -> str:
         """返回可用的界面字体：优先配置；若配置不可用，则回退系统最佳。"""
@@ -236,6 +347,20 @@ class MicroQRGeneratorGUI:
             style="Modern.TButton"
         ).pack(fill=tk.X, pady=4)
 
+        ttk.Button(
+            parent, 
+            text="批量生成…", 
+            command=self.open_batch_window, 
+            style="Modern.TButton"
+        ).pack(fill=tk.X, pady=4)
+
+    def open_batch_window(self) -> None:
+        """打开（或前置）批量生成面板"""
+        if self._batch_window is None:
+            self._batch_window = BatchWindow(self)
+        else:
+            self._batch_window.window.lift()
+
     def _build_preview_area(self, parent: ttk.Frame) -> None:
         """构建预览区域"""
         self.preview = tk.Label(
@@ -251,23 +376,52 @@ class MicroQRGeneratorGUI:
     def _build_status_bar(self, parent: ttk.Frame) -> None:
         """构建状态栏"""
         self.status_var = tk.StringVar(value="就绪")
+        barfrm = ttk.Frame(parent, style="Modern.TFrame")
+        barfrm.pack(fill=tk.X, pady=(0, 6))
+        # 后台渲染进行中时显示的进度条
+        self.progress = ttk.Progressbar(barfrm, mode="indeterminate", length=80)
+        self.progress.pack(side=tk.RIGHT, padx=(6, 0))
         ttk.Label(
-            parent, 
+            barfrm, 
             textvariable=self.status_var, 
             anchor=tk.W, 
             relief=tk.SUNKEN, 
             style="Modern.TLabel"
-        ).pack(fill=tk.X, pady=(0, 6))
+        ).pack(side=tk.LEFT, fill=tk.X, expand=True)
 
     def _on_param_change(self, *args) -> None:
-        """参数变更时，自动刷新预览（防抖）。"""
+        """参数变更时，自动刷新预览：数据未变时直接由已编码的符号重新栅格化，否则防抖后编码。"""
         data = self.data_var.get().strip()
         if not data:
             # 无数据时清空预览，不弹错误
             self.preview.config(image="", text="")
             self.status_var.set("请输入数据")
             return
-        self._schedule_preview_refresh()
+        if self._cached_symbol(data) is not None:
+            self.generate_qr()
+        else:
+            self._schedule_preview_refresh()
+
+    def _cached_symbol(self, data: str) -> Optional[segno.QRCode]:
+        """返回当前文本已编码的符号（文本变化后为 None）"""
+        return self._symbol if data == self._symbol_data else None
+
+    def _poll_config(self) -> None:
+        """定时检查配置文件变化（回调在 Tk 主线程中执行）"""
+        config.reload_if_changed()
+        self.root.after(CONFIG_POLL_MS, self._poll_config)
+
+    def _on_config_change(self, changed: Set[str]) -> None:
+        """应用变化的默认参数；变量写入会触发预览刷新"""
+        if "defaults.size_px" in changed:
+            self.size_px_var.set(int(config.get_default("size_px", None) or 240))
+        if "defaults.border" in changed:
+            self.border_var.set(config.get_default("border", 1))
+        if "defaults.format" in changed:
+            self.format_var.set(config.get_default("format", "png"))
+        if changed & {"cache.max_entries", "cache.max_bytes"}:
+            configure_render_cache()
+        self.status_var.set(f"配置已更新: {', '.join(sorted(changed))}")
 
     def _schedule_preview_refresh(self) -> None:
         # 60ms 节流：若已有挂起任务则不再重复安排
@@ -290,81 +444,92 @@ class MicroQRGeneratorGUI:
         if not data:
             self.status_var.set("请输入数据")
             return None
+        qr = self._cached_symbol(data)
+        if qr is not None:
+            return qr
         
         try:
-            return segno.make(data, micro=True)
+            return render_cache.get_symbol(data, None, None)
         except Exception as e:
             self.status_var.set(f"错误: {type(e).__name__}: {e}")
             messagebox.showerror("二维码生成失败", f"{type(e).__name__}: {e}")
             return None
 
-    def _create_preview_image(self, qr: segno.QRCode) -> Optional[ImageTk.PhotoImage]:
-        """
-        创建预览图片（直接用 segno 生成到目标像素尺寸，避免二次缩放导致模糊）。
-        """
+    def generate_qr(self) -> None:
+        """生成 QR Code 并显示预览（编码与渲染在后台线程中进行）"""
+        data = self.data_var.get().strip()
+        if not data:
+            self.status_var.set("请输入数据")
+            self.preview.config(image="", text="")
+            return
         try:
-            max_preview_size = config.get_gui_setting("max_preview_size", 320)
-            border = self.border_var.get()
-            # 目标像素直接取自 size_px，且预览不超过 max_preview_size
             target_px = max(1, int(self.size_px_var.get() or 1))
-            target_px = min(max(1, target_px), max_preview_size)
-
-            # 计算 scale：以 scale=1 的像素宽度为基准，取不超过 target_px 的最大整数 scale
-            base_w, _ = qr.symbol_size(scale=1, border=border)
-            if base_w <= 0:
-                base_w = 1
-            best_scale = max(1, min(100, target_px // base_w))
-            if best_scale < 1:
-                best_scale = 1
-
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-                tmp_path = tmp_file.name
-
-            qr.save(tmp_path, kind="png", scale=best_scale, border=border)
+            border = self.border_var.get()
+        except (tk.TclError, ValueError):
+            # Spinbox 输入到一半（如空字符串）时等待下一次变更
+            return
 
-            img = Image.open(tmp_path)
-            tk_img = ImageTk.PhotoImage(img)
+        self._generation += 1
+        job = PreviewJob(
+            self._generation, data, self.format_var.get(), target_px, border,
+            config.get_gui_setting("max_preview_size", 320), self._cached_symbol(data),
+        )
+        if job.qr is not None:
+            # 数据未变：栅格化开销很小，直接在主线程完成（同时使进行中的后台结果过期）
+            self._show_result(_render_preview(job))
+            self.progress.stop()
+            return
 
+        self._submitted = self._generation
+        self._worker.submit(job)
+        self.status_var.set("正在生成…")
+        self.progress.start(10)
+        if self._result_poll_job is None:
+            self._result_poll_job = self.root.after(RESULT_POLL_MS, self._poll_results)
+
+    def _poll_results(self) -> None:
+        """取回后台渲染结果（Tk 主线程），丢弃已过期代号的结果"""
+        self._result_poll_job = None
+        done = False
+        while True:
             try:
-                os.unlink(tmp_path)
-            except OSError:
-                pass
-
-            return tk_img
-
-        except Exception as e:
-            self.status_var.set(f"预览图片生成失败: {e}")
-            return None
-
-    def generate_qr(self) -> None:
-        """生成 QR Code 并显示预览"""
-        qr = self._generate_qr_code()
-        if qr is None:
+                result = self._worker.results.get_nowait()
+            except queue.Empty:
+                break
+            if result.generation == self._generation:
+                self._show_result(result)
+            if result.generation == self._submitted:
+                done = True
+        if done:
+            self.progress.stop()
+        else:
+            self._result_poll_job = self.root.after(RESULT_POLL_MS, self._poll_results)
+
+    def _show_result(self, result: PreviewResult) -> None:
+        """在预览区显示渲染结果"""
+        if result.error is None:
+            self._symbol_data, self._symbol = result.data, result.qr
+        else:
+            e = result.error
             self.preview.config(image="", text="")
+            self.status_var.set(f"错误: {type(e).__name__}: {e}")
+            messagebox.showerror("二维码生成失败", f"{type(e).__name__}: {e}")
             return
-        
-        fmt = self.format_var.get()
-        
+
         try:
-            if fmt == "png":
-                # 生成 PNG 预览（按最大尺寸计算scale，避免模糊）
-                self.tk_img = self._create_preview_image(qr)
-                if self.tk_img:
-                    self.preview.config(image=self.tk_img, text="")
-                    self.qr_img = self.tk_img  # 防止图片被垃圾回收
-                else:
-                    self.preview.config(image="", text="预览生成失败")
-                    
-            elif fmt == "svg":
+            if result.png is not None:
+                self.tk_img = tk.PhotoImage(data=base64.b64encode(result.png))
+                self.preview.config(image=self.tk_img, text="")
+                self.qr_img = self.tk_img  # 防止图片被垃圾回收
+            else:
                 # SVG 格式预览
                 self.preview.config(
                     image="", 
                     text="SVG 生成成功，可保存文件查看", 
                     font=(self.mono_font_family, self.preview_font_size)
                 )
-            # 不再支持 text 预览
             
-            self.status_var.set(f"Micro QR 已生成: {qr.designator}")
+            self.status_var.set(f"Micro QR 已生成: {result.qr.designator}")
             
         except Exception as e:
             self.preview.config(image="", text="")
@@ -399,7 +564,8 @@ class MicroQRGeneratorGUI:
                     base_w = 1
                 save_scale = max(1, min(100, target_px // base_w))
                 kind = "png" if fmt == "png" else "svg"
-                qr.save(file, kind=kind, scale=save_scale, border=border)
+                # 直接由已编码的符号渲染，不再重新编码
+                write_bytes(file, render_bytes(qr, kind, save_scale, border))
             else:
                 # 非法格式（理应不会出现），直接返回
                 self.status_var.set("不支持的格式")
@@ -412,6 +578,343 @@ class MicroQRGeneratorGUI:
             messagebox.showerror("保存失败", f"{type(e).__name__}: {e}")
 
 
+class BatchWindow:
+    """
+    批量生成面板（独立窗口）
+
+    导入文本 / CSV / JSONL 文件后在进程池或线程池中编码为紧凑符号记录，进度条与吞吐实时刷新；
+    结果列表为虚拟列表，只为可见行创建缩略图；结果可导出到目录或归档。
+    后台线程只通过队列交回事件，所有控件更新都在 Tk 主线程的 after 轮询中完成。
+    """
+
+    def __init__(self, gui: MicroQRGeneratorGUI):
+        self.gui = gui
+        self.window = tk.Toplevel(gui.root)
+        self.window.title("批量生成")
+        self.window.geometry("680x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.rows: List[BatchRow] = []
+        self.symbols: List[Optional[bytes]] = []
+        self.errors: List[Optional[str]] = []
+        self.done = 0
+        self.failed = 0
+
+        self._events: "queue.Queue[Tuple[Any, ...]]" = queue.Queue()
+        self._cancel = threading.Event()
+        self._busy = False
+        self._started = 0.0
+        self._poll_job: Optional[str] = None
+        # 可见行缩略图缓存（按行号，超出上限时淘汰最久未用的）
+        self._thumbs: "OrderedDict[int, tk.PhotoImage]" = OrderedDict()
+
+        self.mode_var = tk.StringVar(value="进程")
+        self.workers_var = tk.IntVar(value=os.cpu_count() or 1)
+        self.error_var = tk.StringVar(value=config.get_default("error_correction", "L"))
+        self.format_var = tk.StringVar(value=gui.format_var.get())
+        self.scale_var = tk.IntVar(value=8)
+        self.border_var = tk.IntVar(value=gui.border_var.get())
+        self.info_var = tk.StringVar(value="请导入文件（.txt / .csv / .jsonl）")
+
+        self._build()
+
+    def _build(self) -> None:
+        font = (self.gui.ui_font_family, self.gui.ui_font_size)
+        frm = ttk.Frame(self.window, padding=12, style="Modern.TFrame")
+        frm.pack(fill=tk.BOTH, expand=True)
+
+        # 导入与生成
+        bar = ttk.Frame(frm, style="Modern.TFrame")
+        bar.pack(fill=tk.X)
+        ttk.Button(bar, text="导入…", command=self.import_file, style="Modern.TButton").pack(side=tk.LEFT)
+        ttk.Label(bar, text="并行:", style="Modern.TLabel").pack(side=tk.LEFT, padx=(12, 0))
+        ttk.Combobox(bar, textvariable=self.mode_var, values=("进程", "线程"), width=4,
+                     state="readonly", font=font).pack(side=tk.LEFT, padx=2)
+        ttk.Spinbox(bar, from_=1, to=64, textvariable=self.workers_var, width=3,
+                    font=font).pack(side=tk.LEFT)
+        ttk.Label(bar, text="默认容错:", style="Modern.TLabel").pack(side=tk.LEFT, padx=(12, 0))
+        ttk.Combobox(bar, textvariable=self.error_var, values=("L", "M", "Q"), width=2,
+                     state="readonly", font=font).pack(side=tk.LEFT, padx=2)
+        ttk.Button(bar, text="取消", command=self.cancel, style="Modern.TButton").pack(side=tk.RIGHT)
+        ttk.Button(bar, text="开始", command=self.start, style="Modern.TButton").pack(side=tk.RIGHT, padx=4)
+
+        # 导出
+        bar = ttk.Frame(frm, style="Modern.TFrame")
+        bar.pack(fill=tk.X, pady=(8, 0))
+        ttk.Label(bar, text="格式:", style="Modern.TLabel").pack(side=tk.LEFT)
+        for fmt in ("png", "svg"):
+            ttk.Radiobutton(bar, text=fmt.upper(), variable=self.format_var, value=fmt,
+                            style="Modern.TRadiobutton").pack(side=tk.LEFT, padx=2)
+        ttk.Label(bar, text="缩放:", style="Modern.TLabel").pack(side=tk.LEFT, padx=(12, 0))
+        ttk.Spinbox(bar, from_=1, to=100, textvariable=self.scale_var, width=3, font=font).pack(side=tk.LEFT)
+        ttk.Label(bar, text="边框:", style="Modern.TLabel").pack(side=tk.LEFT, padx=(12, 0))
+        ttk.Spinbox(bar, from_=0, to=10, textvariable=self.border_var, width=3, font=font).pack(side=tk.LEFT)
+        ttk.Button(bar, text="导出归档…", command=lambda: self.export(True),
+                   style="Modern.TButton").pack(side=tk.RIGHT)
+        ttk.Button(bar, text="导出目录…", command=lambda: self.export(False),
+                   style="Modern.TButton").pack(side=tk.RIGHT, padx=4)
+
+        # 进度
+        self.progress = ttk.Progressbar(frm, mode="determinate")
+        self.progress.pack(fill=tk.X, pady=(10, 2))
+        ttk.Label(frm, textvariable=self.info_var, anchor=tk.W, style="Modern.TLabel").pack(fill=tk.X)
+
+        # 结果列表：画布按行号定位，滚动时只绘制可见行
+        listfrm = ttk.Frame(frm)
+        listfrm.pack(fill=tk.BOTH, expand=True, pady=(8, 0))
+        self.scrollbar = ttk.Scrollbar(listfrm, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas = tk.Canvas(listfrm, bg="#ffffff", highlightthickness=0,
+                                yscrollincrement=BATCH_ROW_HEIGHT, yscrollcommand=self._on_view_change)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.canvas.bind("<Configure>", lambda e: self._redraw())
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-3, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(3, "units"))
+
+    # ----- 导入与生成 -----
+
+    def import_file(self) -> None:
+        """选择并读取批量输入文件"""
+        if self._busy:
+            return
+        path = filedialog.askopenfilename(
+            parent=self.window,
+            filetypes=[("批量输入", "*.txt *.csv *.jsonl *.ndjson"), ("所有文件", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            rows = list(read_batch_rows(path))
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("导入失败", f"{type(e).__name__}: {e}", parent=self.window)
+            return
+        self.rows = rows
+        self.symbols = [None] * len(rows)
+        self.errors = [None] * len(rows)
+        self.done = self.failed = 0
+        self._thumbs.clear()
+        self.progress.config(maximum=max(1, len(rows)), value=0)
+        self.canvas.config(scrollregion=(0, 0, 0, len(rows) * BATCH_ROW_HEIGHT))
+        self.canvas.yview_moveto(0)
+        self.info_var.set(f"已导入 {len(rows)} 行: {os.path.basename(path)}")
+        self._redraw()
+
+    def start(self) -> None:
+        """在后台开始编码全部行"""
+        if self._busy or not self.rows:
+            return
+        try:
+            workers = max(1, int(self.workers_var.get()))
+        except (tk.TclError, ValueError):
+            workers = 1
+        self.symbols = [None] * len(self.rows)
+        self.errors = [None] * len(self.rows)
+        self.done = self.failed = 0
+        self._thumbs.clear()
+        self._begin()
+        threading.Thread(
+            target=self._run_generate,
+            args=(self.rows, workers, self.mode_var.get() == "进程", self.error_var.get()),
+            name="batch-generate", daemon=True,
+        ).start()
+
+    def _run_generate(self, rows: List[BatchRow], workers: int, use_processes: bool,
+                      default_error: str) -> None:
+        """后台线程：按块提交编码任务，在途块数有上限，完成的块以事件交回主线程"""
+        try:
+            if use_processes:
+                # GUI 进程中已有 Tk 与多个线程，使用 spawn 启动工作进程而不是 fork
+                pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                pool = ThreadPoolExecutor(max_workers=workers)
+            with pool:
+                starts = iter(range(0, len(rows), BATCH_CHUNK_SIZE))
+                pending = {}
+
+                def submit_next() -> None:
+                    start = next(starts, None)
+                    if start is not None and not self._cancel.is_set():
+                        chunk = rows[start:start + BATCH_CHUNK_SIZE]
+                        pending[pool.submit(encode_symbols, chunk, default_error)] = start
+
+                for _ in range(workers * 2):
+                    submit_next()
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._events.put(("encoded", pending.pop(future), future.result()))
+                        submit_next()
+                    if self._cancel.is_set():
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        break
+            self._events.put(("finished", "生成", None))
+        except Exception as e:
+            self._events.put(("finished", "生成", e))
+
+    # ----- 导出 -----
+
+    def export(self, archive: bool) -> None:
+        """将成功的结果导出到目录或归档"""
+        if self._busy or not any(self.symbols):
+            return
+        if archive:
+            target = filedialog.asksaveasfilename(
+                parent=self.window, defaultextension=".zip",
+                filetypes=[("归档", "*.zip *.tar *.tar.gz *.tgz"), ("所有文件", "*.*")]
+            )
+        else:
+            target = filedialog.askdirectory(parent=self.window, mustexist=False)
+        if not target:
+            return
+        try:
+            fmt, scale, border = self.format_var.get(), int(self.scale_var.get()), int(self.border_var.get())
+        except (tk.TclError, ValueError):
+            messagebox.showerror("导出失败", "缩放与边框必须为整数", parent=self.window)
+            return
+        self.done = 0
+        self.progress.config(maximum=max(1, sum(1 for s in self.symbols if s is not None)), value=0)
+        self._begin()
+        threading.Thread(
+            target=self._run_export,
+            args=(list(self.rows), list(self.symbols), target, fmt, scale, border, archive),
+            name="batch-export", daemon=True,
+        ).start()
+
+    def _run_export(self, rows: List[BatchRow], symbols: List[Optional[bytes]], target: str,
+                    fmt: str, scale: int, border: int, archive: bool) -> None:
+        try:
+            export_symbols(rows, symbols, target, fmt, scale, border, archive, cancel=self._cancel,
+                           progress=lambda n: self._events.put(("exported", n)))
+            self._events.put(("finished", "导出", None))
+        except Exception as e:
+            self._events.put(("finished", "导出", e))
+
+    # ----- 主线程事件处理 -----
+
+    def _begin(self) -> None:
+        self._busy = True
+        self._cancel.clear()
+        self._started = time.perf_counter()
+        self.progress.config(value=0)
+        if self._poll_job is None:
+            self._poll_job = self.window.after(BATCH_POLL_MS, self._poll)
+
+    def cancel(self) -> None:
+        """取消进行中的生成 / 导出（已完成的部分保留）"""
+        if self._busy:
+            self._cancel.set()
+            self.info_var.set("正在取消…")
+
+    def _poll(self) -> None:
+        """取回后台事件，刷新进度、吞吐与可见行"""
+        self._poll_job = None
+        redraw = False
+        finished = None
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "encoded":
+                _, start, results = event
+                for offset, (record, error) in enumerate(results):
+                    self.symbols[start + offset] = record
+                    self.errors[start + offset] = error
+                    if error is not None:
+                        self.failed += 1
+                self.done += len(results)
+                redraw = True
+            elif event[0] == "exported":
+                self.done = event[1]
+            else:
+                finished = event
+
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        self.progress.config(value=self.done)
+        self.info_var.set(f"已处理 {self.done}/{int(float(self.progress['maximum']))}，失败 {self.failed}，"
+                          f"{self.done / elapsed:.0f} 行/秒")
+        if redraw:
+            self._redraw()
+        if finished is None:
+            self._poll_job = self.window.after(BATCH_POLL_MS, self._poll)
+            return
+
+        _, action, error = finished
+        self._busy = False
+        if error is not None:
+            self.info_var.set(f"批量{action}失败: {type(error).__name__}: {error}")
+            messagebox.showerror(f"批量{action}失败", f"{type(error).__name__}: {error}", parent=self.window)
+        else:
+            state = "已取消" if self._cancel.is_set() else "完成"
+            self.info_var.set(f"批量{action}{state}: {self.done} 行，失败 {self.failed}，"
+                              f"用时 {elapsed:.2f}s，{self.done / elapsed:.0f} 行/秒")
+
+    # ----- 虚拟列表 -----
+
+    def _on_scrollbar(self, *args) -> None:
+        self.canvas.yview(*args)
+
+    def _on_view_change(self, first: str, last: str) -> None:
+        self.scrollbar.set(first, last)
+        self._redraw()
+
+    def _on_mousewheel(self, event: tk.Event) -> None:
+        self.canvas.yview_scroll(-1 if event.delta > 0 else 1, "units")
+
+    def _thumbnail(self, index: int) -> Optional[tk.PhotoImage]:
+        record = self.symbols[index]
+        if record is None:
+            return None
+        image = self._thumbs.get(index)
+        if image is None:
+            symbol = MicroSymbol(record)
+            scale = max(1, BATCH_THUMB_PX // (symbol.size + 2))
+            image = tk.PhotoImage(data=base64.b64encode(png_bytes(symbol.matrix, scale, 1, "fast")))
+            self._thumbs[index] = image
+        else:
+            self._thumbs.move_to_end(index)
+        return image
+
+    def _redraw(self) -> None:
+        """只为当前可见的行绘制缩略图与文字"""
+        canvas = self.canvas
+        canvas.delete("row")
+        if not self.rows:
+            return
+        width = canvas.winfo_width()
+        first = max(0, int(canvas.canvasy(0)) // BATCH_ROW_HEIGHT)
+        last = min(len(self.rows), int(canvas.canvasy(canvas.winfo_height())) // BATCH_ROW_HEIGHT + 1)
+        font = (self.gui.mono_font_family, self.gui.preview_font_size)
+        for index in range(first, last):
+            top = index * BATCH_ROW_HEIGHT
+            middle = top + BATCH_ROW_HEIGHT // 2
+            if index % 2:
+                canvas.create_rectangle(0, top, width, top + BATCH_ROW_HEIGHT, fill="#f1f3f5", width=0, tags="row")
+            row = self.rows[index]
+            thumb = self._thumbnail(index)
+            if thumb is not None:
+                canvas.create_image(4 + BATCH_THUMB_PX // 2, middle, image=thumb, tags="row")
+            data = row.data if len(row.data) <= 32 else row.data[:31] + "…"
+            if self.errors[index] is not None:
+                status, color = self.errors[index], "#c92a2a"
+            elif self.symbols[index] is not None:
+                status, color = MicroSymbol(self.symbols[index]).designator, "#212529"
+            else:
+                status, color = "等待", "#868e96"
+            canvas.create_text(BATCH_THUMB_PX + 14, middle, anchor=tk.W, font=font, fill=color, tags="row",
+                               text=f"{row.line_no:>6}  {data:<33} {status}")
+        # 缩略图缓存保留约 4 屏
+        limit = max(64, (last - first) * 4)
+        while len(self._thumbs) > limit:
+            self._thumbs.popitem(last=False)
+
+    def close(self) -> None:
+        self._cancel.set()
+        self.gui._batch_window = None
+        self.window.destroy()
+
+
 def _set_windows_dpi_awareness() -> None:
     """在 Windows 上启用高 DPI 感知，减少系统缩放带来的模糊。"""
     if platform.system() != 'Windows':
@@ -0,0 +1,308 @@
+"""
+Micro QR Code 标签打印机光栅输出
+
+直接由模块矩阵生成打印机可接受的 1 位光栅，不经过 PNG 编码再由其他工具转换:
+- pbm: Netpbm 二进制位图 (P4)，1 为深色；多个 PBM 可直接首尾相接为一个流
+- zpl: Zebra ZPL II 标签 (^XA ^FO ^GFA ^FS ^XZ)，图形域使用 ZPL 的 ASCII 压缩：
+  十六进制行内的连续相同字符以重复计数字母 (G-Y = 1-19, g-z = 20-400) 表示，
+  行尾的 0 / F 以 ',' / '!' 省略，与上一行相同的行写为 ':'
+- epl: Eltron EPL2 标签 (N GW P1)，GW 命令的位图为原始二进制，0 为打印点
+
+每个不同的模块行只展开、打包一次；模块行在图像中重复 scale 次，ZPL 中重复的像素行只占 1 个字符。
+LabelStream 将大量标签按顺序连续写入一个文件或 TCP 套接字（如打印机的 9100 原始端口）。
+"""
+
+import re
+import socket
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from micro_qr_profile import span
+
+LABEL_FORMATS = ('pbm', 'zpl', 'epl')
+
+# 原始打印端口（未指定端口时使用）
+DEFAULT_PORT = 9100
+
+# 0/1 模块值 -> 像素位字符（深色模块为 1）
+_TO_BIT = bytes.maketrans(b'\x00\x01', b'01')
+
+# 长度 >= 2 的连续相同十六进制字符
+_HEX_RUN = re.compile(r'([0-9A-F])\1+')
+
+
+def raster_rows(matrix: Sequence[Iterable[int]], scale: int = 8,
+                border: int = 4) -> Tuple[int, int, List[Tuple[bytes, int]]]:
+    """
+    将模块矩阵展开为按字节打包的像素行（1 为深色，行内高位在前，行尾以 0 补齐到整字节）
+
+    Args:
+        matrix: 0/1 模块矩阵（不含静区）
+        scale: 每个模块的像素数
+        border: 静区宽度（模块数）
+
+    Returns:
+        (像素宽度, 像素高度, [(打包后的像素行, 连续重复次数)])；内容相同的相邻模块行合并，
+        相同内容的行为同一 bytes 对象
+
+    Raises:
+        ValueError: 参数无效
+    """
+    if scale < 1 or border < 0:
+        raise ValueError('scale 必须 >= 1，border 必须 >= 0')
+    rows = [bytes(row) for row in matrix]
+    size = len(rows[0]) if rows else 0
+    width = (size + 2 * border) * scale
+    height = (len(rows) + 2 * border) * scale
+    row_bytes = (width + 7) // 8
+    pad = -width % 8
+    quiet = b'\x00' * border
+    blank = [b'\x00' * size] * border
+
+    packed: Dict[bytes, bytes] = {}
+    runs: List[Tuple[bytes, int]] = []
+    for row in blank + rows + blank:
+        line = packed.get(row)
+        if line is None:
+            bits = (quiet + row + quiet).translate(_TO_BIT)
+            if scale > 1:
+                # 每个模块展开为 scale 个像素位（'1' 先换为占位符，避免与展开后的 '0' 串混淆）
+                bits = bits.replace(b'1', b'x').replace(b'0', b'0' * scale).replace(b'x', b'1' * scale)
+            line = packed[row] = (int(bits, 2) << pad).to_bytes(row_bytes, 'big') if bits else b''
+        if runs and runs[-1][0] is line:
+            runs[-1] = (line, runs[-1][1] + scale)
+        else:
+            runs.append((line, scale))
+    return width, height, runs
+
+
+def pbm_bytes(matrix: Sequence[Iterable[int]], scale: int = 8, border: int = 4) -> bytes:
+    """
+    由模块矩阵生成二进制 PBM (P4)
+
+    Raises:
+        ValueError: 参数无效
+    """
+    width, height, runs = raster_rows(matrix, scale, border)
+    return b'P4\n%d %d\n' % (width, height) + b''.join(line * count for line, count in runs)
+
+
+def _repeat_count(n: int) -> str:
+    """ZPL 重复计数字母：z = 400，g-y = 20-380，G-Y = 1-19（多个字母相加）"""
+    high, low = divmod(n, 20)
+    prefix = 'z' * (high // 20)
+    if high % 20:
+        prefix += chr(ord('f') + high % 20)
+    if low:
+        prefix += chr(ord('F') + low)
+    return prefix
+
+
+@lru_cache(maxsize=4096)
+def _encode_run(run: str) -> str:
+    return _repeat_count(len(run)) + run[0]
+
+
+def _compress_run(match: 're.Match[str]') -> str:
+    return _encode_run(match.group(0))
+
+
+def zpl_compress(runs: Sequence[Tuple[bytes, int]]) -> str:
+    """
+    以 ZPL ASCII 压缩方式编码图形域数据
+
+    Args:
+        runs: raster_rows 返回的 [(打包后的像素行, 连续重复次数)]
+
+    Returns:
+        ^GFA 的数据部分
+    """
+    compressed: Dict[bytes, str] = {}
+    parts = []
+    for line, count in runs:
+        text = compressed.get(line)
+        if text is None:
+            hexrow = line.hex().upper()
+            stripped = hexrow.rstrip('0')
+            tail = ','
+            if len(stripped) == len(hexrow):
+                stripped = hexrow.rstrip('F')
+                tail = '!' if len(stripped) < len(hexrow) else ''
+            text = compressed[line] = _HEX_RUN.sub(_compress_run, stripped) + tail
+        parts.append(text + ':' * (count - 1))
+    return ''.join(parts)
+
+
+def zpl_bytes(matrix: Sequence[Iterable[int]], scale: int = 8, border: int = 4,
+              origin: Tuple[int, int] = (0, 0), compress: bool = True) -> bytes:
+    """
+    由模块矩阵生成一张 ZPL 标签
+
+    Args:
+        matrix: 0/1 模块矩阵（不含静区）
+        scale: 每个模块的打印点数
+        border: 静区宽度（模块数）
+        origin: 图形在标签上的位置 (x, y)，单位为打印点
+        compress: True 时使用 ZPL ASCII 压缩，否则为未压缩的十六进制
+
+    Returns:
+        ^XA ... ^XZ 标签（ASCII）
+
+    Raises:
+        ValueError: 参数无效
+    """
+    width, height, runs = raster_rows(matrix, scale, border)
+    row_bytes = (width + 7) // 8
+    total = row_bytes * height
+    if compress:
+        data = zpl_compress(runs)
+    else:
+        data = ''.join(line.hex().upper() * count for line, count in runs)
+    return (f'^XA^FO{origin[0]},{origin[1]}^GFA,{total},{total},{row_bytes},{data}^FS^XZ\n'
+            .encode('ascii'))
+
+
+def epl_bytes(matrix: Sequence[Iterable[int]], scale: int = 8, border: int = 4,
+              origin: Tuple[int, int] = (0, 0)) -> bytes:
+    """
+    由模块矩阵生成一张 EPL2 标签（清空缓冲区、GW 图形、打印 1 份）
+
+    Args:
+        matrix: 0/1 模块矩阵（不含静区）
+        scale: 每个模块的打印点数
+        border: 静区宽度（模块数）
+        origin: 图形在标签上的位置 (x, y)，单位为打印点
+
+    Raises:
+        ValueError: 参数无效
+    """
+    width, height, runs = raster_rows(matrix, scale, border)
+    row_bytes = (width + 7) // 8
+    # GW 的位图中 0 为打印点，整行取反（行尾补齐位随之变为 1，不打印）
+    mask = (1 << (row_bytes * 8)) - 1
+    inverted: Dict[bytes, bytes] = {}
+    parts = []
+    for line, count in runs:
+        flipped = inverted.get(line)
+        if flipped is None:
+            flipped = inverted[line] = (int.from_bytes(line, 'big') ^ mask).to_bytes(row_bytes, 'big')
+        parts.append(flipped * count)
+    header = b'\nN\nGW%d,%d,%d,%d,' % (origin[0], origin[1], row_bytes, height)
+    return header + b''.join(parts) + b'\nP1\n'
+
+
+def label_bytes(matrix: Sequence[Iterable[int]], kind: str, scale: int = 8, border: int = 4) -> bytes:
+    """
+    按格式生成标签
+
+    Raises:
+        ValueError: 格式或参数无效
+    """
+    if kind == 'pbm':
+        return pbm_bytes(matrix, scale, border)
+    if kind == 'zpl':
+        return zpl_bytes(matrix, scale, border)
+    if kind == 'epl':
+        return epl_bytes(matrix, scale, border)
+    raise ValueError(f"不支持的标签格式: {kind}（可选 {', '.join(LABEL_FORMATS)}）")
+
+
+def parse_target(target: str) -> Optional[Tuple[str, int]]:
+    """
+    解析输出目标
+
+    Returns:
+        tcp://主机[:端口] 时为 (主机, 端口)，否则为 None（文件路径）
+
+    Raises:
+        ValueError: 地址无效
+    """
+    if not target.startswith('tcp://'):
+        return None
+    parts = urlsplit(target)
+    try:
+        port = parts.port or DEFAULT_PORT
+    except ValueError as e:
+        raise ValueError(f'无效的端口: {target}') from e
+    if not parts.hostname or parts.path not in ('', '/'):
+        raise ValueError(f'无效的地址: {target}（格式为 tcp://主机[:端口]）')
+    return parts.hostname, port
+
+
+class LabelStream:
+    """
+    将标签按写入顺序连续输出到一个文件或 TCP 套接字
+
+    与 micro_qr_archive.ArchiveWriter 接口相同 (add / close / count)，可直接作为
+    run_batch / run_sequence 的 archive 参数；ordered 为 True 时批量生成按输入顺序写出。
+    """
+
+    ordered = True
+
+    def __init__(self, target: str, timeout: Optional[float] = 30.0, buffer_size: int = 64 * 1024):
+        """
+        Args:
+            target: 文件路径，或 tcp://主机[:端口]（默认端口 9100）
+            timeout: 连接与发送的超时秒数，None 表示不超时
+            buffer_size: 写缓冲区字节数
+
+        Raises:
+            ValueError: 地址无效
+            OSError: 无法打开文件或连接
+        """
+        self.target = target
+        self.count = 0
+        self.references = 0
+        self.bytes_out = 0
+        self._sock: Optional[socket.socket] = None
+        address = parse_target(target)
+        if address is None:
+            self._file = open(target, 'wb', buffering=buffer_size)
+        else:
+            self._sock = socket.create_connection(address, timeout=timeout)
+            self._file = self._sock.makefile('wb', buffering=buffer_size)
+
+    def add(self, name: str, payload: bytes) -> Dict[str, Any]:
+        """
+        写出一个标签
+
+        Returns:
+            {'name': 名称, 'offset': 在流中的偏移, 'size': 字节数}
+        """
+        if self._file is None:
+            raise ValueError('标签流已关闭')
+        with span('write'):
+            self._file.write(payload)
+        entry = {'name': name, 'offset': self.bytes_out, 'size': len(payload)}
+        self.bytes_out += len(payload)
+        self.count += 1
+        return entry
+
+    def close(self) -> None:
+        """刷新缓冲区并关闭（套接字先半关闭写方向，通知对端数据结束）"""
+        if self._file is None:
+            return
+        file, self._file = self._file, None
+        try:
+            file.close()
+            if self._sock is not None:
+                try:
+                    self._sock.shutdown(socket.SHUT_WR)
+                except OSError:
+                    pass
+        finally:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+    def __enter__(self) -> 'LabelStream':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_stream(target: str, timeout: Optional[float] = 30.0) -> LabelStream:
+    """打开标签流（同 LabelStream(target, timeout)）"""
+    return LabelStream(target, timeout)
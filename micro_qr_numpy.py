@@ -0,0 +1,225 @@
+"""
+Micro QR Code 批量矢量化编码（需要 numpy）
+
+在内置编码器 (micro_qr_encoder) 的基础上，将同一版本/容错等级的多个符号作为 NumPy
+数组整体处理：Reed-Solomon 纠错码、4 种掩码的边缘深色模块评分 (N×4)、掩码选择、
+数据模块放置与格式信息写入均一次完成。段编码（数据比特生成）仍逐条进行。
+
+结果与 micro_qr_encoder.encode 逐位一致。
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from micro_qr_encoder import (
+    CHAR_COUNT_BITS, FORMAT_INFO, MODE_INDICATOR, SYMBOL_INFO, SYMBOL_NUMBER, MicroCode,
+    _GF_EXP, _GF_LOG, _generator_poly, char_count, pad_codewords, plan_symbol, segment_bits,
+    to_bytes, version_tables,
+)
+from micro_qr_profile import span
+
+_EXP = np.array(_GF_EXP, dtype=np.int32)
+_LOG = np.array(_GF_LOG, dtype=np.int32)
+
+# 15 位格式信息 -> 16 个放置位置（第 7 位同时位于 (8, 8)，两处取值相同）
+_FORMAT_SLOTS = [(b + 1, 8, b) for b in range(8)] + [(8, 15 - b, b) for b in range(7, 15)]
+_FORMAT_ROWS = np.array([r for r, _, _ in _FORMAT_SLOTS], dtype=np.intp)
+_FORMAT_COLS = np.array([c for _, c, _ in _FORMAT_SLOTS], dtype=np.intp)
+_FORMAT_BITS = np.array([[(info >> b) & 1 for _, _, b in _FORMAT_SLOTS] for info in FORMAT_INFO],
+                        dtype=np.uint8)
+
+
+class _VersionArrays(NamedTuple):
+    size: int
+    template: np.ndarray
+    rows: np.ndarray
+    cols: np.ndarray
+    masks: np.ndarray
+    right_edge: np.ndarray
+    bottom_edge: np.ndarray
+
+
+_ARRAYS: Dict[int, _VersionArrays] = {}
+
+
+def version_arrays(version: int) -> _VersionArrays:
+    """返回（并缓存）版本的模板、放置坐标、4×L 掩码矩阵与边缘模块下标"""
+    arrays = _ARRAYS.get(version)
+    if arrays is not None:
+        return arrays
+    tables = version_tables(version)
+    size = tables.size
+    rows = np.array([i for i, _ in tables.positions], dtype=np.intp)
+    cols = np.array([j for _, j in tables.positions], dtype=np.intp)
+    length = len(tables.positions)
+    masks = np.array([[(bits >> (length - 1 - k)) & 1 for k in range(length)] for bits in tables.mask_bits],
+                     dtype=np.uint8)
+    arrays = _VersionArrays(
+        size,
+        np.array([list(row) for row in tables.template], dtype=np.uint8),
+        rows,
+        cols,
+        masks,
+        np.flatnonzero((cols == size - 1) & (rows > 0)),
+        np.flatnonzero((rows == size - 1) & (cols > 0)),
+    )
+    _ARRAYS[version] = arrays
+    return arrays
+
+
+def rs_remainder_batch(data: np.ndarray, num_ec: int) -> np.ndarray:
+    """
+    对 N 组数据码字同时计算 Reed-Solomon 纠错码
+
+    Args:
+        data: N×K uint8 数据码字
+        num_ec: 纠错码字数
+
+    Returns:
+        N×num_ec uint8 纠错码字
+    """
+    gen = np.array(_generator_poly(num_ec), dtype=np.int32)
+    rem = np.zeros((data.shape[0], num_ec), dtype=np.int32)
+    for k in range(data.shape[1]):
+        coef = data[:, k].astype(np.int32) ^ rem[:, 0]
+        rem[:, :-1] = rem[:, 1:]
+        rem[:, -1] = 0
+        nonzero = coef != 0
+        if nonzero.any():
+            terms = _EXP[_LOG[coef[nonzero]][:, None] + gen[None, :]]
+            rem[nonzero] ^= terms
+    return rem.astype(np.uint8)
+
+
+def final_bits_batch(data: np.ndarray, version: int, error: Optional[str]) -> np.ndarray:
+    """返回 N×L 的最终比特矩阵（数据码字 + 纠错码字）"""
+    ec = rs_remainder_batch(data, SYMBOL_INFO[(version, error)][2])
+    data_bits = np.unpackbits(data, axis=1)
+    if version in (1, 3):
+        # 最后一个数据码字只取高 4 位
+        data_bits = data_bits[:, :-4]
+    return np.concatenate([data_bits, np.unpackbits(ec, axis=1)], axis=1)
+
+
+def evaluate_masks_batch(bits: np.ndarray, version: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    对 N 个符号同时评估 4 种掩码
+
+    Args:
+        bits: N×L 未掩码的比特矩阵
+        version: 版本 (1-4)
+
+    Returns:
+        (N×4×L 掩码后比特, N×4 分数)
+    """
+    arrays = version_arrays(version)
+    masked = bits[:, None, :] ^ arrays.masks[None, :, :]
+    sum1 = masked[:, :, arrays.right_edge].sum(axis=2, dtype=np.int32)
+    sum2 = masked[:, :, arrays.bottom_edge].sum(axis=2, dtype=np.int32)
+    scores = np.where(sum1 <= sum2, sum1 * 16 + sum2, sum2 * 16 + sum1)
+    return masked, scores
+
+
+def build_matrices(bits: np.ndarray, version: int, error: Optional[str],
+                   mask: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    选择掩码并生成 N 个符号的模块矩阵
+
+    Args:
+        bits: N×L 未掩码的比特矩阵
+        version: 版本 (1-4)
+        error: 容错等级
+        mask: 指定掩码，None 表示按评分选择（同分取编号最小者）
+
+    Returns:
+        (N×S×S uint8 模块矩阵, N 个掩码编号)
+    """
+    arrays = version_arrays(version)
+    n = bits.shape[0]
+    if mask is None:
+        with span('mask'):
+            masked, scores = evaluate_masks_batch(bits, version)
+            masks = np.argmax(scores, axis=1)
+            chosen = masked[np.arange(n), masks]
+    else:
+        masks = np.full(n, mask, dtype=np.intp)
+        chosen = bits ^ arrays.masks[mask]
+    matrices = np.repeat(arrays.template[None, :, :], n, axis=0)
+    matrices[:, arrays.rows, arrays.cols] = chosen
+    info_index = (SYMBOL_NUMBER[(version, error)] << 2) | masks
+    matrices[:, _FORMAT_ROWS, _FORMAT_COLS] = _FORMAT_BITS[info_index]
+    return matrices, masks
+
+
+class MatrixGroup(NamedTuple):
+    """同一版本 / 容错等级的一组符号"""
+    version: int
+    error: Optional[str]
+    indices: List[int]
+    modes: List[str]
+    matrices: np.ndarray
+    masks: np.ndarray
+
+
+def encode_groups(datas: Sequence[str], version: Optional[int] = None, error: Optional[str] = None,
+                  mask: Optional[int] = None, boost: bool = True,
+                  return_exceptions: bool = False) -> Tuple[List[MatrixGroup], Dict[int, ValueError]]:
+    """
+    批量编码并按版本 / 容错等级分组返回模块矩阵，不转换为逐行的 bytearray
+
+    Args:
+        datas: 要编码的文本数据序列
+        return_exceptions: True 时无法编码的条目收集到错误字典中，否则直接抛出
+
+    Returns:
+        (分组列表，每组含输入序号与 K×S×S uint8 模块矩阵, {输入序号: ValueError})
+    """
+    errors: Dict[int, ValueError] = {}
+    groups: Dict[Tuple[int, Optional[str]], List[Tuple[int, str, bytes]]] = {}
+    for index, data in enumerate(datas):
+        try:
+            raw = to_bytes(data)
+            ver, level, mode = plan_symbol(raw, version, error, boost)
+            value, nbits = segment_bits(raw, mode)
+            cci = CHAR_COUNT_BITS[mode][ver]
+            value |= ((MODE_INDICATOR[mode] << cci) | char_count(raw, mode)) << nbits
+            codewords = pad_codewords(value, nbits + ver - 1 + cci, ver, level)
+        except ValueError as e:
+            if not return_exceptions:
+                raise
+            errors[index] = e
+            continue
+        groups.setdefault((ver, level), []).append((index, mode, codewords))
+
+    result = []
+    for (ver, level), items in groups.items():
+        data = np.frombuffer(b''.join(cw for _, _, cw in items), dtype=np.uint8).reshape(len(items), -1)
+        matrices, masks = build_matrices(final_bits_batch(data, ver, level), ver, level, mask)
+        result.append(MatrixGroup(ver, level, [index for index, _, _ in items],
+                                  [mode for _, mode, _ in items], matrices, masks))
+    return result, errors
+
+
+def encode_batch(datas: Sequence[str], version: Optional[int] = None, error: Optional[str] = None,
+                 mask: Optional[int] = None, boost: bool = True,
+                 return_exceptions: bool = False) -> List[Union[MicroCode, ValueError]]:
+    """
+    批量编码 Micro QR Code，参数含义同 micro_qr_encoder.encode
+
+    Args:
+        datas: 要编码的文本数据序列
+        return_exceptions: True 时无法编码的条目以 ValueError 实例返回，否则直接抛出
+
+    Returns:
+        与输入顺序一致的 MicroCode 列表
+    """
+    groups, errors = encode_groups(datas, version, error, mask, boost, return_exceptions)
+    results: List[Union[MicroCode, ValueError, None]] = [None] * len(datas)
+    for index, e in errors.items():
+        results[index] = e
+    for group in groups:
+        for index, mode, matrix, chosen in zip(group.indices, group.modes, group.matrices, group.masks):
+            results[index] = MicroCode(tuple(bytearray(row) for row in matrix), group.version, group.error,
+                                       int(chosen), mode)
+    return results
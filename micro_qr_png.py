@@ -0,0 +1,169 @@
+"""
+Micro QR Code 专用 1 位 PNG 写出
+
+符号图像只有黑白两色，且每个模块行在图像中重复 scale 次。这里直接由模块矩阵生成
+位深 1 的灰度 PNG（IHDR + 单个 IDAT + IEND）:
+- 每个不同的模块行只打包一次扫描线（静区行、相同内容的行复用同一结果）
+- 与上一行相同的扫描线使用 Up 滤波，滤波后全为 0，zlib 几乎不产生额外输出
+- 压缩级别:
+  'fast'    吞吐优先，zlib 1 + Z_RLE；大尺寸图像中每个不同的扫描线片段（含重复行的全 0 片段）
+            只压缩一次，压缩结果按字节对齐的 deflate 块直接拼接复用，Adler-32 按片段合并，
+            耗时与 scale 几乎无关
+  'default' 整体以 zlib 6 压缩
+  'small'   整体以 zlib 9 压缩，体积优先
+  也可直接给出 0-9 的整数（整体压缩）
+
+输出的像素与 segno 的 PNG 一致（深色模块为黑 0，浅色与静区为白 1）。
+"""
+
+import struct
+import zlib
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# 以片段复用方式压缩的级别，及启用复用的最小原始数据量（更小的图像整体压缩反而更快）
+REUSE_LEVEL = 'fast'
+REUSE_MIN_BYTES = 48 * 1024
+
+# 压缩级别名称 -> (zlib 级别, 策略)
+LEVELS: Dict[str, Tuple[int, int]] = {
+    'fast': (1, zlib.Z_RLE),
+    'default': (6, zlib.Z_DEFAULT_STRATEGY),
+    'small': (9, zlib.Z_DEFAULT_STRATEGY),
+}
+
+_FILTER_NONE = b'\x00'
+_ADLER_BASE = 65521
+# zlib 流头（deflate、32K 窗口、最快压缩）与空的最终固定 Huffman 块
+_ZLIB_HEADER = b'\x78\x01'
+_FINAL_BLOCK = b'\x03\x00'
+_FILTER_UP = b'\x02'
+
+# 0/1 模块值 -> 像素位字符（深色模块为 0）
+_TO_PIXEL = bytes.maketrans(b'\x00\x01', b'10')
+
+Level = Union[str, int]
+
+
+def _chunk(name: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + name + data + struct.pack('>I', zlib.crc32(data, zlib.crc32(name)))
+
+
+def compression(level: Level) -> Tuple[int, int]:
+    """
+    解析压缩级别
+
+    Raises:
+        ValueError: 无效的级别
+    """
+    if isinstance(level, int) and not isinstance(level, bool) and 0 <= level <= 9:
+        return level, zlib.Z_DEFAULT_STRATEGY
+    if level in LEVELS:
+        return LEVELS[level]
+    raise ValueError(f"无效的 PNG 压缩级别: {level!r}（可选 {', '.join(LEVELS)} 或 0-9）")
+
+
+def png_bytes(matrix: Sequence[Iterable[int]], scale: int = 8, border: int = 4,
+              level: Level = 'default') -> bytes:
+    """
+    由模块矩阵生成 1 位灰度 PNG
+
+    Args:
+        matrix: 0/1 模块矩阵（不含静区），如 segno 的 qr.matrix 或 MicroCode.matrix
+        scale: 每个模块的像素数
+        border: 静区宽度（模块数）
+        level: 压缩级别，'fast' / 'default' / 'small' 或 0-9
+
+    Returns:
+        PNG 文件内容
+
+    Raises:
+        ValueError: 参数无效
+    """
+    if scale < 1 or border < 0:
+        raise ValueError('scale 必须 >= 1，border 必须 >= 0')
+    zlevel, strategy = compression(level)
+    rows = [bytes(row) for row in matrix]
+    size = len(rows[0]) if rows else 0
+    width = (size + 2 * border) * scale
+    height = (len(rows) + 2 * border) * scale
+    row_bytes = (width + 7) // 8
+    pad = -width % 8
+    quiet = b'\x00' * border
+    blank = [b'\x00' * size] * border
+
+    lines: Dict[bytes, bytes] = {}
+    up_line = _FILTER_UP + b'\x00' * row_bytes
+    repeat = up_line * (scale - 1)
+    same = up_line + repeat
+    # 原始数据按片段组织，内容相同的片段为同一对象，便于复用压缩结果
+    pieces: List[bytes] = []
+    previous = None
+    for row in blank + rows + blank:
+        line = lines.get(row)
+        if line is None:
+            # 每个模块展开为 scale 个像素位，整行由二进制字符串一次转为整数再打包
+            bits = (quiet + row + quiet).translate(_TO_PIXEL)
+            if scale > 1:
+                bits = b''.join(_repeat(bits, scale))
+            packed = (int(bits, 2) << pad).to_bytes(row_bytes, 'big')
+            line = lines[row] = _FILTER_NONE + packed
+        if line is previous:
+            pieces.append(same)
+        else:
+            pieces.append(line)
+            if repeat:
+                pieces.append(repeat)
+        previous = line
+
+    if level == REUSE_LEVEL and height * (row_bytes + 1) >= REUSE_MIN_BYTES:
+        idat = _deflate_pieces(pieces, zlevel, strategy)
+    else:
+        compressor = zlib.compressobj(zlevel, zlib.DEFLATED, 15, 9, strategy)
+        idat = compressor.compress(b''.join(pieces)) + compressor.flush()
+    return b''.join((
+        PNG_SIGNATURE,
+        _chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 1, 0, 0, 0, 0)),
+        _chunk(b'IDAT', idat),
+        _chunk(b'IEND', b''),
+    ))
+
+
+def _repeat(bits: bytes, scale: int) -> Iterable[bytes]:
+    one, zero = b'1' * scale, b'0' * scale
+    return (one if bit == 0x31 else zero for bit in bits)
+
+
+def _deflate_pieces(pieces: List[bytes], zlevel: int, strategy: int) -> bytes:
+    """
+    逐片段压缩并拼接为 zlib 流
+
+    每个不同的片段压缩后以 Z_FULL_FLUSH 结束：输出字节对齐且之后的数据不再引用之前的内容，
+    因此各片段的压缩结果可以原样重复拼接；校验和由各片段的 Adler-32 合并得到。
+    """
+    # 每次 Z_FULL_FLUSH 都会清空哈希表，使用最小的 memLevel 降低其开销
+    compressor = zlib.compressobj(zlevel, zlib.DEFLATED, -15, 1, strategy)
+    compressed: Dict[int, Tuple[bytes, int]] = {}
+    out = [_ZLIB_HEADER]
+    adler = 1
+    for piece in pieces:
+        item = compressed.get(id(piece))
+        if item is None:
+            item = compressed[id(piece)] = (
+                compressor.compress(piece) + compressor.flush(zlib.Z_FULL_FLUSH), zlib.adler32(piece))
+        out.append(item[0])
+        adler = _adler32_combine(adler, item[1], len(piece))
+    out.append(_FINAL_BLOCK)
+    out.append(adler.to_bytes(4, 'big'))
+    return b''.join(out)
+
+
+def _adler32_combine(adler1: int, adler2: int, len2: int) -> int:
+    """合并两段数据的 Adler-32（同 zlib 的 adler32_combine）"""
+    rem = len2 % _ADLER_BASE
+    sum1 = adler1 & 0xffff
+    sum2 = (rem * sum1) % _ADLER_BASE
+    sum1 = (sum1 + (adler2 & 0xffff) + _ADLER_BASE - 1) % _ADLER_BASE
+    sum2 = (sum2 + (adler1 >> 16) + (adler2 >> 16) + _ADLER_BASE - rem) % _ADLER_BASE
+    return sum1 | (sum2 << 16)
@@ -0,0 +1,226 @@
+"""
+Micro QR Code 分阶段计时
+
+在各处理阶段埋点（span），按阶段汇总次数、总耗时与分位数，用于定位批量任务的耗时分布:
+- parse:     命令行参数解析
+- config:    配置文件加载
+- encode:    数据编码（含 mask）
+- mask:      掩码评估与选择（仅内置引擎可单独计时，segno 引擎计入 encode）
+- rasterize: 渲染 PNG / SVG 内容
+- write:     写入文件或归档
+
+未启用时 span() 返回空上下文，开销可忽略。嵌入方可使用 profiling() 上下文管理器或注册监听回调:
+
+    from micro_qr_profile import profiling
+    with profiling(lambda stage, seconds: ...) as prof:
+        ...
+    print(prof.summary())
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+STAGES = ('parse', 'config', 'encode', 'mask', 'rasterize', 'write')
+
+# 每个阶段保留用于估算分位数的样本上限（蓄水池抽样）
+RESERVOIR_SIZE = 10000
+
+Listener = Callable[[str, float], None]
+
+
+class _StageStats:
+    """单个阶段的统计：精确的次数/总计/最值与抽样样本"""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self.samples: List[float] = []
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(seconds)
+        else:
+            slot = random.randrange(self.count)
+            if slot < RESERVOIR_SIZE:
+                self.samples[slot] = seconds
+
+
+class _Span:
+    __slots__ = ('profiler', 'stage', 'start')
+
+    def __init__(self, profiler: 'Profiler', stage: str):
+        self.profiler = profiler
+        self.stage = stage
+
+    def __enter__(self) -> '_Span':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.profiler.record(self.stage, time.perf_counter() - self.start)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """分阶段计时器（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, _StageStats] = {}
+        self._listeners: List[Listener] = []
+        self.enabled = False
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def span(self, stage: str) -> Any:
+        """返回计时上下文管理器；未启用时为空操作"""
+        return _Span(self, stage) if self.enabled else _NULL_SPAN
+
+    def record(self, stage: str, seconds: float) -> None:
+        """记录一次阶段耗时并通知监听者"""
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats()
+            stats.add(seconds)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(stage, seconds)
+
+    def add_listener(self, listener: Listener) -> None:
+        """注册回调 listener(stage, seconds)，每个 span 结束时调用"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Listener) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def export(self, reset: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        导出原始统计（可跨进程传递，再由 merge 合并）
+
+        Args:
+            reset: 导出后是否清空
+        """
+        with self._lock:
+            data = {
+                stage: {'count': s.count, 'total': s.total, 'min': s.min, 'max': s.max,
+                        'samples': list(s.samples)}
+                for stage, s in self._stages.items()
+            }
+            if reset:
+                self._stages.clear()
+        return data
+
+    def merge(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """合并 export 导出的统计（如工作进程的结果）"""
+        with self._lock:
+            for stage, item in data.items():
+                stats = self._stages.get(stage)
+                if stats is None:
+                    stats = self._stages[stage] = _StageStats()
+                stats.count += item['count']
+                stats.total += item['total']
+                stats.min = min(stats.min, item['min'])
+                stats.max = max(stats.max, item['max'])
+                samples = stats.samples + item['samples']
+                if len(samples) > RESERVOIR_SIZE:
+                    samples = random.sample(samples, RESERVOIR_SIZE)
+                stats.samples = samples
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        按阶段汇总
+
+        Returns:
+            阶段 -> {count, total_ms, mean_ms, min_ms, p50_ms, p90_ms, p99_ms, max_ms}，
+            已知阶段按处理顺序排列
+        """
+        with self._lock:
+            stages = dict(self._stages)
+        order = [s for s in STAGES if s in stages] + sorted(s for s in stages if s not in STAGES)
+        result = {}
+        for stage in order:
+            stats = stages[stage]
+            samples = sorted(stats.samples)
+
+            def pct(q: float) -> float:
+                return samples[min(len(samples) - 1, round(q * (len(samples) - 1)))] * 1000
+
+            result[stage] = {
+                'count': stats.count,
+                'total_ms': stats.total * 1000,
+                'mean_ms': stats.total / stats.count * 1000,
+                'min_ms': stats.min * 1000,
+                'p50_ms': pct(0.50),
+                'p90_ms': pct(0.90),
+                'p99_ms': pct(0.99),
+                'max_ms': stats.max * 1000,
+            }
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+
+# 全局计时器实例
+profiler = Profiler()
+
+
+def span(stage: str) -> Any:
+    """全局计时器的 span，未启用时几乎无开销"""
+    return _Span(profiler, stage) if profiler.enabled else _NULL_SPAN
+
+
+@contextmanager
+def profiling(listener: Optional[Listener] = None, reset: bool = True) -> Iterator[Profiler]:
+    """
+    在 with 块内启用全局计时器
+
+    Args:
+        listener: 可选回调 listener(stage, seconds)
+        reset: 进入时是否清空之前的统计
+    """
+    was_enabled = profiler.enabled
+    if reset:
+        profiler.reset()
+    if listener is not None:
+        profiler.add_listener(listener)
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        if not was_enabled:
+            profiler.disable()
+        if listener is not None:
+            profiler.remove_listener(listener)
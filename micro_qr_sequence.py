@@ -0,0 +1,234 @@
+"""
+Micro QR Code 序列号增量编码
+
+前缀 + 递增计数器（如 A0000001…A0999999）的数据除计数器外完全相同，长度相同的条目
+版本、容错等级、模式与头部比特都一致。SequenceEncoder 对每种长度只规划一次，并预先计算:
+- 首个条目的数据码字、纠错码字与最终比特流（作为基准）
+- 每个数据码字位置上各字节值对纠错码字的贡献（micro_qr_encoder.rs_tables）
+- 比特流每 8 位片段的各取值在模块矩阵中的位置（整个矩阵用一个整数表示）
+- 4 种掩码下的基准矩阵：功能图形 + 格式信息 + 基准比特流与掩码图形的放置结果
+
+之后每个条目只需生成数据比特，与基准码字求异或差，按变化的码字查表得到纠错码字的变化量，
+评估 4 种掩码，再把比特流的变化量按片段查表异或到基准矩阵上。结果与 micro_qr_encoder.encode
+逐位一致，可直接得到位打包的 MicroSymbol。
+"""
+
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from micro_qr_encoder import (
+    CHAR_COUNT_BITS, FORMAT_INFO, MODE_INDICATOR, MODES, SYMBOL_INFO, SYMBOL_NUMBER, MicroCode,
+    char_count, find_mode, pad_codewords, plan_symbol, rs_remainder, rs_tables, segment_bits, to_bytes,
+    version_tables,
+)
+from micro_qr_profile import span
+from micro_qr_symbol import MicroSymbol
+
+# 0/1 字符转为 0/1 字节
+_FROM_ASCII = bytes.maketrans(b'01', b'\x00\x01')
+
+
+class _LengthPlan(NamedTuple):
+    """同一数据长度的条目共用的预计算结果"""
+    version: int
+    error: Optional[str]
+    mode: str
+    size: int
+    header: int
+    header_bits: int
+    base_data: int
+    base_ec: int
+    base_bits: int
+    # ec_tables[k][b]: 第 k 个数据码字异或 b 时纠错码字的变化量
+    ec_tables: Tuple[Tuple[int, ...], ...]
+    # place_tables[c][v]: 比特流第 c 个 8 位片段（自低位起）取值 v 时的模块矩阵整数
+    place_tables: Tuple[Tuple[int, ...], ...]
+    # 各掩码下基准比特流的完整矩阵整数
+    base_matrices: Tuple[int, ...]
+    symbol_headers: Tuple[int, ...]
+    num_ec: int
+    right_edge: int
+    bottom_edge: int
+    # 各掩码图形在右 / 下边缘上的比特
+    mask_edges: Tuple[Tuple[int, int], ...]
+
+
+def _expand(basis: List[int]) -> Tuple[int, ...]:
+    """由 8 个单比特的线性贡献展开 256 个字节值的贡献（basis[j] 对应 1 << j）"""
+    table = [0] * 256
+    for value in range(1, 256):
+        low = value & -value
+        table[value] = table[value ^ low] ^ basis[low.bit_length() - 1]
+    return tuple(table)
+
+
+class SequenceEncoder:
+    """前缀 + 定宽计数器的增量编码器"""
+
+    def __init__(self, prefix: str = '', width: int = 0, version: Optional[int] = None,
+                 error: Optional[str] = 'L', boost: bool = True):
+        """
+        Args:
+            prefix: 固定前缀
+            width: 计数器的最小位数（不足时左侧补 0），0 表示不补
+            version: 指定版本 (1-4)，None 表示自动选择
+            error: 容错等级，None 表示允许 M1
+            boost: 是否在同一版本内自动提升容错等级
+
+        Raises:
+            ValueError: 参数无效
+        """
+        if width < 0:
+            raise ValueError(f'无效的计数器位数: {width}')
+        self.prefix = prefix
+        self.width = width
+        self.version = version
+        self.error = error
+        self.boost = boost
+        self._prefix_bytes = to_bytes(prefix)
+        self._plans: Dict[int, _LengthPlan] = {}
+
+    def data(self, number: int) -> str:
+        """返回编号对应的数据文本"""
+        if number < 0:
+            raise ValueError(f'序号不能为负数: {number}')
+        return f'{self.prefix}{number:0{self.width}d}'
+
+    def _plan(self, raw: bytes) -> _LengthPlan:
+        """为该长度规划版本并预计算查找表"""
+        version, error, mode = plan_symbol(raw, self.version, self.error, self.boost)
+        if find_mode(raw) != mode:
+            # 指定的版本不支持最紧凑的模式时 plan_symbol 已报错，这里只防御前缀导致的模式变化
+            raise ValueError(f'无法确定序列的编码模式: {raw!r}')
+        tables = version_tables(version)
+        capacity, num_data, num_ec = SYMBOL_INFO[(version, error)]
+        cci = CHAR_COUNT_BITS[mode][version]
+        header = (MODE_INDICATOR[mode] << cci) | char_count(raw, mode)
+        header_bits = version - 1 + cci
+
+        value, nbits = segment_bits(raw, mode)
+        base = pad_codewords(value | (header << nbits), nbits + header_bits, version, error)
+        base_ec = int.from_bytes(rs_remainder(base, num_ec), 'big')
+        ec_tables = rs_tables(num_data, num_ec)
+
+        size = tables.size
+        count = len(tables.positions)
+        # 比特流最高位对应放置顺序中的第一个位置
+        module_bits = [1 << (size * size - 1 - (i * size + j)) for i, j in tables.positions]
+        place_tables = []
+        for c in range((count + 7) // 8):
+            basis = [module_bits[count - 1 - (8 * c + j)] if 8 * c + j < count else 0 for j in range(8)]
+            place_tables.append(_expand(basis))
+
+        template = int(b''.join(tables.template).translate(bytes.maketrans(b'\x00\x01', b'01')), 2)
+        base_bits = self._stream(int.from_bytes(base, 'big'), base_ec, version, num_ec)
+        base_matrices = []
+        symbol_headers = []
+        for mask in range(4):
+            matrix = template ^ self._place(place_tables, base_bits ^ tables.mask_bits[mask])
+            info = FORMAT_INFO[(SYMBOL_NUMBER[(version, error)] << 2) | mask]
+            for i in range(8):
+                if (info >> i) & 1:
+                    matrix |= 1 << (size * size - 1 - ((i + 1) * size + 8))
+                if (info >> (14 - i)) & 1:
+                    matrix |= 1 << (size * size - 1 - (8 * size + i + 1))
+            base_matrices.append(matrix)
+            symbol_headers.append(SYMBOL_NUMBER[(version, error)] | (mask << 3) | (MODES.index(mode) << 5))
+        return _LengthPlan(version, error, mode, size, header, header_bits, int.from_bytes(base, 'big'),
+                           base_ec, base_bits, ec_tables, tuple(place_tables), tuple(base_matrices),
+                           tuple(symbol_headers), num_ec, tables.right_edge, tables.bottom_edge,
+                           tuple((m & tables.right_edge, m & tables.bottom_edge) for m in tables.mask_bits))
+
+    @staticmethod
+    def _stream(data: int, ec: int, version: int, num_ec: int) -> int:
+        """数据码字与纠错码字拼接为最终比特流（同 micro_qr_encoder.final_bits）"""
+        if version in (1, 3):
+            # 最后一个数据码字只取高 4 位
+            data >>= 4
+        return (data << (num_ec * 8)) | ec
+
+    @staticmethod
+    def _place(place_tables: Tuple[Tuple[int, ...], ...], stream: int) -> int:
+        matrix = 0
+        c = 0
+        while stream:
+            chunk = stream & 0xff
+            if chunk:
+                matrix ^= place_tables[c][chunk]
+            stream >>= 8
+            c += 1
+        return matrix
+
+    def _encode(self, number: int) -> Tuple[_LengthPlan, int, int]:
+        """
+        Returns:
+            (长度规划, 选定的掩码, 模块矩阵整数)
+        """
+        raw = self._prefix_bytes + self.data(number)[len(self.prefix):].encode('ascii')
+        plan = self._plans.get(len(raw))
+        if plan is None:
+            plan = self._plans[len(raw)] = self._plan(raw)
+        version = plan.version
+        value, nbits = segment_bits(raw, plan.mode)
+        data = pad_codewords(value | (plan.header << nbits), nbits + plan.header_bits, version, plan.error)
+        value = int.from_bytes(data, 'big')
+        diff = value ^ plan.base_data
+        ec = plan.base_ec
+        if diff:
+            ec_tables = plan.ec_tables
+            for k, byte in enumerate(diff.to_bytes(len(data), 'big')):
+                if byte:
+                    ec ^= ec_tables[k][byte]
+        bits = self._stream(value, ec, version, plan.num_ec)
+        # 同 micro_qr_encoder.evaluate_masks / best_mask，边缘比特只提取一次
+        right = bits & plan.right_edge
+        bottom = bits & plan.bottom_edge
+        mask = 0
+        best = -1
+        for m, (mask_right, mask_bottom) in enumerate(plan.mask_edges):
+            sum1 = bin(right ^ mask_right).count('1')
+            sum2 = bin(bottom ^ mask_bottom).count('1')
+            score = sum1 * 16 + sum2 if sum1 <= sum2 else sum2 * 16 + sum1
+            if score > best:
+                mask, best = m, score
+        return plan, mask, plan.base_matrices[mask] ^ self._place(plan.place_tables, bits ^ plan.base_bits)
+
+    def symbol(self, number: int) -> MicroSymbol:
+        """
+        编码一个序号，返回位打包的符号（最快的输出形式）
+
+        Raises:
+            ValueError: 数据无法编码
+        """
+        with span('encode'):
+            plan, mask, matrix = self._encode(number)
+            count = plan.size * plan.size
+            pad = -count % 8
+            body = (matrix << pad).to_bytes((count + pad) // 8, 'big')
+            return MicroSymbol(bytes((plan.symbol_headers[mask],)) + body)
+
+    def encode(self, number: int) -> MicroCode:
+        """
+        编码一个序号，返回与 micro_qr_encoder.encode 相同的 MicroCode
+
+        Raises:
+            ValueError: 数据无法编码
+        """
+        with span('encode'):
+            plan, mask, matrix = self._encode(number)
+            size = plan.size
+            flat = format(matrix, f'0{size * size}b').encode('ascii').translate(_FROM_ASCII)
+            rows = tuple(bytearray(flat[i:i + size]) for i in range(0, size * size, size))
+            return MicroCode(rows, plan.version, plan.error, mask, plan.mode)
+
+
+def iter_sequence(prefix: str, start: int, count: int, width: int = 0, version: Optional[int] = None,
+                  error: Optional[str] = 'L') -> Iterator[Tuple[str, MicroSymbol]]:
+    """
+    依次产出 (数据, 符号)
+
+    Raises:
+        ValueError: 参数无效或某个序号无法编码
+    """
+    encoder = SequenceEncoder(prefix, width, version, error)
+    for number in range(start, start + count):
+        yield encoder.data(number), encoder.symbol(number)
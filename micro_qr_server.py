@@ -0,0 +1,488 @@
+"""
+Micro QR Code HTTP 渲染服务
+
+仅依赖标准库的 asyncio HTTP/1.1 服务，常驻进程避免每个标签都启动一次 CLI:
+- GET  /qr?data=...&format=png|svg&scale=&border=&version=&error=   返回单个图像
+- POST /batch   JSON 请求体，批量返回结果（PNG 以 base64 编码）
+- GET  /metrics 各路由的延迟直方图与分位数
+- GET  /health  健康检查
+
+编码渲染属于 CPU 密集任务，交给进程池执行；请求在很短的时间窗口内合并为微批次
+再提交，以减少高负载下的进程间通信次数。
+
+启动: python micro_qr_generator.py serve --port 8080
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple, Union
+from urllib.parse import parse_qs, urlsplit
+
+from config import config
+from micro_qr_generator import ENGINES
+
+CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# 请求体大小上限
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+# 单个 /batch 请求的条目上限
+MAX_BATCH_ITEMS = 10000
+
+_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error',
+}
+
+# 直方图按路由统计；未知路径归入 other，避免任意路径撑大统计表
+ROUTES = ('/qr', '/batch', '/metrics', '/health')
+
+
+class RenderJob(NamedTuple):
+    """单个渲染任务"""
+    data: str
+    version: Optional[int] = None
+    error_correction: Optional[str] = 'L'
+    fmt: str = 'png'
+    scale: int = 8
+    border: int = 4
+
+
+class HTTPError(Exception):
+    """以指定状态码返回给客户端的错误"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def render_jobs(jobs: List[RenderJob], engine: str = 'segno') -> List[Union[bytes, str]]:
+    """
+    在工作进程中渲染一个微批次
+
+    Returns:
+        与 jobs 对应的结果列表：成功为文件内容 (bytes)，失败为错误信息 (str)
+    """
+    from micro_qr_cache import render_cache
+
+    results: List[Union[bytes, str]] = []
+    for job in jobs:
+        try:
+            results.append(render_cache.render(job.data, job.version, job.error_correction,
+                                               job.scale, job.border, job.fmt, engine))
+        except ValueError as e:
+            results.append(f'{type(e).__name__}: {e}')
+    return results
+
+
+class LatencyHistogram:
+    """按路由统计的延迟直方图（桶上界单位为毫秒）"""
+
+    BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, route: str, seconds: float) -> None:
+        entry = self._routes.get(route)
+        if entry is None:
+            entry = self._routes[route] = {
+                'count': 0, 'sum_ms': 0.0, 'max_ms': 0.0,
+                'buckets': [0] * (len(self.BUCKETS_MS) + 1),
+            }
+        ms = seconds * 1000.0
+        entry['count'] += 1
+        entry['sum_ms'] += ms
+        entry['max_ms'] = max(entry['max_ms'], ms)
+        for i, bound in enumerate(self.BUCKETS_MS):
+            if ms <= bound:
+                entry['buckets'][i] += 1
+                break
+        else:
+            entry['buckets'][-1] += 1
+
+    def _percentile(self, entry: Dict[str, Any], q: float) -> float:
+        """以所在桶的上界估算分位数"""
+        target = q * entry['count']
+        seen = 0
+        for i, count in enumerate(entry['buckets']):
+            seen += count
+            if seen >= target and count:
+                return self.BUCKETS_MS[i] if i < len(self.BUCKETS_MS) else entry['max_ms']
+        return entry['max_ms']
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回可 JSON 序列化的统计快照"""
+        routes = {}
+        for route, entry in self._routes.items():
+            labels = [f'le_{b}' for b in self.BUCKETS_MS] + ['le_inf']
+            routes[route] = {
+                'count': entry['count'],
+                'mean_ms': entry['sum_ms'] / entry['count'] if entry['count'] else 0.0,
+                'max_ms': entry['max_ms'],
+                'p50_ms': self._percentile(entry, 0.50),
+                'p95_ms': self._percentile(entry, 0.95),
+                'p99_ms': self._percentile(entry, 0.99),
+                'buckets': dict(zip(labels, entry['buckets'])),
+            }
+        return {'buckets_ms': list(self.BUCKETS_MS), 'routes': routes}
+
+
+class MicroBatcher:
+    """将短时间窗口内到达的渲染请求合并后提交到执行器"""
+
+    def __init__(self, executor: Executor, engine: str = 'segno', window: float = 0.002,
+                 max_batch: int = 64, max_inflight: int = 4):
+        """
+        Args:
+            executor: 执行渲染的进程池/线程池
+            engine: 编码引擎
+            window: 收集微批次的最长等待时间（秒）
+            max_batch: 单个微批次的最大任务数
+            max_inflight: 同时提交到执行器的微批次上限
+        """
+        self.executor = executor
+        self.engine = engine
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: "asyncio.Queue[Tuple[RenderJob, asyncio.Future]]" = asyncio.Queue()
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._collector: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.jobs = 0
+
+    def start(self) -> None:
+        self._collector = asyncio.ensure_future(self._collect())
+
+    async def stop(self) -> None:
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, jobs: List[RenderJob]) -> List[Union[bytes, str]]:
+        """提交若干任务并等待全部完成"""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for job in jobs:
+            future = loop.create_future()
+            self._queue.put_nowait((job, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+            await self._slots.acquire()
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[RenderJob, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            jobs = [job for job, _ in batch]
+            results = await loop.run_in_executor(self.executor, render_jobs, jobs, self.engine)
+            self.batches += 1
+            self.jobs += len(jobs)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+
+def _int_param(value: Any, name: str, low: int, high: int, default: Optional[int]) -> Optional[int]:
+    if value is None or value == '':
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f'参数 {name} 必须为整数')
+    if not low <= number <= high:
+        raise HTTPError(400, f'参数 {name} 超出范围 {low}-{high}')
+    return number
+
+
+def parse_job(params: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None) -> RenderJob:
+    """
+    由查询参数或 JSON 对象构造渲染任务
+
+    Raises:
+        HTTPError: 参数缺失或无效
+    """
+    merged = dict(defaults or {})
+    merged.update({k: v for k, v in params.items() if v is not None})
+    data = merged.get('data')
+    if not isinstance(data, str) or not data:
+        raise HTTPError(400, '缺少参数 data')
+    fmt = str(merged.get('format', 'png')).lower()
+    if fmt not in CONTENT_TYPES:
+        raise HTTPError(400, f'不支持的格式: {fmt}')
+    error = merged.get('error_correction', merged.get('error', 'L'))
+    if error is not None:
+        error = str(error).upper()
+        if error not in ('L', 'M', 'Q', 'H'):
+            raise HTTPError(400, f'无效的容错等级: {error}')
+    version = merged.get('version')
+    if isinstance(version, str) and version.upper().startswith('M'):
+        version = version[1:]
+    return RenderJob(
+        data,
+        _int_param(version, 'version', 1, 4, None),
+        error,
+        fmt,
+        _int_param(merged.get('scale'), 'scale', 1, 100, 8),
+        _int_param(merged.get('border'), 'border', 0, 20, 4),
+    )
+
+
+class MicroQRServer:
+    """HTTP 协议处理与路由"""
+
+    def __init__(self, batcher: MicroBatcher):
+        self.batcher = batcher
+        self.histogram = LatencyHistogram()
+        self.defaults: Dict[str, Any] = {}
+        self.apply_config()
+
+    def apply_config(self, changed: Optional[Set[str]] = None) -> None:
+        """从配置的 server 段读取默认渲染参数（作为配置变更回调时 changed 为变化的键）"""
+        if changed is not None and not any(key.startswith('server.') for key in changed):
+            return
+        self.defaults = {key: config.get(f'server.{key}') for key in ('format', 'scale', 'border', 'error_correction')}
+        if changed is not None:
+            print(f"已应用新的服务默认参数: {self.defaults}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """处理一个连接（支持 HTTP/1.1 keep-alive）"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                start = time.perf_counter()
+                keep_alive, route = await self._handle_request(request_line, reader, writer)
+                await writer.drain()
+                self.histogram.record(route, time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request_line: bytes, reader: asyncio.StreamReader,
+                              writer: asyncio.StreamWriter) -> Tuple[bool, str]:
+        route = 'invalid'
+        keep_alive = False
+        try:
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                raise HTTPError(400, '无效的请求行')
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            connection = headers.get('connection', '').lower()
+            keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+            length = _content_length(headers.get('content-length'), method)
+            if length is None:
+                # 无法确定请求体边界，响应后关闭连接
+                keep_alive = False
+                raise HTTPError(400, '缺少或无效的 Content-Length')
+            if length > MAX_BODY_BYTES:
+                keep_alive = False
+                raise HTTPError(413, '请求体过大')
+            body = await reader.readexactly(length) if length else b''
+            url = urlsplit(target)
+            route = url.path if url.path in ROUTES else 'other'
+            status, content_type, payload = await self._dispatch(method, url.path, url.query, body)
+        except HTTPError as e:
+            status, content_type, payload = e.status, 'application/json', _json_bytes({'error': str(e)})
+        except Exception as e:
+            status, content_type, payload = 500, 'application/json', _json_bytes({'error': f'{type(e).__name__}: {e}'})
+        head = (f'HTTP/1.1 {status} {_REASONS.get(status, "")}\r\n'
+                f'Content-Type: {content_type}\r\n'
+                f'Content-Length: {len(payload)}\r\n'
+                f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+        writer.write(head.encode('latin-1') + payload)
+        return keep_alive, route
+
+    async def _dispatch(self, method: str, path: str, query: str, body: bytes) -> Tuple[int, str, bytes]:
+        if path == '/qr':
+            if method != 'GET':
+                raise HTTPError(405, '仅支持 GET')
+            params = {k: v[-1] for k, v in parse_qs(query, keep_blank_values=True).items()}
+            job = parse_job(params, self.defaults)
+            result = (await self.batcher.submit([job]))[0]
+            if isinstance(result, str):
+                raise HTTPError(400, result)
+            return 200, CONTENT_TYPES[job.fmt], result
+        if path == '/batch':
+            if method != 'POST':
+                raise HTTPError(405, '仅支持 POST')
+            return 200, 'application/json', _json_bytes(await self._batch(body))
+        if path == '/metrics':
+            snapshot = self.histogram.snapshot()
+            snapshot['micro_batches'] = {'batches': self.batcher.batches, 'jobs': self.batcher.jobs}
+            return 200, 'application/json', _json_bytes(snapshot)
+        if path == '/health':
+            return 200, 'application/json', _json_bytes({'status': 'ok'})
+        raise HTTPError(404, f'未知路径: {path}')
+
+    async def _batch(self, body: bytes) -> Dict[str, Any]:
+        """
+        请求体: {"items": [...], "format": "png", "scale": 8, "border": 4}
+        或直接为条目数组；条目为字符串或含 data / key / version / error_correction 的对象
+        """
+        try:
+            request = json.loads(body.decode('utf-8') or 'null')
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HTTPError(400, f'无效的 JSON: {e}')
+        if isinstance(request, list):
+            request = {'items': request}
+        if not isinstance(request, dict) or not isinstance(request.get('items'), list):
+            raise HTTPError(400, '请求体需包含 items 数组')
+        items = request['items']
+        if len(items) > MAX_BATCH_ITEMS:
+            raise HTTPError(413, f'单次最多 {MAX_BATCH_ITEMS} 条')
+        defaults = dict(self.defaults)
+        defaults.update({k: request[k] for k in ('format', 'scale', 'border', 'version', 'error_correction')
+                         if request.get(k) is not None})
+        keys, jobs, results = [], [], []
+        for index, item in enumerate(items):
+            if isinstance(item, str):
+                item = {'data': item}
+            if not isinstance(item, dict):
+                raise HTTPError(400, f'第 {index} 条不是对象或字符串')
+            keys.append(item.get('key', index))
+            jobs.append(parse_job(item, defaults))
+        for key, job, result in zip(keys, jobs, await self.batcher.submit(jobs)):
+            if isinstance(result, str):
+                results.append({'key': key, 'error': result})
+            elif job.fmt == 'svg':
+                results.append({'key': key, 'format': 'svg', 'data': result.decode('utf-8')})
+            else:
+                results.append({'key': key, 'format': 'png', 'data': base64.b64encode(result).decode('ascii')})
+        return {'results': results}
+
+
+def _content_length(value: Optional[str], method: str) -> Optional[int]:
+    """
+    解析 Content-Length
+
+    Returns:
+        请求体字节数；值无效或为负数、POST 请求缺少该头时为 None（GET 等缺少时视为 0）
+    """
+    if value is None:
+        return None if method == 'POST' else 0
+    # 只接受十进制数字，int() 会放过的 '+1'、'1_0'、全角数字等一律视为无效
+    if not (value.isascii() and value.isdigit()):
+        return None
+    return int(value)
+
+
+def _json_bytes(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8080, workers: Optional[int] = None,
+                engine: str = 'segno', window_ms: float = 2.0, max_batch: int = 64,
+                ready: Optional[asyncio.Event] = None, config_interval: float = 1.0) -> None:
+    """
+    启动服务并一直运行
+
+    Args:
+        host: 监听地址
+        port: 监听端口
+        workers: 渲染进程数，None 表示 CPU 核数，0 表示在线程池中渲染
+        engine: 编码引擎 ('segno' 或 'builtin')
+        window_ms: 微批次收集窗口（毫秒）
+        max_batch: 单个微批次的最大任务数
+        ready: 开始监听后置位的事件（供嵌入方等待）
+        config_interval: 检查配置文件变化的间隔（秒），默认参数变化后立即生效，无需重启
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    from micro_qr_cache import configure_render_cache
+
+    # 渲染缓存容量取配置 cache 段
+    if workers > 0:
+        executor: Executor = ProcessPoolExecutor(max_workers=workers, initializer=configure_render_cache)
+    else:
+        executor = ThreadPoolExecutor(1, initializer=configure_render_cache)
+    batcher = MicroBatcher(executor, engine, window_ms / 1000.0, max_batch, max(1, workers) * 2)
+    app = MicroQRServer(batcher)
+    config.subscribe(app.apply_config)
+    batcher.start()
+    watcher = asyncio.ensure_future(_watch_config(config_interval))
+    server = await asyncio.start_server(app.handle, host, port)
+    try:
+        addresses = ', '.join(str(sock.getsockname()[:2]) for sock in server.sockets)
+        print(f"Micro QR 服务已启动: {addresses}")
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+        config.unsubscribe(app.apply_config)
+        await batcher.stop()
+        executor.shutdown(wait=False)
+
+
+async def _watch_config(interval: float) -> None:
+    """定时检查配置文件（仅 stat，变化时才重新读取）"""
+    while True:
+        await asyncio.sleep(interval)
+        config.reload_if_changed()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """serve 子命令入口"""
+    parser = argparse.ArgumentParser(prog='micro_qr_generator.py serve',
+                                     description='启动 Micro QR Code HTTP 渲染服务')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址 (默认: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='监听端口 (默认: 8080)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='渲染进程数 (默认: CPU 核数，0 表示使用线程)')
+    parser.add_argument('--engine', choices=ENGINES, default='segno', help='编码引擎 (默认: segno)')
+    parser.add_argument('--batch-window-ms', type=float, default=2.0,
+                        help='微批次收集窗口，毫秒 (默认: 2)')
+    parser.add_argument('--max-batch', type=int, default=64, help='单个微批次最大任务数 (默认: 64)')
+    parser.add_argument('--config', metavar='FILE', default=None,
+                        help='配置文件路径，修改其 server 段后自动生效 (默认: micro_qr_config.json)')
+    args = parser.parse_args(argv)
+    if args.config:
+        config.config_file = args.config
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.engine,
+                          args.batch_window_ms, args.max_batch))
+    except KeyboardInterrupt:
+        pass
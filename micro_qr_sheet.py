@@ -0,0 +1,304 @@
+"""
+Micro QR Code 标签页 / 拼图合成（需要 numpy）
+
+将大量符号按网格排布到一张 PNG（或多页 PDF）上，可设置行列数、间距、页边距、
+页面尺寸与标签文字。符号由内置编码器批量生成模块矩阵，按尺寸分组后整体放大，
+再用 NumPy 花式索引一次性写入页面数组，不逐个粘贴 PIL 图像。
+"""
+
+import math
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+import micro_qr_numpy
+
+# 常用纸张尺寸（毫米，纵向）
+PAGE_SIZES_MM = {
+    'A4': (210.0, 297.0),
+    'A5': (148.0, 210.0),
+    'A6': (105.0, 148.0),
+    'LETTER': (215.9, 279.4),
+}
+
+
+class SheetLabel(NamedTuple):
+    """一个标签：编码数据、标签文字与编码参数"""
+    data: str
+    caption: Optional[str] = None
+    version: Optional[int] = None
+    error_correction: Optional[str] = 'L'
+
+
+class SheetLayout(NamedTuple):
+    """
+    排版参数（长度单位均为像素）
+
+    columns / rows 为 None 时：指定了 page_size 则按页面可容纳的最大数量排布，
+    否则生成单张近似正方形的拼图。
+    """
+    scale: int = 4
+    border: int = 2
+    spacing: int = 8
+    margin: int = 16
+    columns: Optional[int] = None
+    rows: Optional[int] = None
+    page_size: Optional[Tuple[int, int]] = None
+    caption: bool = False
+    font_size: int = 12
+
+
+def page_pixels(page: str, dpi: int = 300) -> Tuple[int, int]:
+    """
+    解析页面尺寸
+
+    Args:
+        page: 纸张名称 (A4, A5, A6, Letter，可加 -landscape 后缀) 或 "宽x高" 像素
+        dpi: 纸张名称换算为像素时使用的分辨率
+
+    Returns:
+        (宽, 高) 像素
+
+    Raises:
+        ValueError: 无法识别的页面尺寸
+    """
+    match = re.fullmatch(r'\s*(\d+)\s*[xX]\s*(\d+)\s*', page)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    name, _, orientation = page.upper().partition('-')
+    if name not in PAGE_SIZES_MM or orientation not in ('', 'LANDSCAPE', 'PORTRAIT'):
+        raise ValueError(f'无法识别的页面尺寸: {page} (可用: A4, A5, A6, Letter 或 宽x高)')
+    width, height = (round(mm / 25.4 * dpi) for mm in PAGE_SIZES_MM[name])
+    return (height, width) if orientation == 'LANDSCAPE' else (width, height)
+
+
+def encode_matrices(labels: Sequence[Optional[SheetLabel]],
+                    errors: Optional[Dict[int, str]] = None) -> List[Optional[np.ndarray]]:
+    """
+    批量编码标签，返回每个标签的模块矩阵 (S×S uint8，1 为深色)
+
+    Args:
+        labels: 标签序列，None 为占位条目
+        errors: 给出时无法编码的标签（及占位条目）矩阵为 None，错误信息按标签序号记入该字典；
+            为 None 时遇到无法编码的标签即抛出异常
+
+    Raises:
+        ValueError: 某个标签无法编码（errors 为 None 时，错误信息包含其序号）
+    """
+    groups: Dict[Tuple[Optional[int], Optional[str]], List[int]] = {}
+    for index, label in enumerate(labels):
+        if label is None:
+            if errors is None:
+                raise ValueError(f'第 {index + 1} 个标签为空')
+            errors[index] = '空条目'
+            continue
+        groups.setdefault((label.version, label.error_correction), []).append(index)
+    matrices: List[Optional[np.ndarray]] = [None] * len(labels)
+    for (version, error), indices in groups.items():
+        codes = micro_qr_numpy.encode_batch([labels[i].data for i in indices], version, error,
+                                            return_exceptions=True)
+        for index, code in zip(indices, codes):
+            if isinstance(code, ValueError):
+                if errors is None:
+                    raise ValueError(f'第 {index + 1} 个标签无法编码 ({labels[index].data!r}): {code}')
+                errors[index] = str(code)
+                continue
+            size = len(code.matrix)
+            matrices[index] = np.frombuffer(b''.join(code.matrix), dtype=np.uint8).reshape(size, size)
+    return matrices
+
+
+def _load_font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 的默认字体不支持指定字号
+        return ImageFont.load_default()
+
+
+class _Glyphs:
+    """按字符缓存字形灰度位图，标签文字直接以 numpy 合成到页面，避免逐个调用 ImageDraw.text"""
+
+    def __init__(self, font: ImageFont.ImageFont):
+        self.font = font
+        self._cache: Dict[str, Tuple[Optional[np.ndarray], int, int, float]] = {}
+
+    def get(self, char: str) -> Tuple[Optional[np.ndarray], int, int, float]:
+        """返回 (覆盖度位图, x 偏移, y 偏移, 步进宽度)"""
+        glyph = self._cache.get(char)
+        if glyph is None:
+            left, top, right, bottom = self.font.getbbox(char)
+            alpha = None
+            if right > left and bottom > top:
+                image = Image.new('L', (right - left, bottom - top), 0)
+                ImageDraw.Draw(image).text((-left, -top), char, fill=255, font=self.font)
+                alpha = np.asarray(image)
+            glyph = self._cache[char] = (alpha, left, top, self.font.getlength(char))
+        return glyph
+
+    def width(self, text: str) -> float:
+        return sum(self.get(char)[3] for char in text)
+
+    def fit(self, text: str, width: int) -> str:
+        """超出宽度的文字截断并加省略号"""
+        if self.width(text) <= width:
+            return text
+        while text and self.width(text + '…') > width:
+            text = text[:-1]
+        return text + '…'
+
+    def draw(self, canvas: np.ndarray, text: str, center_x: int, top: int) -> None:
+        """以 center_x 水平居中、top 为上沿，将黑色文字合成到灰度页面数组"""
+        x = center_x - self.width(text) / 2
+        for char in text:
+            alpha, dx, dy, advance = self.get(char)
+            if alpha is not None:
+                x0, y0 = max(0, round(x) + dx), max(0, top + dy)
+                region = canvas[y0:y0 + alpha.shape[0], x0:x0 + alpha.shape[1]]
+                np.minimum(region, 255 - alpha[:region.shape[0], :region.shape[1]], out=region)
+            x += advance
+
+
+def _grid(count: int, cell: Tuple[int, int], layout: SheetLayout) -> Tuple[int, int, Tuple[int, int]]:
+    """计算每页的列数、行数与页面像素尺寸"""
+    cell_w, cell_h = cell
+    pitch_w, pitch_h = cell_w + layout.spacing, cell_h + layout.spacing
+    if layout.page_size is not None:
+        width, height = layout.page_size
+        columns = layout.columns or (width - 2 * layout.margin + layout.spacing) // pitch_w
+        rows = layout.rows or (height - 2 * layout.margin + layout.spacing) // pitch_h
+        if columns < 1 or rows < 1 or (2 * layout.margin + columns * pitch_w - layout.spacing > width
+                                       or 2 * layout.margin + rows * pitch_h - layout.spacing > height):
+            raise ValueError(f'页面 {width}x{height} 放不下指定的网格，请减小 scale / spacing / margin')
+        return columns, rows, (width, height)
+    columns = layout.columns or max(1, math.ceil(math.sqrt(count)))
+    rows = layout.rows or max(1, math.ceil(count / columns))
+    return columns, rows, (2 * layout.margin + columns * pitch_w - layout.spacing,
+                           2 * layout.margin + rows * pitch_h - layout.spacing)
+
+
+def render_sheets(labels: Iterable[Union[str, SheetLabel, None]],
+                  layout: SheetLayout = SheetLayout(),
+                  errors: Optional[Dict[int, str]] = None) -> List[Image.Image]:
+    """
+    将标签排布为一页或多页灰度图像
+
+    Args:
+        labels: 字符串（无标签文字）或 SheetLabel 序列；None 为占位条目
+        layout: 排版参数
+        errors: 给出时无法编码的标签留空单元格（不绘制符号与文字），错误信息按标签序号记入该字典，
+            其余标签照常排布；为 None 时遇到无法编码的标签即抛出异常
+
+    Returns:
+        每页一个 'L' 模式图像
+
+    Raises:
+        ValueError: 排版参数无效、页面放不下网格，或标签无法编码（errors 为 None 时）
+    """
+    if layout.scale < 1 or layout.border < 0 or layout.spacing < 0 or layout.margin < 0:
+        raise ValueError('scale 必须 ≥ 1，border / spacing / margin 不能为负')
+    if (layout.columns is not None and layout.columns < 1) or (layout.rows is not None and layout.rows < 1):
+        raise ValueError('columns / rows 必须 ≥ 1')
+    labels = [SheetLabel(item) if isinstance(item, str) else item for item in labels]
+    if not labels:
+        return []
+    matrices = encode_matrices(labels, errors)
+
+    # 单元格按最大符号尺寸统一，较小的符号居中放置；全部无法编码时按 M1 的尺寸
+    largest = max((m.shape[0] for m in matrices if m is not None), default=11)
+    symbol_px = (largest + 2 * layout.border) * layout.scale
+    caption_px = layout.font_size + 4 if layout.caption else 0
+    cell_w, cell_h = symbol_px, symbol_px + caption_px
+    columns, rows, (width, height) = _grid(len(labels), (cell_w, cell_h), layout)
+    per_page = columns * rows
+    pitch_w, pitch_h = cell_w + layout.spacing, cell_h + layout.spacing
+    glyphs = _Glyphs(_load_font(layout.font_size)) if layout.caption else None
+
+    pages = []
+    for first in range(0, len(labels), per_page):
+        indices = np.arange(first, min(first + per_page, len(labels)))
+        slots = indices - first
+        origin_x = layout.margin + (slots % columns) * pitch_w
+        origin_y = layout.margin + (slots // columns) * pitch_h
+        # 网格区域视为 (行, 单元高, 列, 单元宽) 的四维视图，符号按 (行号, 列号) 成组写入
+        canvas = np.full((max(height, layout.margin + rows * pitch_h),
+                          max(width, layout.margin + columns * pitch_w)), 255, dtype=np.uint8)
+        grid = canvas[layout.margin:layout.margin + rows * pitch_h,
+                      layout.margin:layout.margin + columns * pitch_w].reshape(rows, pitch_h, columns, pitch_w)
+
+        # 无法编码的标签尺寸记为 0，其单元格留空
+        sizes = np.array([0 if matrices[i] is None else matrices[i].shape[0] for i in indices])
+        for size in np.unique(sizes[sizes > 0]):
+            members = np.flatnonzero(sizes == size)
+            stack = np.stack([matrices[indices[k]] for k in members])
+            stack = np.pad(stack, ((0, 0), (layout.border,) * 2, (layout.border,) * 2))
+            tiles = (1 - stack) * np.uint8(255)
+            tiles = tiles.repeat(layout.scale, axis=1).repeat(layout.scale, axis=2)
+            tile_px = tiles.shape[1]
+            offset = (symbol_px - tile_px) // 2
+            grid[slots[members] // columns, offset:offset + tile_px,
+                 slots[members] % columns, offset:offset + tile_px] = tiles
+
+        if glyphs is not None:
+            for k, index in enumerate(indices):
+                label = labels[index]
+                if matrices[index] is None:
+                    continue
+                text = label.caption if label.caption is not None else label.data
+                if text:
+                    glyphs.draw(canvas, glyphs.fit(text, cell_w),
+                                int(origin_x[k]) + cell_w // 2, int(origin_y[k]) + symbol_px + 2)
+        pages.append(Image.fromarray(canvas[:height, :width]))
+    return pages
+
+
+def save_sheets(pages: List[Image.Image], path: str, dpi: int = 300) -> List[str]:
+    """
+    保存标签页
+
+    .pdf 保存为一个多页 PDF；其他扩展名按 PNG 保存，多页时依次命名为 name-001.png、name-002.png ...
+
+    Returns:
+        写入的文件路径列表
+    """
+    if not pages:
+        return []
+    base, ext = os.path.splitext(path)
+    if ext.lower() == '.pdf':
+        pages[0].save(path, 'PDF', save_all=True, append_images=pages[1:], resolution=dpi)
+        return [path]
+    if len(pages) == 1:
+        pages[0].save(path, 'PNG', dpi=(dpi, dpi))
+        return [path]
+    paths = []
+    for number, page in enumerate(pages, 1):
+        page_path = f'{base}-{number:03d}{ext or ".png"}'
+        page.save(page_path, 'PNG', dpi=(dpi, dpi))
+        paths.append(page_path)
+    return paths
+
+
+def labels_from_rows(rows: Sequence,
+                     default_error: str = 'L') -> Tuple[List[Optional[SheetLabel]], Dict[int, str]]:
+    """
+    由批量输入行 (micro_qr_batch.BatchRow) 构造标签，标签文字为数据本身；参数无效的行以占位条目保留单元格
+
+    Returns:
+        (标签列表, {标签序号: 错误信息（含行号）})
+    """
+    from micro_qr_batch import row_params
+
+    labels: List[Optional[SheetLabel]] = []
+    errors: Dict[int, str] = {}
+    for index, row in enumerate(rows):
+        try:
+            version, error = row_params(row, default_error)
+        except ValueError as e:
+            errors[index] = f'第 {row.line_no} 行: {e}'
+            labels.append(None)
+            continue
+        labels.append(SheetLabel(row.data, row.data, version, error))
+    return labels, errors
@@ -0,0 +1,141 @@
+"""
+Micro QR Code 精简 SVG 写出
+
+面向大量内联到 HTML / 邮件的场景，直接由模块矩阵生成尽可能短的 SVG:
+- 每行相邻的深色模块合并为一段水平线（stroke 宽度即 1 个模块），段间使用相对 / 绝对移动中较短的一种
+- viewBox 以模块为单位并整体上移半个模块，路径坐标全为整数；缩放只体现在 width / height 上
+- 省略 XML 声明、class 与 transform 等可选内容
+- 寻像图形与顶行时序图形对同一版本固定不变，其路径片段按版本预先生成后直接拼接
+
+输出的深色模块与 segno 的 SVG 一致（浅色不绘制，背景透明）。
+"""
+
+from functools import lru_cache
+from typing import Iterable, List, Sequence, Tuple
+
+# 路径片段覆盖的固定区域：第 0 行整行（寻像图形 + 时序图形），第 1-6 行的前 8 列（寻像图形 + 分隔符）
+_FIXED_ROWS = 7
+_FIXED_COLS = 8
+
+# 数据 URI 中需要转义的字符（属性引号改为单引号，避免整体百分号编码）
+_URI_ESCAPES = str.maketrans({'"': "'", '#': '%23', '<': '%3C', '>': '%3E', '%': '%25', '\n': ' '})
+
+
+def _num(value: float) -> str:
+    """最短的数字表示: 4 -> '4'，-4.5 -> '-4.5'，0.5 -> '.5'"""
+    if value == int(value):
+        return str(int(value))
+    text = repr(value)
+    if text.startswith('0.'):
+        return text[1:]
+    if text.startswith('-0.'):
+        return '-' + text[2:]
+    return text
+
+
+def _runs(row: bytes, start: int) -> Iterable[Tuple[int, int]]:
+    """产出行内从 start 列开始的深色段 (起始列, 长度)"""
+    x = row.find(1, start)
+    while x != -1:
+        end = row.find(0, x)
+        if end == -1:
+            end = len(row)
+        yield x, end - x
+        x = row.find(1, end)
+
+
+class _PathWriter:
+    """按行追加深色段并生成路径命令，记录当前笔位置以使用相对移动"""
+
+    __slots__ = ('parts', 'x', 'y')
+
+    def __init__(self, x: int = 0, y: int = 0):
+        self.parts: List[str] = []
+        self.x = x
+        self.y = y
+
+    def row(self, y: int, row: bytes, start: int = 0) -> None:
+        parts = self.parts
+        for x, n in _runs(row, start):
+            relative = f'm{x - self.x} {y - self.y}'
+            absolute = f'M{x} {y}'
+            parts.append(absolute if not parts or len(absolute) < len(relative) else relative)
+            parts.append(f'h{n}')
+            self.x = x + n
+            self.y = y
+
+    def path(self) -> str:
+        return ''.join(self.parts)
+
+
+@lru_cache(maxsize=None)
+def _fixed_fragment(size: int) -> Tuple[str, int, int]:
+    """
+    生成版本固定区域的路径片段
+
+    Returns:
+        (路径, 结束时的笔位置 x, y)
+    """
+    finder = [b'\x01' * 7, b'\x01\x00\x00\x00\x00\x00\x01'] + [b'\x01\x00\x01\x01\x01\x00\x01'] * 3 + \
+             [b'\x01\x00\x00\x00\x00\x00\x01', b'\x01' * 7]
+    writer = _PathWriter()
+    # 第 0 行: 寻像图形、分隔符与时序图形（第 8 列起偶数列为深色）
+    writer.row(0, finder[0] + bytes(1) + bytes(x % 2 == 0 for x in range(8, size)))
+    for y in range(1, _FIXED_ROWS):
+        writer.row(y, finder[y] + bytes(1))
+    return writer.path(), writer.x, writer.y
+
+
+@lru_cache(maxsize=256)
+def _header(size: int, scale: int, border: int) -> str:
+    width = _num((size + 2 * border) * scale)
+    modules = size + 2 * border
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{width}" '
+            f'viewBox="{_num(-border)} {_num(-border - 0.5)} {modules} {modules}">'
+            f'<path stroke="#000" d="')
+
+
+def svg_path(matrix: Sequence[Iterable[int]]) -> str:
+    """
+    生成深色模块的路径数据（模块坐标，每段为 y 行中心上的水平线）
+
+    Args:
+        matrix: 0/1 模块矩阵（不含静区）
+    """
+    rows = [bytes(row) for row in matrix]
+    size = len(rows)
+    fragment, x, y = _fixed_fragment(size)
+    writer = _PathWriter(x, y)
+    writer.parts.append(fragment)
+    for row_y in range(1, size):
+        writer.row(row_y, rows[row_y], _FIXED_COLS if row_y < _FIXED_ROWS else 0)
+    return writer.path()
+
+
+def svg_bytes(matrix: Sequence[Iterable[int]], scale: float = 8, border: int = 4) -> bytes:
+    """
+    由模块矩阵生成精简 SVG
+
+    Args:
+        matrix: 0/1 模块矩阵（不含静区），如 segno 的 qr.matrix 或 MicroCode.matrix
+        scale: 每个模块的像素数（可为小数）
+        border: 静区宽度（模块数）
+
+    Returns:
+        SVG 文件内容（UTF-8，无 XML 声明）
+
+    Raises:
+        ValueError: 参数无效
+    """
+    if scale <= 0 or border < 0:
+        raise ValueError('scale 必须 > 0，border 必须 >= 0')
+    rows = [bytes(row) for row in matrix]
+    return (_header(len(rows), scale, border) + svg_path(rows) + '"/></svg>').encode('ascii')
+
+
+def svg_data_uri(matrix: Sequence[Iterable[int]], scale: float = 8, border: int = 4) -> str:
+    """
+    生成可直接用于 <img src> / CSS url() 的 SVG 数据 URI（仅转义必要字符，不做整体百分号编码）
+    """
+    svg = svg_bytes(matrix, scale, border).decode('ascii')
+    return 'data:image/svg+xml,' + svg.translate(_URI_ESCAPES)
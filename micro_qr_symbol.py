@@ -0,0 +1,243 @@
+"""
+Micro QR Code 紧凑符号表示与二进制格式
+
+MicroSymbol 以位打包的形式保存模块矩阵（行优先、高位在前，M4 为 289 位 / 37 字节），
+连同版本、容错等级、掩码与编码模式压缩进 1 个头字节，整个符号即一个不可变 bytes 对象:
+
+    头字节: bit 0-2 符号编号 (版本 + 容错等级)，bit 3-4 掩码，bit 5-6 模式，bit 7 保留为 0
+    其后:   ceil(边长² / 8) 字节的打包模块，末字节低位补 0
+
+各版本记录长度: M1 17 字节、M2 23 字节、M3 30 字节、M4 38 字节。记录长度可由头字节推出，
+因此符号流 (write_symbols / read_symbols) 只需在文件头写入魔数，记录直接首尾相接；
+无法编码的条目以单字节 0xFF 占位，保持与输入行一一对应。
+"""
+
+from typing import IO, TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple, Union
+
+from micro_qr_encoder import MODES, SYMBOL_NUMBER, MicroCode, symbol_size
+
+if TYPE_CHECKING:
+    import numpy as np
+    import segno
+
+# 符号流文件头：魔数 + 格式版本
+STREAM_MAGIC = b'MQRS\x01'
+
+# 符号流中无法编码条目的占位字节
+MISSING = 0xFF
+
+_SYMBOLS = {number: key for key, number in SYMBOL_NUMBER.items()}
+_MODE_INDEX = {mode: i for i, mode in enumerate(MODES)}
+
+# 0/1 字节与 '0'/'1' 字符互转，用于纯 Python 的整行打包 / 解包
+_TO_ASCII = bytes.maketrans(b'\x00\x01', b'01')
+_FROM_ASCII = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def record_size(version: int) -> int:
+    """返回指定版本的记录字节数（含头字节）"""
+    size = symbol_size(version)
+    return 1 + (size * size + 7) // 8
+
+
+class MicroSymbol:
+    """位打包的 Micro QR Code 符号（不可变，可哈希）"""
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]):
+        """
+        由二进制记录构造（bytes 输入不复制）
+
+        Raises:
+            ValueError: 记录格式无效
+        """
+        data = data if isinstance(data, bytes) else bytes(data)
+        if not data or data[0] & 0x80 or (data[0] & 0x07) not in _SYMBOLS:
+            raise ValueError('无效的 Micro QR 符号记录')
+        version = _SYMBOLS[data[0] & 0x07][0]
+        if len(data) != record_size(version):
+            raise ValueError(f'M{version} 符号记录应为 {record_size(version)} 字节，实际为 {len(data)} 字节')
+        self._data = data
+
+    @classmethod
+    def from_matrix(cls, matrix: Iterable[Union[bytes, bytearray, Iterable[int]]], version: int,
+                    error: Optional[str], mask: int, mode: str) -> 'MicroSymbol':
+        """
+        由 0/1 模块矩阵（不含静区）及编码参数构造
+
+        Raises:
+            ValueError: 参数组合无效或矩阵尺寸不符
+        """
+        if (version, error) not in SYMBOL_NUMBER or mask not in (0, 1, 2, 3) or mode not in _MODE_INDEX:
+            raise ValueError(f'无效的符号参数: M{version} {error} mask={mask} {mode}')
+        size = symbol_size(version)
+        rows = [bytes(row) for row in matrix]
+        if len(rows) != size or any(len(row) != size for row in rows):
+            raise ValueError(f'M{version} 的模块矩阵应为 {size}×{size}')
+        count = size * size
+        pad = -count % 8
+        value = int(b''.join(rows).translate(_TO_ASCII), 2) << pad
+        header = SYMBOL_NUMBER[(version, error)] | (mask << 3) | (_MODE_INDEX[mode] << 5)
+        return cls(bytes((header,)) + value.to_bytes((count + pad) // 8, 'big'))
+
+    @classmethod
+    def from_numpy(cls, matrix: 'np.ndarray', version: int, error: Optional[str], mask: int,
+                   mode: str) -> 'MicroSymbol':
+        """由 S×S 的 0/1 NumPy 矩阵（如 micro_qr_numpy 的批量结果）构造，使用 packbits 打包"""
+        import numpy as np
+
+        if (version, error) not in SYMBOL_NUMBER or mask not in (0, 1, 2, 3) or mode not in _MODE_INDEX:
+            raise ValueError(f'无效的符号参数: M{version} {error} mask={mask} {mode}')
+        size = symbol_size(version)
+        if matrix.shape != (size, size):
+            raise ValueError(f'M{version} 的模块矩阵应为 {size}×{size}')
+        header = SYMBOL_NUMBER[(version, error)] | (mask << 3) | (_MODE_INDEX[mode] << 5)
+        return cls(bytes((header,)) + np.packbits(matrix.astype(bool, copy=False)).tobytes())
+
+    @classmethod
+    def from_code(cls, code: MicroCode) -> 'MicroSymbol':
+        """由内置编码器的结果构造"""
+        return cls.from_matrix(code.matrix, code.version, code.error, code.mask, code.mode)
+
+    @classmethod
+    def from_segno(cls, qr: 'segno.QRCode') -> 'MicroSymbol':
+        """
+        由 segno 生成的 Micro QR Code 构造
+
+        Raises:
+            ValueError: 不是 Micro QR Code
+        """
+        if not qr.is_micro:
+            raise ValueError('只能转换 Micro QR Code')
+        return cls.from_matrix(qr.matrix, int(qr.version[1:]), qr.error, qr.mask, qr.mode)
+
+    @property
+    def version(self) -> int:
+        return _SYMBOLS[self._data[0] & 0x07][0]
+
+    @property
+    def error(self) -> Optional[str]:
+        return _SYMBOLS[self._data[0] & 0x07][1]
+
+    @property
+    def mask(self) -> int:
+        return (self._data[0] >> 3) & 0x03
+
+    @property
+    def mode(self) -> str:
+        return MODES[(self._data[0] >> 5) & 0x03]
+
+    @property
+    def size(self) -> int:
+        """边长（模块数，不含静区）"""
+        return symbol_size(self.version)
+
+    @property
+    def designator(self) -> str:
+        return f'M{self.version}' + (f'-{self.error}' if self.error else '')
+
+    @property
+    def matrix(self) -> Tuple[bytearray, ...]:
+        """解包为 0/1 bytearray 行元组（与 MicroCode.matrix 相同）"""
+        size = self.size
+        count = size * size
+        value = int.from_bytes(self._data[1:], 'big') >> (-count % 8)
+        flat = format(value, f'0{count}b').encode('ascii').translate(_FROM_ASCII)
+        return tuple(bytearray(flat[i:i + size]) for i in range(0, count, size))
+
+    def packed(self) -> memoryview:
+        """打包后的模块位（零拷贝视图，不含头字节）"""
+        return memoryview(self._data)[1:]
+
+    def to_bytes(self) -> bytes:
+        """二进制记录（即内部存储本身，不复制）"""
+        return self._data
+
+    def to_numpy(self, packed: bool = False) -> 'np.ndarray':
+        """
+        转为 NumPy 数组（需要 numpy）
+
+        Args:
+            packed: True 时返回打包位的 uint8 只读视图（零拷贝），否则返回 S×S 的 0/1 uint8 矩阵
+        """
+        import numpy as np
+
+        bits = np.frombuffer(self._data, dtype=np.uint8, offset=1)
+        if packed:
+            return bits
+        size = self.size
+        return np.unpackbits(bits, count=size * size).reshape(size, size)
+
+    def to_code(self) -> MicroCode:
+        """转为内置编码器的 MicroCode"""
+        return MicroCode(self.matrix, self.version, self.error, self.mask, self.mode)
+
+    def to_segno(self) -> 'segno.QRCode':
+        """转为 segno.QRCode，以便按任意 scale / border 渲染"""
+        from micro_qr_generator import to_segno
+
+        return to_segno(self.to_code())
+
+    def __bytes__(self) -> bytes:
+        return self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, MicroSymbol) and self._data == other._data
+
+    def __hash__(self) -> int:
+        return hash(self._data)
+
+    def __repr__(self) -> str:
+        return f'MicroSymbol({self.designator}, mask={self.mask}, mode={self.mode})'
+
+
+def write_symbols(f: IO[bytes], symbols: Iterable[Optional[MicroSymbol]]) -> int:
+    """
+    写出符号流（含文件头），None 写为占位字节
+
+    Returns:
+        写入的条目数
+    """
+    f.write(STREAM_MAGIC)
+    count = 0
+    for symbol in symbols:
+        f.write(b'\xff' if symbol is None else symbol.to_bytes())
+        count += 1
+    return count
+
+
+def iter_symbols(data: Union[bytes, memoryview]) -> Iterator[Optional[MicroSymbol]]:
+    """
+    解析内存中的符号流
+
+    Raises:
+        ValueError: 文件头或记录无效
+    """
+    view = memoryview(data)
+    if bytes(view[:len(STREAM_MAGIC)]) != STREAM_MAGIC:
+        raise ValueError('不是 Micro QR 符号流（文件头不匹配）')
+    pos = len(STREAM_MAGIC)
+    end = len(view)
+    while pos < end:
+        header = view[pos]
+        if header == MISSING:
+            yield None
+            pos += 1
+            continue
+        if header & 0x80 or (header & 0x07) not in _SYMBOLS:
+            raise ValueError(f'偏移 {pos} 处的记录无效')
+        length = record_size(_SYMBOLS[header & 0x07][0])
+        if pos + length > end:
+            raise ValueError(f'偏移 {pos} 处的记录不完整')
+        yield MicroSymbol(bytes(view[pos:pos + length]))
+        pos += length
+
+
+def read_symbols(path: str) -> List[Optional[MicroSymbol]]:
+    """读取符号流文件"""
+    with open(path, 'rb') as f:
+        return list(iter_symbols(f.read()))
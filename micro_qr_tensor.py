@@ -0,0 +1,283 @@
+"""
+Micro QR Code 批量光栅化为 NumPy 张量（需要 numpy）
+
+供视觉质检、印前检查等直接消费数组的流程使用：一次给出全部数据，返回 N×H×W 的 uint8
+图像张量（或沿宽度方向按位打包的 N×H×ceil(W/8) 张量），不经过 PNG 编码再解码。
+
+- 张量按最大的符号尺寸统一画布，较小的符号居中放置，四周为浅色
+- 多进程时张量位于共享内存 (multiprocessing.shared_memory) 或 .npy 内存映射文件中，
+  各工作进程按分块直接写入自己负责的区间，只向主进程返回版本与错误信息，不回传图像
+- 符号由 micro_qr_numpy 按版本分组矢量化编码，放大通过广播赋值一次完成
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from micro_qr_encoder import plan_symbol, symbol_size, to_bytes
+from micro_qr_numpy import encode_groups
+
+
+class TensorItem(NamedTuple):
+    """单独指定编码参数的条目（未指定的字段使用 rasterize 的参数）"""
+    data: str
+    version: Optional[int] = None
+    error: Optional[str] = None
+
+
+class SymbolTensor(NamedTuple):
+    """光栅化结果"""
+    # N×H×W uint8 图像，或 N×H×ceil(W/8) 打包位（1 为深色，行内高位在前）
+    array: np.ndarray
+    # 每个条目的版本 (1-4)，无法编码的条目为 0，其图像全为浅色
+    versions: np.ndarray
+    # {条目序号: 错误信息}
+    errors: Dict[int, str]
+    scale: int
+    border: int
+
+
+class _Canvas(NamedTuple):
+    """工作进程写入时需要的张量描述（可序列化）"""
+    kind: str  # 'shm' 共享内存 / 'npy' 内存映射文件
+    location: str
+    shape: Tuple[int, ...]
+    size: int
+    scale: int
+    border: int
+    packed: bool
+    dark: int
+    light: int
+
+
+# None 为占位条目：保留其在张量中的位置，图像全为浅色
+Item = Optional[Union[str, TensorItem]]
+
+# 工作进程中已打开的张量
+_worker_array: Optional[np.ndarray] = None
+_worker_location: Optional[str] = None
+_worker_shm = None
+
+
+def tensor_shape(count: int, size: int, scale: int, border: int, packed: bool = False) -> Tuple[int, int, int]:
+    """
+    返回张量形状
+
+    Args:
+        count: 条目数
+        size: 画布中符号的最大边长（模块数，不含静区）
+        scale: 每个模块的像素数
+        border: 静区宽度（模块数）
+        packed: 是否按位打包
+    """
+    pixels = (size + 2 * border) * scale
+    return count, pixels, (pixels + 7) // 8 if packed else pixels
+
+
+def _resolve(item: Item, version: Optional[int],
+             error: Optional[str]) -> Tuple[Optional[str], Optional[int], Optional[str]]:
+    if isinstance(item, TensorItem):
+        return (item.data, item.version if item.version is not None else version,
+                item.error if item.error is not None else error)
+    return item, version, error
+
+
+def _open_target(canvas: _Canvas) -> np.ndarray:
+    """在工作进程中打开张量（每个进程只打开一次）"""
+    global _worker_array, _worker_location, _worker_shm
+    if _worker_location != canvas.location:
+        if canvas.kind == 'npy':
+            _worker_array = np.load(canvas.location, mmap_mode='r+')
+        else:
+            from multiprocessing import shared_memory
+
+            # 工作进程与主进程共用资源跟踪器，段由主进程在全部写入完成后释放
+            _worker_shm = shared_memory.SharedMemory(canvas.location)
+            _worker_array = np.ndarray(canvas.shape, dtype=np.uint8, buffer=_worker_shm.buf)
+        _worker_location = canvas.location
+    return _worker_array
+
+
+def _fill(out: np.ndarray, canvas: _Canvas, start: int,
+          items: Sequence[Tuple[Optional[str], Optional[int], Optional[str]]]) -> Tuple[int, List[int], Dict[int, str]]:
+    """
+    编码一个分块并写入 out[start:start + len(items)]
+
+    Returns:
+        (start, 各条目版本, {全局序号: 错误信息})
+    """
+    versions = [0] * len(items)
+    errors: Dict[int, str] = {}
+    block = out[start:start + len(items)]
+    block[...] = 0 if canvas.packed else canvas.light
+
+    by_params: Dict[Tuple[Optional[int], Optional[str]], List[int]] = {}
+    for i, (data, version, error) in enumerate(items):
+        if data is None:
+            errors[start + i] = '空条目'
+            continue
+        by_params.setdefault((version, error), []).append(i)
+    modules = canvas.size + 2 * canvas.border
+    lut = np.array([canvas.light, canvas.dark], dtype=np.uint8)
+    for (version, error), positions in by_params.items():
+        groups, failed = encode_groups([items[i][0] for i in positions], version, error, return_exceptions=True)
+        for local, e in failed.items():
+            errors[start + positions[local]] = str(e)
+        for group in groups:
+            index = np.array([positions[i] for i in group.indices], dtype=np.intp)
+            size = symbol_size(group.version)
+            offset = canvas.border + (canvas.size - size) // 2
+            dark = np.zeros((len(index), modules, modules), dtype=np.uint8)
+            dark[:, offset:offset + size, offset:offset + size] = group.matrices
+            scale = canvas.scale
+            if canvas.packed:
+                rows = np.packbits(np.repeat(dark, scale, axis=2), axis=2)
+                pixels = np.broadcast_to(rows[:, :, None, :], (len(index), modules, scale, rows.shape[2]))
+            else:
+                values = lut[dark]
+                pixels = np.broadcast_to(values[:, :, None, :, None], (len(index), modules, scale, modules, scale))
+            block[index] = pixels.reshape(len(index), *block.shape[1:])
+            for i in index:
+                versions[i] = group.version
+    return start, versions, errors
+
+
+def _fill_worker(canvas: _Canvas, start: int,
+                 items: Sequence[Tuple[Optional[str], Optional[int], Optional[str]]]) -> Tuple[int, List[int], Dict[int, str]]:
+    return _fill(_open_target(canvas), canvas, start, items)
+
+
+def plan_canvas(items: Sequence[Tuple[Optional[str], Optional[int], Optional[str]]], boost: bool = True) -> int:
+    """
+    按容量表确定画布需要容纳的最大符号边长（不构建符号，无法编码的条目忽略）
+
+    Returns:
+        最大边长（模块数），全部无法编码时为 M1 的边长
+    """
+    largest = 1
+    for data, version, error in items:
+        if data is None:
+            continue
+        if version is not None:
+            largest = max(largest, version)
+            continue
+        if largest == 4:
+            continue
+        try:
+            largest = max(largest, plan_symbol(to_bytes(data), None, error, boost)[0])
+        except ValueError:
+            pass
+    return symbol_size(largest)
+
+
+def rasterize(datas: Sequence[Item], scale: int = 4, border: int = 2, version: Optional[int] = None,
+              error: Optional[str] = 'L', packed: bool = False, path: Optional[str] = None,
+              workers: Optional[int] = None, chunk_size: int = 2048, dark: int = 0,
+              light: int = 255) -> SymbolTensor:
+    """
+    批量编码并光栅化为张量
+
+    Args:
+        datas: 要编码的文本，或单独指定参数的 TensorItem；None 为占位条目
+        scale: 每个模块的像素数
+        border: 静区宽度（模块数）
+        version: 指定版本 (1-4)，None 表示逐条自动选择（画布按最大的符号确定）
+        error: 容错等级，None 表示允许 M1
+        packed: True 时返回沿宽度按位打包的张量（1 为深色），否则为灰度值
+        path: .npy 文件路径；给出时张量以内存映射方式创建于该文件并直接返回 np.memmap
+        workers: 工作进程数，None 表示 CPU 核数；1 或数据只有一个分块时在当前进程内完成
+        chunk_size: 每个工作任务的条目数
+        dark: 深色模块的灰度值（packed 为 False 时）
+        light: 浅色模块与静区的灰度值（packed 为 False 时）
+
+    Returns:
+        SymbolTensor；无法编码的条目记录在 errors 中，不抛出异常
+
+    Raises:
+        ValueError: 参数无效
+    """
+    if scale < 1 or border < 0 or chunk_size < 1:
+        raise ValueError('scale 与 chunk_size 必须 >= 1，border 必须 >= 0')
+    if not (0 <= dark <= 255 and 0 <= light <= 255):
+        raise ValueError('dark / light 必须在 0-255 之间')
+    if version is not None and version not in (1, 2, 3, 4):
+        raise ValueError(f'无效的版本: {version}')
+    items = [_resolve(item, version, error) for item in datas]
+    size = plan_canvas(items)
+    shape = tensor_shape(len(items), size, scale, border, packed)
+    workers = max(1, workers or os.cpu_count() or 1)
+    chunks = [(start, items[start:start + chunk_size]) for start in range(0, len(items), chunk_size)]
+    parallel = workers > 1 and len(chunks) > 1
+
+    if path is not None:
+        out = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=shape)
+        canvas = _Canvas('npy', path, shape, size, scale, border, packed, dark, light)
+        if parallel:
+            # 文件头已写出，工作进程各自以 r+ 映射同一文件
+            out.flush()
+        results = _run(out, canvas, chunks, workers if parallel else 1)
+        out.flush()
+        return _collect(out, results, len(items), scale, border)
+
+    if not parallel:
+        out = np.empty(shape, dtype=np.uint8)
+        canvas = _Canvas('shm', '', shape, size, scale, border, packed, dark, light)
+        return _collect(out, _run(out, canvas, chunks, 1), len(items), scale, border)
+
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape))))
+    try:
+        view = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        canvas = _Canvas('shm', shm.name, shape, size, scale, border, packed, dark, light)
+        results = _run(view, canvas, chunks, workers)
+        # 共享内存段随即释放，结果复制为普通数组（需要零拷贝时请使用 path）
+        out = view.copy()
+        del view
+    finally:
+        shm.close()
+        shm.unlink()
+    return _collect(out, results, len(items), scale, border)
+
+
+def _run(out: np.ndarray, canvas: _Canvas, chunks: List[Tuple[int, list]],
+         workers: int) -> List[Tuple[int, List[int], Dict[int, str]]]:
+    if workers == 1:
+        return [_fill(out, canvas, start, chunk) for start, chunk in chunks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        futures = [pool.submit(_fill_worker, canvas, start, chunk) for start, chunk in chunks]
+        return [future.result() for future in futures]
+
+
+def _collect(out: np.ndarray, results: List[Tuple[int, List[int], Dict[int, str]]], count: int,
+             scale: int, border: int) -> SymbolTensor:
+    versions = np.zeros(count, dtype=np.int8)
+    errors: Dict[int, str] = {}
+    for start, chunk_versions, chunk_errors in results:
+        versions[start:start + len(chunk_versions)] = chunk_versions
+        errors.update(chunk_errors)
+    return SymbolTensor(out, versions, dict(sorted(errors.items())), scale, border)
+
+
+def items_from_rows(rows: Sequence, default_error: str = 'L') -> Tuple[List[Item], Dict[int, str]]:
+    """
+    由批量输入行 (micro_qr_batch.BatchRow) 构造条目，参数无效的行以占位条目保留位置
+
+    Returns:
+        (条目列表, {条目序号: 错误信息（含行号）})
+    """
+    from micro_qr_batch import row_params
+
+    items: List[Item] = []
+    errors: Dict[int, str] = {}
+    for index, row in enumerate(rows):
+        try:
+            version, error = row_params(row, default_error)
+        except ValueError as e:
+            errors[index] = f'第 {row.line_no} 行: {e}'
+            items.append(None)
+            continue
+        items.append(TensorItem(row.data, version, error))
+    return items, errors
@@ -0,0 +1,8 @@
+"""测试公共配置：使仓库根目录下的 micro_qr_* 模块可被导入"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,93 @@
+"""解码器回读：各模式 × M1-M4 × 容错等级的往返、格式信息纠错与 Reed-Solomon 校验"""
+
+import itertools
+
+import pytest
+
+from micro_qr_decoder import FORMAT_MAX_ERRORS, decode, verify
+from micro_qr_encoder import ERROR_LEVELS, encode, to_bytes, version_tables
+
+PAYLOADS = {
+    'numeric': ['0', '12345', '01234567890123456789'],
+    'alphanumeric': ['A', 'AB-12', 'HELLO WORLD $%*+./:'],
+    'byte': ['a', 'micro', 'héllo wörld'],
+    'kanji': ['点', '高山', '漢字テスト'],
+}
+
+SYMBOLS = [(v, e) for v, levels in ERROR_LEVELS.items() for e in levels]
+
+# 格式信息的 15 个模块：第 8 列第 1-8 行与第 8 行第 1-7 列
+FORMAT_MODULES = [(i + 1, 8) for i in range(8)] + [(8, i + 1) for i in range(7)]
+
+
+def _copy(matrix):
+    return [bytearray(row) for row in matrix]
+
+
+def _encode(data, version, error):
+    try:
+        return encode(data, version, error, boost=False)
+    except ValueError:
+        pytest.skip(f'M{version}-{error} 容纳不下 {data!r}')
+
+
+@pytest.mark.parametrize('version,error', SYMBOLS)
+@pytest.mark.parametrize('mode,data', [(m, d) for m, items in PAYLOADS.items() for d in items])
+def test_round_trip(mode, data, version, error):
+    code = _encode(data, version, error)
+    assert code.mode == mode
+    decoded = decode(code.matrix)
+    assert decoded.data == to_bytes(data)
+    assert decoded.text == data
+    assert (decoded.version, decoded.error, decoded.mask) == (version, error, code.mask)
+    assert decoded.modes == (mode,)
+
+
+@pytest.mark.parametrize('mask', [0, 1, 2, 3])
+def test_round_trip_all_masks(mask):
+    code = encode('MASK-42', 4, 'L', mask)
+    assert decode(code.matrix).mask == mask
+
+
+@pytest.mark.parametrize('version,error', SYMBOLS)
+@pytest.mark.parametrize('flips', range(1, FORMAT_MAX_ERRORS + 1))
+def test_format_info_with_bit_errors(version, error, flips):
+    code = _encode('1', version, error)
+    for modules in itertools.combinations(FORMAT_MODULES, flips):
+        matrix = _copy(code.matrix)
+        for i, j in modules:
+            matrix[i][j] ^= 1
+        decoded = decode(matrix)
+        assert (decoded.version, decoded.error, decoded.mask, decoded.data) == (version, error, code.mask, b'1')
+
+
+@pytest.mark.parametrize('version,error', SYMBOLS)
+def test_corrupted_data_fails_reed_solomon(version, error):
+    code = _encode('1', version, error)
+    positions = version_tables(version).positions
+    for i, j in (positions[0], positions[len(positions) // 2], positions[-1]):
+        matrix = _copy(code.matrix)
+        matrix[i][j] ^= 1
+        with pytest.raises(ValueError, match='Reed-Solomon'):
+            decode(matrix)
+
+
+def test_wrong_size_rejected():
+    with pytest.raises(ValueError):
+        decode([bytearray(12)] * 12)
+
+
+def test_verify_reports_mismatch():
+    code = encode('ABC')
+    assert verify(code.matrix, 'ABC').data == b'ABC'
+    with pytest.raises(ValueError, match='内容不一致'):
+        verify(code.matrix, 'ABD')
+
+
+def test_verify_explains_segno_kanji_quirk():
+    segno = pytest.importorskip('segno')
+    qr = segno.make_micro('é-')
+    if qr.mode != 'kanji':
+        pytest.skip('segno 已校验 Shift_JIS 尾字节')
+    with pytest.raises(ValueError, match='汉字模式'):
+        verify(qr.matrix, 'é-')
@@ -0,0 +1,155 @@
+"""标签光栅：ZPL 压缩数据解压后与光栅一致、EPL 位图取反、tcp:// 流按顺序送达"""
+
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from micro_qr_decoder import decode
+from micro_qr_encoder import encode
+from micro_qr_label import LabelStream, epl_bytes, pbm_bytes, zpl_bytes
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# M1-M4 各一个符号
+SYMBOLS = ['1', 'AB12', 'micro', 'LABEL-0123456789']
+
+_GFA = re.compile(r'\^XA\^FO0,0\^GFA,(\d+),(\d+),(\d+),(.*?)\^FS\^XZ\n')
+
+
+def _count(c):
+    return ord(c) - ord('G') + 1 if c.isupper() else (ord(c) - ord('g') + 1) * 20
+
+
+def unzpl(data, row_bytes):
+    """按 ZPL II ASCII 压缩规则展开 ^GFA 数据（独立于被测实现）"""
+    width = row_bytes * 2
+    rows = []
+    i = 0
+    while i < len(data):
+        if data[i] == ':':
+            rows.append(rows[-1])
+            i += 1
+            continue
+        row = ''
+        while len(row) < width:
+            c = data[i]
+            i += 1
+            if c == ',':
+                row += '0' * (width - len(row))
+            elif c == '!':
+                row += 'F' * (width - len(row))
+            else:
+                n = 0
+                while c in 'GHIJKLMNOPQRSTUVWXYghijklmnopqrstuvwxyz':
+                    n += _count(c)
+                    c = data[i]
+                    i += 1
+                row += c * (n or 1)
+        assert len(row) == width
+        rows.append(row)
+    return bytes.fromhex(''.join(rows))
+
+
+def raster(matrix, scale, border):
+    """PBM 的像素数据部分"""
+    return pbm_bytes(matrix, scale, border).split(b'\n', 2)[2]
+
+
+def matrix_from_raster(body, row_bytes, width, scale, border):
+    """由打包的像素行还原模块矩阵（取每个模块的左上角像素）"""
+    size = width // scale - 2 * border
+    rows = []
+    for i in range(border, border + size):
+        start = (i * scale) * row_bytes
+        bits = int.from_bytes(body[start:start + row_bytes], 'big') >> (row_bytes * 8 - width)
+        rows.append(bytes((bits >> (width - 1 - (border + j) * scale)) & 1 for j in range(size)))
+    return rows
+
+
+@pytest.mark.parametrize('border', [0, 4])
+@pytest.mark.parametrize('scale', [1, 3, 8, 25])
+@pytest.mark.parametrize('data', SYMBOLS)
+def test_zpl_decompresses_to_raster(data, scale, border):
+    matrix = encode(data, error='L' if data != '1' else None).matrix
+    body = raster(matrix, scale, border)
+    total, total2, row_bytes, gfa = _GFA.fullmatch(zpl_bytes(matrix, scale, border).decode('ascii')).groups()
+    assert int(total) == int(total2) == len(body)
+    assert unzpl(gfa, int(row_bytes)) == body
+
+    plain = _GFA.fullmatch(zpl_bytes(matrix, scale, border, compress=False).decode('ascii')).group(4)
+    assert bytes.fromhex(plain) == body
+
+
+@pytest.mark.parametrize('border', [0, 4])
+@pytest.mark.parametrize('scale', [1, 3, 8])
+def test_epl_is_inverted_raster(scale, border):
+    matrix = encode('LABEL-0123456789', 4, 'L').matrix
+    body = raster(matrix, scale, border)
+    header, bitmap = epl_bytes(matrix, scale, border).split(b'GW', 1)
+    x, y, row_bytes, height, bits = bitmap.split(b',', 4)
+    assert bits.endswith(b'\nP1\n')
+    assert bytes(b ^ 0xff for b in bits[:-4]) == body
+    assert int(row_bytes) * int(height) == len(body)
+
+
+def test_raster_round_trips_through_decoder():
+    matrix = encode('LABEL-0123456789', 4, 'L').matrix
+    body = raster(matrix, 3, 2)
+    width = (17 + 4) * 3
+    assert decode(matrix_from_raster(body, (width + 7) // 8, width, 3, 2)).data == b'LABEL-0123456789'
+
+
+@pytest.fixture
+def listener():
+    """本机 TCP 监听端，接收一个连接直到对端关闭写方向"""
+    server = socket.create_server(('127.0.0.1', 0))
+    received = bytearray()
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            while True:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                received.extend(chunk)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield f'tcp://127.0.0.1:{server.getsockname()[1]}', received, thread
+    server.close()
+
+
+def test_label_stream_to_tcp(listener):
+    target, received, thread = listener
+    labels = [zpl_bytes(encode(f'N{k}').matrix, 2, 1) for k in range(20)]
+    with LabelStream(target, timeout=10) as stream:
+        offsets = [stream.add(f'{k}.zpl', label)['offset'] for k, label in enumerate(labels)]
+    thread.join(10)
+    assert bytes(received) == b''.join(labels)
+    assert offsets == [sum(map(len, labels[:k])) for k in range(len(labels))]
+    assert stream.count == len(labels) and stream.bytes_out == len(received)
+
+
+def test_sequence_streams_epl_over_tcp_in_order(listener):
+    target, received, thread = listener
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'micro_qr_generator.py'), '--sequence', 'SN', '00001', '200',
+         '--format', 'epl', '--scale', '2', '--border', '2', '-j', '2', '--chunk-size', '16',
+         '--stream', target],
+        cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    thread.join(10)
+    labels = bytes(received).split(b'\nN\nGW')[1:]
+    assert len(labels) == 200
+    for k, label in enumerate(labels, 1):
+        x, y, row_bytes, height, rest = label.split(b',', 4)
+        row_bytes, height = int(row_bytes), int(height)
+        assert rest[row_bytes * height:] == b'\nP1\n'
+        body = bytes(b ^ 0xff for b in rest[:row_bytes * height])
+        assert decode(matrix_from_raster(body, row_bytes, height, 2, 2)).data == b'SN%05d' % k
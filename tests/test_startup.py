@@ -0,0 +1,25 @@
+"""micro_qr_generator 的导入开销：重量级依赖须延迟导入，导入耗时不超过基准的默认预算"""
+
+import pytest
+
+from micro_qr_bench import IMPORT_BUDGET_MS, LAZY_MODULES, STARTUP_RUNS, _import_times
+
+
+@pytest.fixture(scope='module')
+def import_runs():
+    return [_import_times('micro_qr_generator') for _ in range(STARTUP_RUNS)]
+
+
+@pytest.mark.parametrize('module', ['segno', 'PIL', 'numpy'])
+def test_heavy_modules_not_imported(import_runs, module):
+    assert all(module not in times for times in import_runs)
+
+
+def test_lazy_modules_not_imported(import_runs):
+    loaded = set().union(*import_runs)
+    assert [m for m in LAZY_MODULES if m in loaded] == []
+
+
+def test_import_within_budget(import_runs):
+    # 取多次测量的最小值，排除调度抖动
+    assert min(times['micro_qr_generator'] for times in import_runs) <= IMPORT_BUDGET_MS